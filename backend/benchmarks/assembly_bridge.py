@@ -0,0 +1,111 @@
+# backend/benchmarks/assembly_bridge.py
+"""Per-call overhead of the removed assemble_scene_sync bridge vs. native async assembly.
+
+The bridge ran every assembly on a fresh ThreadPoolExecutor with a fresh
+event loop (asyncio.run) and blocked the calling loop until it finished.
+This benchmark replays both paths against a fake LLM with fixed latency:
+
+    cd backend && python -m benchmarks.assembly_bridge --calls 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import statistics
+import time
+from typing import Awaitable, Callable, List
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models import Base
+from services import scene_assembler
+from services.scene_assembler import SceneData, assemble_scene
+
+
+class FakeLLMClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def complete(self, messages, max_tokens=None, use_cache=True, kind="completion") -> str:
+        await asyncio.sleep(self.latency)
+        return "A young woman walks through the rose garden."
+
+
+def _scene_data() -> SceneData:
+    return SceneData(
+        direction="[ANNA] walks through [GARDEN]",
+        assets={
+            "ANNA": {"type": "character", "name": "Anna", "base": {"core": "young woman"}, "variant": None},
+            "GARDEN": {"type": "location", "name": "Garden", "base": {"core": "rose garden"}, "variant": None},
+        },
+        camera={"core": "medium shot"},
+        lighting={"core": "golden hour"},
+        style={"core": "cinematic"},
+        shot_class="medium"
+    )
+
+
+def legacy_bridge(scene_data: SceneData, db) -> str:
+    """The removed assemble_scene_sync, as called from a running event loop."""
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        return executor.submit(asyncio.run, assemble_scene(scene_data, db)).result()
+
+
+async def run_load(call: Callable[[], Awaitable[str]], calls: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one():
+        async with semaphore:
+            await call()
+        latencies.append(time.perf_counter() - start)
+
+    # All calls are issued at once, so latency includes time spent queued
+    # behind other calls (or behind a blocked event loop)
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+
+def _report(name: str, wall: float, latencies: List[float], ideal: float):
+    ordered = sorted(latencies)
+    p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+    # Wall time beyond what the fake LLM alone needs at this concurrency
+    overhead_ms = (wall - ideal) * 1000 / len(latencies)
+    print(
+        f"{name:<8} wall {wall * 1000:9.1f} ms  p50 {statistics.median(latencies) * 1000:8.2f} ms  "
+        f"p95 {p95 * 1000:8.2f} ms  overhead/call {overhead_ms:8.3f} ms"
+    )
+
+
+async def main(calls: int, concurrency: int, latency: float):
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    scene_assembler.get_llm_client = lambda session: FakeLLMClient(latency)
+    scene_data = _scene_data()
+
+    async def native():
+        return await assemble_scene(scene_data, db)
+
+    async def legacy():
+        # Blocks the loop, exactly like the bridge did inside a request
+        return legacy_bridge(scene_data, db)
+
+    ideal = -(-calls // concurrency) * latency
+    print(f"{calls} calls, concurrency {concurrency}, fake LLM latency {latency * 1000:.0f} ms")
+    for name, call in (("native", native), ("legacy", legacy)):
+        start = time.perf_counter()
+        latencies = await run_load(call, calls, concurrency)
+        _report(name, time.perf_counter() - start, latencies, ideal)
+    db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency, args.latency_ms / 1000))
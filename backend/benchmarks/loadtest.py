@@ -0,0 +1,242 @@
+# backend/benchmarks/loadtest.py
+"""Ramp a realistic editor traffic mix against the API and report per-endpoint latency.
+
+In process (temporary SQLite database, mock LLM provider, app lifespan run
+in this process):
+
+    cd backend
+    LLM_RATE_PER_SECOND_MOCK=0 python -m benchmarks.loadtest --stages 1,5,10,25,50 --stage-seconds 15
+
+Against a running instance (switch it to the mock provider first, or pass
+--use-mock-provider to let the harness do it via PUT /api/settings):
+
+    python -m benchmarks.loadtest --url http://localhost:8000 --use-mock-provider
+
+Each virtual editor loops over a weighted mix of CRUD, list, generate and
+enrich calls with a short think time. A stage whose error rate or p95
+jumps compared to the previous one marks where SQLite locking or
+threadpool exhaustion sets in.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
+
+LAYERS = '{"core": "weathered face, grey beard", "standard": "broad shoulders", "detail": "scar above the eye"}'
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, seconds: float) -> Dict:
+        ordered = sorted(self.latencies)
+
+        def pct(q: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(int(len(ordered) * q), len(ordered) - 1)] * 1000, 2)
+
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "rps": round(count / seconds, 2) if seconds else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
+
+
+class Workload:
+    """Shared fixture data and the weighted request mix."""
+
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.project_id = 0
+        self.asset_ids: List[int] = []
+        self.asset_names: List[str] = []
+        self.variant_ids: List[int] = []
+        self.scene_ids: List[int] = []
+
+    async def setup(self, assets: int, scenes: int):
+        response = await self.client.post("/api/projects", json={"name": "Load test"})
+        response.raise_for_status()
+        self.project_id = response.json()["id"]
+        for index in range(assets):
+            (await self._create_asset(index)).raise_for_status()
+            await self._create_variant(self.asset_ids[-1])
+        for _ in range(scenes):
+            await self._create_scene()
+
+    async def _create_asset(self, index: int) -> httpx.Response:
+        asset_type = ("character", "location", "object")[index % 3]
+        response = await self.client.post("/api/assets", json={
+            "name": f"Asset_{index}_{self.rng.randrange(10**6)}", "type": asset_type,
+            "base_prompt": LAYERS, "project_id": self.project_id
+        })
+        if response.status_code == 201:
+            self.asset_ids.append(response.json()["id"])
+            self.asset_names.append(response.json()["name"])
+        return response
+
+    async def _create_variant(self, asset_id: int) -> httpx.Response:
+        response = await self.client.post("/api/variants", json={
+            "asset_id": asset_id, "name": "Winter", "delta_prompt": '{"core": "heavy wool coat"}'
+        })
+        if response.status_code == 201:
+            self.variant_ids.append(response.json()["id"])
+        return response
+
+    def _action_text(self) -> str:
+        tags = self.rng.sample(self.asset_names, min(3, len(self.asset_names)))
+        return " ".join(f"[{tag.upper()}] walks past" for tag in tags) + " the crowded market at dusk"
+
+    async def _create_scene(self) -> httpx.Response:
+        response = await self.client.post("/api/scenes", json={
+            "name": "Scene", "project_id": self.project_id, "action_text": self._action_text()
+        })
+        if response.status_code == 201:
+            self.scene_ids.append(response.json()["id"])
+        return response
+
+    def mix(self) -> List[Tuple[str, int, Callable[[], Awaitable[httpx.Response]]]]:
+        c, pick = self.client, self.rng.choice
+        return [
+            ("GET /api/assets", 20, lambda: c.get(f"/api/assets?project_id={self.project_id}")),
+            ("GET /api/scenes", 15, lambda: c.get(f"/api/scenes?project_id={self.project_id}")),
+            ("GET /api/assets/{id}", 10, lambda: c.get(f"/api/assets/{pick(self.asset_ids)}")),
+            ("PUT /api/assets/{id}", 8, lambda: c.put(
+                f"/api/assets/{pick(self.asset_ids)}", json={"base_prompt": LAYERS})),
+            ("POST /api/assets", 3, lambda: self._create_asset(len(self.asset_ids))),
+            ("POST /api/variants", 4, lambda: self._create_variant(pick(self.asset_ids))),
+            ("PUT /api/variants/{id}", 4, lambda: c.put(
+                f"/api/variants/{pick(self.variant_ids)}", json={"delta_prompt": '{"core": "linen shirt"}'})),
+            ("POST /api/scenes", 3, self._create_scene),
+            ("PUT /api/scenes/{id}", 10, lambda: c.put(
+                f"/api/scenes/{pick(self.scene_ids)}", json={"action_text": self._action_text()})),
+            ("GET /api/settings", 5, lambda: c.get("/api/settings")),
+            ("POST /api/scenes/{id}/generate", 8, lambda: c.post(
+                f"/api/scenes/{pick(self.scene_ids)}/generate", json={})),
+            ("POST /api/llm/enrich", 5, lambda: c.post("/api/llm/enrich", json={
+                "asset_type": "character",
+                "messages": [{"role": "user", "content": f"A sailor number {self.rng.randrange(10**6)}"}]
+            })),
+        ]
+
+
+async def run_stage(workload: Workload, editors: int, seconds: float, think: float) -> Dict[str, EndpointStats]:
+    stats: Dict[str, EndpointStats] = {}
+    mix = workload.mix()
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    calls = {name: call for name, _, call in mix}
+    deadline = time.monotonic() + seconds
+
+    async def editor():
+        while time.monotonic() < deadline:
+            name = workload.rng.choices(names, weights)[0]
+            endpoint = stats.setdefault(name, EndpointStats())
+            start = time.perf_counter()
+            try:
+                response = await calls[name]()
+                failed = response.status_code >= 400
+            except (httpx.HTTPError, IndexError):
+                failed = True
+            endpoint.latencies.append(time.perf_counter() - start)
+            endpoint.errors += failed
+            if think:
+                await asyncio.sleep(workload.rng.uniform(0, 2 * think))
+
+    await asyncio.gather(*(editor() for _ in range(editors)))
+    return stats
+
+
+async def _in_process_client(stack: AsyncExitStack) -> httpx.AsyncClient:
+    directory = stack.enter_context(tempfile.TemporaryDirectory())
+    # database.py reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'loadtest.db')}"
+    from main import app
+
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    # Unhandled app errors (e.g. pool timeouts) count as 500s instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return await stack.enter_async_context(
+        httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60)
+    )
+
+
+async def main(args) -> Dict:
+    rng = random.Random(args.seed)
+    results = {"target": args.url or "in-process", "stages": []}
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=args.url, timeout=60))
+        else:
+            client = await _in_process_client(stack)
+
+        if args.use_mock_provider or not args.url:
+            response = await client.put("/api/settings", json={"llm_provider": "mock", "llm_model": "mock"})
+            response.raise_for_status()
+
+        workload = Workload(client, rng)
+        await workload.setup(args.assets, args.scenes)
+        print(f"Setup: {len(workload.asset_ids)} assets, {len(workload.scene_ids)} scenes", file=sys.stderr)
+
+        for editors in args.stages:
+            start = time.monotonic()
+            stats = await run_stage(workload, editors, args.stage_seconds, args.think_ms / 1000)
+            elapsed = time.monotonic() - start
+            endpoints = {name: stat.summary(elapsed) for name, stat in sorted(stats.items())}
+            total = EndpointStats(
+                latencies=[latency for stat in stats.values() for latency in stat.latencies],
+                errors=sum(stat.errors for stat in stats.values())
+            ).summary(elapsed)
+            results["stages"].append({"editors": editors, "seconds": round(elapsed, 2),
+                                      "total": total, "endpoints": endpoints})
+            _print_stage(editors, total, endpoints)
+    return results
+
+
+def _print_stage(editors: int, total: Dict, endpoints: Dict[str, Dict]):
+    print(f"\n== {editors} editors: {total['rps']} req/s, p95 {total['p95_ms']} ms, "
+          f"errors {total['error_rate']:.2%}", file=sys.stderr)
+    print(f"{'endpoint':<34} {'req':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>7}", file=sys.stderr)
+    for name, s in endpoints.items():
+        print(f"{name:<34} {s['requests']:>6} {s['rps']:>8} {s['p50_ms']:>9} {s['p95_ms']:>9} "
+              f"{s['p99_ms']:>9} {s['error_rate']:>7.2%}", file=sys.stderr)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running instance (default: in-process app)")
+    parser.add_argument("--use-mock-provider", action="store_true",
+                        help="switch the target's LLM provider to the offline mock")
+    parser.add_argument("--stages", type=lambda v: [int(x) for x in v.split(",")], default=[1, 5, 10, 25],
+                        help="comma-separated concurrent editors per stage")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--think-ms", type=float, default=250.0, help="mean pause between an editor's requests")
+    parser.add_argument("--assets", type=int, default=200, help="assets created before the first stage")
+    parser.add_argument("--scenes", type=int, default=50, help="scenes created before the first stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,217 @@
+# backend/benchmarks/suite.py
+"""Benchmarks for the backend hot paths on a synthetic large project.
+
+    cd backend
+    python -m benchmarks.suite run --output results.json            # full size
+    python -m benchmarks.suite run --scale 0.1 --output quick.json  # 1k assets, 5k variants, 500 scenes
+    python -m benchmarks.suite compare baseline.json results.json --threshold 0.15
+
+``compare`` exits non-zero when any benchmark's median got slower than the
+baseline by more than the threshold, so it can gate a release.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from models import Asset, Base, Scene
+from benchmarks.synthetic import VOCABULARY, SyntheticProject, generate_project, seed_globals
+
+FULL_SIZE = {"assets": 10_000, "variants": 50_000, "scenes": 5_000}
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 2) -> Dict[str, float]:
+    """Time ``fn`` and summarize in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(samples)
+    return {
+        "iterations": iterations,
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "min_ms": round(ordered[0], 4),
+        "p95_ms": round(ordered[max(int(len(ordered) * 0.95) - 1, 0)], 4),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_benchmarks(db: Session, data: SyntheticProject, client, rng: random.Random) -> Dict[str, Callable]:
+    from services.prompt_engine import parse_scene_text, resolve_asset_ref, aggregate_scene_data, resolve_style_id
+    from services.scene_assembler import build_assembly_prompt
+
+    scenes = db.query(Scene).filter(Scene.id.in_(rng.sample(data.scene_ids, min(50, len(data.scene_ids))))).all()
+    texts = [scene.action_text for scene in scenes]
+    refs = [ref for text in texts for ref in parse_scene_text(text)][:200]
+    style_id = resolve_style_id(scenes[0], None, db)
+    scene_data = [aggregate_scene_data(scene, style_id, db) for scene in scenes]
+    asset_ids = [row.id for row in db.query(Asset.id).filter(Asset.project_id == data.project_id).limit(50)]
+    cursor = {"scene": 0}
+
+    def next_scene() -> Scene:
+        cursor["scene"] = (cursor["scene"] + 1) % len(scenes)
+        return scenes[cursor["scene"]]
+
+    def get(url: str):
+        response = client.get(url)
+        response.raise_for_status()
+        return response
+
+    return {
+        "parse_scene_text": lambda: [parse_scene_text(text) for text in texts],
+        "resolve_asset_ref": lambda: [resolve_asset_ref(ref, data.project_id, db) for ref in refs],
+        "aggregate_scene_data": lambda: aggregate_scene_data(next_scene(), style_id, db),
+        "build_assembly_prompt": lambda: [build_assembly_prompt(item, 300, "narrative") for item in scene_data],
+        "list_assets": lambda: get(f"/api/assets?project_id={data.project_id}"),
+        "list_scenes": lambda: get(f"/api/scenes?project_id={data.project_id}"),
+        "get_settings": lambda: get("/api/settings"),
+        "search": lambda: get(
+            f"/api/search?project_id={data.project_id}&q={rng.choice(VOCABULARY)}+{rng.choice(VOCABULARY)[:3]}"
+        ),
+        "suggest_tags": lambda: get(
+            f"/api/projects/{data.project_id}/tags?prefix={rng.choice(data.asset_names)[:2]}"
+        ),
+        "similar_assets": lambda: get(f"/api/assets/{rng.choice(asset_ids)}/similar"),
+        "duplicates": lambda: get(f"/api/projects/{data.project_id}/duplicates?kind=variant"),
+    }
+
+
+# The list endpoints return the whole project and take seconds at full size
+ITERATIONS = {"list_assets": 3, "list_scenes": 5}
+WARMUP = {"list_assets": 1, "list_scenes": 1}
+
+
+def run(scale: float, seed: int, iterations: int, only: Optional[List[str]] = None) -> Dict:
+    from fastapi.testclient import TestClient
+    from database import get_db
+    from main import app
+
+    size = {key: max(int(value * scale), 1) for key, value in FULL_SIZE.items()}
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'bench.db')}", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        with session_factory() as db:
+            start = time.perf_counter()
+            seed_globals(db)
+            data = generate_project(db, seed=seed, **size)
+            generate_s = time.perf_counter() - start
+        print(f"Generated {size} in {generate_s:.1f}s", file=sys.stderr)
+
+        def override_get_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        results = {}
+        try:
+            with session_factory() as db:
+                benchmarks = build_benchmarks(db, data, TestClient(app), random.Random(seed))
+                for name, fn in benchmarks.items():
+                    if only and name not in only:
+                        continue
+                    count = min(ITERATIONS.get(name, iterations), iterations)
+                    results[name] = measure(fn, count, WARMUP.get(name, 2))
+                    print(f"{name:<24} median {results[name]['median_ms']:10.3f} ms", file=sys.stderr)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "size": size,
+            "seed": seed,
+            "generate_seconds": round(generate_s, 2),
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Print a comparison table; return the names of regressed benchmarks."""
+    regressions = []
+    print(f"{'benchmark':<24} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            print(f"{name:<24} {'-':>12} {result['median_ms']:>10.3f}ms {'new':>9}")
+            continue
+        change = (result["median_ms"] - before["median_ms"]) / before["median_ms"] if before["median_ms"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<24} {before['median_ms']:>10.3f}ms {result['median_ms']:>10.3f}ms {change:>+8.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    if baseline["meta"].get("size") != current["meta"].get("size"):
+        print("warning: runs used different data sizes", file=sys.stderr)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the suite and write JSON results")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="fraction of the full data size")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--iterations", type=int, default=30)
+    run_parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    run_parser.add_argument("--output", help="results file (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed median slowdown")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run(args.scale, args.seed, args.iterations, args.only)
+        output = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
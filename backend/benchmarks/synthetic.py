@@ -0,0 +1,131 @@
+# backend/benchmarks/synthetic.py
+"""Synthetic large projects for benchmarks and load tests."""
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from init_db import DEFAULT_LIGHTINGS, DEFAULT_SETTINGS, DEFAULT_SHOT_TYPES, DEFAULT_STYLES
+from models import Asset, AssetType, Project, Scene, Settings, Variant
+from models.layers import layer_columns
+
+FIRST_NAMES = ["Anna", "Bruno", "Clara", "Dmitri", "Elena", "Farid", "Greta", "Hugo", "Ines", "Jonas"]
+PLACES = ["Library", "Harbor", "Market", "Tower", "Garden", "Station", "Chapel", "Forest", "Bridge", "Cellar"]
+THINGS = ["Lantern", "Map", "Sword", "Letter", "Compass", "Violin", "Crown", "Mirror", "Clock", "Key"]
+VARIANT_NAMES = ["Winter", "Night", "Medieval", "Wounded", "Formal", "Rain", "Young", "Old", "Ruined", "Festive"]
+VOCABULARY = (
+    "slowly quietly turns toward across beneath the old weathered light shadow window door stairs "
+    "crowd distant smoke rain wind glances reaches whispers steps running stops pauses looks back "
+    "golden pale heavy narrow wide empty crowded warm cold bright dim silver dust ash candle"
+).split()
+
+# Share of assets per type; the rest are objects
+TYPE_MIX = [(AssetType.CHARACTER, 0.5), (AssetType.LOCATION, 0.3), (AssetType.OBJECT, 0.2)]
+
+
+@dataclass
+class SyntheticProject:
+    project_id: int
+    asset_names: List[str]
+    scene_ids: List[int]
+
+
+def _layers(rng: random.Random, words: int = 12) -> str:
+    def phrase() -> str:
+        return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+    return json.dumps({"core": phrase(), "standard": phrase(), "detail": phrase()})
+
+
+def _asset_name(asset_type: AssetType, index: int) -> str:
+    pool = {AssetType.CHARACTER: FIRST_NAMES, AssetType.LOCATION: PLACES}.get(asset_type, THINGS)
+    return f"{pool[index % len(pool)]}_{index}"
+
+
+def _action_text(rng: random.Random, tags: List[str], words: int) -> str:
+    parts = []
+    for _ in range(words):
+        if rng.random() < len(tags) / words:
+            parts.append(f"[{rng.choice(tags)}]")
+        parts.append(rng.choice(VOCABULARY))
+    return " ".join(parts)
+
+
+def seed_globals(db: Session):
+    """Default settings and global shot types, styles and lightings, as init_db creates them."""
+    now = datetime.utcnow()
+    db.execute(insert(Settings), [{"key": key, "value": value} for key, value in DEFAULT_SETTINGS])
+    db.execute(insert(Asset), [
+        {"name": name, "type": asset_type, "base_prompt": prompt, **layer_columns(prompt),
+         "is_global": True, "created_at": now, "updated_at": now}
+        for asset_type, defaults in (
+            (AssetType.SHOT_TYPE, DEFAULT_SHOT_TYPES),
+            (AssetType.STYLE, DEFAULT_STYLES),
+            (AssetType.LIGHTING_SETUP, DEFAULT_LIGHTINGS),
+        )
+        for name, prompt in defaults
+    ])
+    db.commit()
+
+
+def generate_project(
+    db: Session,
+    assets: int = 10_000,
+    variants: int = 50_000,
+    scenes: int = 5_000,
+    action_words: int = 250,
+    tags_per_scene: int = 6,
+    seed: int = 0
+) -> SyntheticProject:
+    """Bulk-insert one project of the given size and return its IDs."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    project = Project(name=f"Synthetic {assets}/{variants}/{scenes}", description="Benchmark data")
+    db.add(project)
+    db.flush()
+
+    types = rng.choices([t for t, _ in TYPE_MIX], weights=[w for _, w in TYPE_MIX], k=assets)
+    names = [_asset_name(asset_type, index) for index, asset_type in enumerate(types)]
+    # Bulk inserts bypass the model validators; fill the layer columns here
+    prompts = [_layers(rng) for _ in names]
+    db.execute(insert(Asset), [
+        {"name": name, "type": asset_type, "base_prompt": prompt, **layer_columns(prompt),
+         "project_id": project.id, "is_global": False, "created_at": now, "updated_at": now}
+        for name, asset_type, prompt in zip(names, types, prompts)
+    ])
+    asset_ids = [row.id for row in db.query(Asset.id).filter(Asset.project_id == project.id).order_by(Asset.id)]
+
+    deltas = [_layers(rng, words=6) for _ in range(variants)]
+    db.execute(insert(Variant), [
+        {"name": VARIANT_NAMES[index // assets % len(VARIANT_NAMES)],
+         "delta_prompt": delta, **layer_columns(delta), "asset_id": asset_ids[index % assets],
+         "created_at": now, "updated_at": now}
+        for index, delta in enumerate(deltas)
+    ])
+
+    shot_ids = [row.id for row in db.query(Asset.id).filter(Asset.type == AssetType.SHOT_TYPE)]
+    lighting_ids = [row.id for row in db.query(Asset.id).filter(Asset.type == AssetType.LIGHTING_SETUP)]
+    variants_per_asset = max(variants // max(assets, 1), 0)
+    scene_rows = []
+    for index in range(scenes):
+        tags = []
+        for _ in range(tags_per_scene):
+            name = rng.choice(names)
+            if variants_per_asset and rng.random() < 0.5:
+                name = f"{name}:{VARIANT_NAMES[rng.randrange(min(variants_per_asset, len(VARIANT_NAMES)))]}"
+            tags.append(name.upper())
+        scene_rows.append({
+            "name": f"Scene {index + 1}", "project_id": project.id,
+            "action_text": _action_text(rng, tags, action_words),
+            "shot_type_id": rng.choice(shot_ids) if shot_ids else None,
+            "lighting_id": rng.choice(lighting_ids) if lighting_ids else None,
+            "created_at": now, "updated_at": now
+        })
+    db.execute(insert(Scene), scene_rows)
+    db.commit()
+
+    scene_ids = [row.id for row in db.query(Scene.id).filter(Scene.project_id == project.id).order_by(Scene.id)]
+    return SyntheticProject(project_id=project.id, asset_names=names, scene_ids=scene_ids)
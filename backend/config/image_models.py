@@ -1,5 +1,9 @@
 # backend/config/image_models.py
 
+# "assembler": "llm" (default) writes the prompt with an LLM call,
+# "template" joins the asset layers locally in "structure" order. Structure
+# entries are sections of the scene data (see template_assembler) or keys of
+# static preset text such as "quality".
 IMAGE_MODEL_PRESETS = {
     "nano_banana_pro": {
         "name": "Nano Banana Pro",
@@ -11,7 +15,7 @@ IMAGE_MODEL_PRESETS = {
         "name": "Midjourney",
         "max_words": 80,
         "style": "keywords",
-        "structure": ["subject", "style", "parameters"]
+        "structure": ["subject", "setting", "composition", "atmosphere", "style"]
     },
     "dall_e": {
         "name": "DALL-E",
@@ -23,13 +27,48 @@ IMAGE_MODEL_PRESETS = {
         "name": "Stable Diffusion",
         "max_words": 75,
         "style": "keywords",
-        "structure": ["subject", "style", "quality"]
+        "structure": ["subject", "setting", "composition", "atmosphere", "style", "quality"],
+        "quality": "highly detailed, sharp focus"
     }
 }
 
 DEFAULT_IMAGE_MODEL = "nano_banana_pro"
 
+ALL_LAYERS = ["core", "standard", "detail"]
+
+# Which asset layers are sent to the assembler for each shot class, per asset
+# type, for the base prompt and the variant delta. Types not listed get all
+# layers. A preset may override any entry via its own "layer_rules" key.
+DEFAULT_LAYER_RULES = {
+    # Face fills the frame: no outfit, background reduced to a blur
+    "close_up": {
+        "character": {"base": ["core"], "variant": []},
+        "location": {"base": ["core"], "variant": ["core"]},
+    },
+    "medium": {
+        "character": {"base": ["core", "standard"], "variant": ["core", "standard"]},
+        "location": {"base": ["core"], "variant": ["core"]},
+        "object": {"base": ["core", "standard"], "variant": ["core", "standard"]},
+    },
+    "wide": {},
+    # No characters in the direction: the location carries the shot
+    "establishing": {},
+}
+
 
 def get_preset(name: str) -> dict:
     """Get image model preset by name, fallback to default."""
     return IMAGE_MODEL_PRESETS.get(name, IMAGE_MODEL_PRESETS[DEFAULT_IMAGE_MODEL])
+
+
+def get_layer_rules(preset: dict) -> dict:
+    """Default layer rules with the preset's overrides applied."""
+    rules = {shot: dict(types) for shot, types in DEFAULT_LAYER_RULES.items()}
+    for shot, types in preset.get("layer_rules", {}).items():
+        rules.setdefault(shot, {}).update(types)
+    return rules
+
+
+def select_layers(rules: dict, shot_class: str, asset_type: str, part: str) -> list:
+    """Layers of an asset's base or variant to keep for a shot class."""
+    return rules.get(shot_class, {}).get(asset_type, {}).get(part, ALL_LAYERS)
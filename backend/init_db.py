@@ -1,7 +1,8 @@
 # backend/init_db.py
 from loguru import logger
 from database import engine
-from models import Base, Asset, AssetType, Settings
+from models import Base, Asset, AssetType, Settings, Scene, SceneAssetRef, SEARCH_COLUMNS, search_index_ddl
+from models.layers import LAYER_NAMES, layer_columns
 
 # Default shot types
 DEFAULT_SHOT_TYPES = [
@@ -49,6 +50,7 @@ DEFAULT_SETTINGS = [
     ("llm_model", "anthropic/claude-4.5-sonnet"),
     ("llm_base_url", "https://openrouter.ai/api/v1"),
     ("image_model_preset", "nano_banana_pro"),
+    ("llm_cache_enabled", "false"),
 ]
 
 
@@ -57,6 +59,30 @@ def run_migrations():
     from sqlalchemy import text
 
     with engine.connect() as conn:
+        # Indexes for case-insensitive tag lookups (create_all skips existing tables)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_assets_name_lower ON assets (lower(name))"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_variants_asset_name_lower ON variants (asset_id, lower(name))"
+        ))
+        conn.commit()
+
+        # Structured layer columns, filled once from the JSON prompts
+        for table, source in (("assets", "base_prompt"), ("variants", "delta_prompt")):
+            result = conn.execute(text(f"PRAGMA table_info({table})"))
+            columns = [row[1] for row in result.fetchall()]
+            if columns and 'layer_core' not in columns:
+                for layer in LAYER_NAMES:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN layer_{layer} TEXT NOT NULL DEFAULT ''"))
+                rows = conn.execute(text(f"SELECT id, {source} FROM {table}")).fetchall()
+                if rows:
+                    conn.execute(
+                        text(f"UPDATE {table} SET layer_core = :layer_core, layer_standard = :layer_standard, "
+                             f"layer_detail = :layer_detail WHERE id = :id"),
+                        [{"id": row_id, **layer_columns(prompt)} for row_id, prompt in rows]
+                    )
+                conn.commit()
+                logger.info(f"Migration: Split {len(rows)} {table} prompts into layer columns")
+
         # Check if style_id column exists in scenes table
         result = conn.execute(text("PRAGMA table_info(scenes)"))
         columns = [row[1] for row in result.fetchall()]
@@ -71,6 +97,22 @@ def run_migrations():
                 # Column might already exist or table doesn't exist yet
                 pass
 
+        if 'is_stale' not in columns and len(columns) > 0:
+            try:
+                conn.execute(text('ALTER TABLE scenes ADD COLUMN is_stale BOOLEAN NOT NULL DEFAULT 0'))
+                conn.commit()
+                logger.info("Migration: Added is_stale column to scenes table")
+            except Exception as e:
+                pass
+
+        if 'prompt_input_hash' not in columns and len(columns) > 0:
+            try:
+                conn.execute(text('ALTER TABLE scenes ADD COLUMN prompt_input_hash VARCHAR(64)'))
+                conn.commit()
+                logger.info("Migration: Added prompt_input_hash column to scenes table")
+            except Exception as e:
+                pass
+
         # Check if lighting_id column exists in scenes table
         if 'lighting_id' not in columns and len(columns) > 0:
             try:
@@ -81,6 +123,16 @@ def run_migrations():
                 # Column might already exist or table doesn't exist yet
                 pass
 
+        # Full-text indexes (needs the layer columns above)
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        for table in SEARCH_COLUMNS:
+            if table in tables and f"{table}_fts" not in tables:
+                for statement in search_index_ddl(table):
+                    conn.execute(text(statement))
+                conn.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+                conn.commit()
+                logger.info(f"Migration: Built the full-text index for {table}")
+
 
 def init_database():
     """Create tables and seed default data."""
@@ -94,6 +146,12 @@ def init_database():
     Session = sessionmaker(bind=engine)
     session = Session()
 
+    # Index scene references for databases created before scene_asset_refs existed
+    if session.query(SceneAssetRef.id).first() is None and session.query(Scene.id).first() is not None:
+        from services.scene_refs import rebuild_scene_refs
+
+        logger.info(f"Migration: Indexed references of {rebuild_scene_refs(session)} scenes")
+
     # Check if already initialized
     existing_shots = session.query(Asset).filter(
         Asset.type == AssetType.SHOT_TYPE,
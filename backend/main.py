@@ -1,8 +1,9 @@
 # backend/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from loguru import logger
+import asyncio
 import sys
 
 # Configure loguru
@@ -14,9 +15,14 @@ logger.add(
 )
 
 from init_db import init_database
+from database import SessionLocal, engine
+from services.llm_client import close_http_client
+from services.llm_telemetry import run_telemetry_writer
+from services.job_queue import start_job_queue, stop_job_queue
+from services import metrics
 from routers import (
     projects_router, assets_router, variants_router,
-    scenes_router, settings_router, llm_router
+    scenes_router, settings_router, llm_router, jobs_router, search_router
 )
 
 
@@ -24,8 +30,17 @@ from routers import (
 async def lifespan(app: FastAPI):
     # Startup
     init_database()
+    telemetry_writer = asyncio.create_task(run_telemetry_writer(SessionLocal))
+    start_job_queue(SessionLocal)
     yield
     # Shutdown
+    await stop_job_queue()
+    telemetry_writer.cancel()
+    try:
+        await telemetry_writer
+    except asyncio.CancelledError:
+        pass
+    await close_http_client()
 
 
 app = FastAPI(
@@ -34,6 +49,7 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:80"],
@@ -42,14 +58,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.instrument_engine(engine)
+
 app.include_router(projects_router)
 app.include_router(assets_router)
 app.include_router(variants_router)
 app.include_router(scenes_router)
 app.include_router(settings_router)
 app.include_router(llm_router)
+app.include_router(jobs_router)
+app.include_router(search_router)
 
 
 @app.get("/api/health")
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
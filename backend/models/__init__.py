@@ -3,4 +3,9 @@ from .project import Project
 from .asset import Asset, AssetType
 from .variant import Variant
 from .scene import Scene
+from .scene_asset_ref import SceneAssetRef
 from .settings import Settings
+from .llm_cache import LLMCacheEntry
+from .llm_request import LLMRequestRecord
+from .job import Job, JobStatus
+from .search_index import SEARCH_COLUMNS, search_index_ddl
@@ -1,8 +1,9 @@
 # backend/models/asset.py
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Enum, Index, func
+from sqlalchemy.orm import relationship, validates
 import enum
 from .base import Base, TimestampMixin
+from .layers import LayerColumnsMixin
 
 
 class AssetType(str, enum.Enum):
@@ -14,7 +15,7 @@ class AssetType(str, enum.Enum):
     LIGHTING_SETUP = "lighting_setup"
 
 
-class Asset(Base, TimestampMixin):
+class Asset(Base, TimestampMixin, LayerColumnsMixin):
     __tablename__ = "assets"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -26,3 +27,13 @@ class Asset(Base, TimestampMixin):
 
     project = relationship("Project", backref="assets")
     variants = relationship("Variant", back_populates="asset")
+
+    __table_args__ = (
+        # Case-insensitive tag lookups: lower(name) IN (...)
+        Index("ix_assets_name_lower", func.lower(name)),
+    )
+
+    @validates("base_prompt")
+    def _split_base_prompt(self, key, value):
+        self._sync_layers(value)
+        return value
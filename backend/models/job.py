@@ -0,0 +1,25 @@
+# backend/models/job.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+import enum
+from .base import Base, TimestampMixin
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(Base, TimestampMixin):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(32), nullable=False)  # "enrich", "enrich_variant", "generate_scene"
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.PENDING, index=True)
+    payload = Column(Text, nullable=False)  # JSON request body
+    result = Column(Text, nullable=True)  # JSON response body
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,52 @@
+# backend/models/layers.py
+import json
+from typing import Dict, Optional
+from sqlalchemy import Column, Text
+
+LAYER_NAMES = ("core", "standard", "detail")
+
+
+def parse_layered_prompt(prompt_str: Optional[str]) -> Dict[str, str]:
+    """Parse a layered prompt JSON string to dict."""
+    if not prompt_str:
+        return {"core": "", "standard": "", "detail": ""}
+
+    try:
+        data = json.loads(prompt_str)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        # Legacy: treat as plain text, put everything in core
+        return {"core": prompt_str, "standard": "", "detail": ""}
+    return {
+        layer: value if isinstance(value, str) else ("" if value is None else str(value))
+        for layer, value in ((layer, data.get(layer)) for layer in LAYER_NAMES)
+    }
+
+
+def layer_columns(prompt_str: Optional[str]) -> Dict[str, str]:
+    """Column values (layer_core, ...) for a layered prompt string."""
+    return {f"layer_{layer}": value for layer, value in parse_layered_prompt(prompt_str).items()}
+
+
+class LayerColumnsMixin:
+    """The layers of the model's JSON prompt, decoded once on write.
+
+    The JSON text stays the API representation; models keep these columns
+    in sync from a validator on their prompt attribute.
+    """
+    layer_core = Column(Text, nullable=False, default="")
+    layer_standard = Column(Text, nullable=False, default="")
+    layer_detail = Column(Text, nullable=False, default="")
+
+    @property
+    def layers(self) -> Dict[str, str]:
+        return {
+            "core": self.layer_core or "",
+            "standard": self.layer_standard or "",
+            "detail": self.layer_detail or ""
+        }
+
+    def _sync_layers(self, prompt_str: Optional[str]):
+        for column, value in layer_columns(prompt_str).items():
+            setattr(self, column, value)
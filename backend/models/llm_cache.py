@@ -0,0 +1,18 @@
+# backend/models/llm_cache.py
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from .base import Base, TimestampMixin
+
+
+class LLMCacheEntry(Base, TimestampMixin):
+    __tablename__ = "llm_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), unique=True, index=True, nullable=False)
+    model = Column(String(255), nullable=False)
+    response = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
@@ -0,0 +1,24 @@
+# backend/models/llm_request.py
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
+from .base import Base
+
+
+class LLMRequestRecord(Base):
+    __tablename__ = "llm_requests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, nullable=False, index=True)
+    provider = Column(String(255), nullable=False)
+    model = Column(String(255), nullable=False)
+    kind = Column(String(32), nullable=False, default="completion")
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    generation_time_ms = Column(Integer, nullable=False, default=0)
+    status = Column(String(16), nullable=False)
+    error_message = Column(Text, nullable=True)
+    cached = Column(Boolean, nullable=False, default=False)
+    coalesced = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_llm_requests_group", "provider", "model", "kind", "timestamp"),
+    )
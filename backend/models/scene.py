@@ -1,6 +1,6 @@
 # backend/models/scene.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
+from sqlalchemy.orm import relationship, validates
 from .base import Base, TimestampMixin
 
 
@@ -15,8 +15,19 @@ class Scene(Base, TimestampMixin):
     lighting_id = Column(Integer, ForeignKey("assets.id"), nullable=True)
     action_text = Column(Text, nullable=True)
     generated_prompt = Column(Text, nullable=True)
+    # The generated prompt predates a change to the scene or its assets
+    is_stale = Column(Boolean, nullable=False, default=False)
+    # Fingerprint of the assembly inputs behind generated_prompt
+    prompt_input_hash = Column(String(64), nullable=True)
 
     project = relationship("Project", backref="scenes")
     shot_type = relationship("Asset", foreign_keys=[shot_type_id])
     style = relationship("Asset", foreign_keys=[style_id])
     lighting = relationship("Asset", foreign_keys=[lighting_id])
+    # Deleted through the ORM: SQLite only honours ON DELETE CASCADE with foreign_keys=ON
+    asset_refs = relationship("SceneAssetRef", cascade="all, delete-orphan")
+
+    @validates("generated_prompt")
+    def _fresh_prompt(self, key, value):
+        self.is_stale = False
+        return value
@@ -0,0 +1,18 @@
+# backend/models/scene_asset_ref.py
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from .base import Base
+
+
+class SceneAssetRef(Base):
+    """One [NAME] / [NAME:Variant] tag in a scene's action text."""
+    __tablename__ = "scene_asset_refs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scene_id = Column(Integer, ForeignKey("scenes.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Folded like the resolver's lookups, so edits match by name even before the asset exists
+    asset_name = Column(String(255), nullable=False)
+    variant_name = Column(String(255), nullable=False, default="")  # "" for a plain [NAME]
+
+    __table_args__ = (
+        Index("ix_scene_asset_refs_name", "asset_name", "variant_name"),
+    )
@@ -0,0 +1,47 @@
+# backend/models/search_index.py
+"""FTS5 full-text indexes over assets, variants and scenes.
+
+Each indexed table gets an external-content ``<table>_fts`` virtual table
+kept in sync by triggers, so the ORM, bulk inserts and raw SQL all update
+it. The DDL runs when the source table is created; init_db.run_migrations
+creates and backfills it for databases that predate the indexes.
+"""
+from typing import Dict, List, Tuple
+from sqlalchemy import DDL, event
+from .asset import Asset
+from .variant import Variant
+from .scene import Scene
+
+LAYER_COLUMNS = ("name", "layer_core", "layer_standard", "layer_detail")
+
+SEARCH_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "assets": LAYER_COLUMNS,
+    "variants": LAYER_COLUMNS,
+    "scenes": ("name", "action_text", "generated_prompt"),
+}
+
+
+def search_index_ddl(table: str) -> List[str]:
+    """CREATE statements for the table's FTS index and its sync triggers."""
+    fts = f"{table}_fts"
+    columns = SEARCH_COLUMNS[table]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        # Only the indexed columns: flag updates such as scenes.is_stale don't reindex
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+    ]
+
+
+for _model in (Asset, Variant, Scene):
+    for _statement in search_index_ddl(_model.__tablename__):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
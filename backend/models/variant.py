@@ -1,10 +1,11 @@
 # backend/models/variant.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index, func
+from sqlalchemy.orm import relationship, validates
 from .base import Base, TimestampMixin
+from .layers import LayerColumnsMixin
 
 
-class Variant(Base, TimestampMixin):
+class Variant(Base, TimestampMixin, LayerColumnsMixin):
     __tablename__ = "variants"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -13,3 +14,12 @@ class Variant(Base, TimestampMixin):
     asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
 
     asset = relationship("Asset", back_populates="variants")
+
+    __table_args__ = (
+        Index("ix_variants_asset_name_lower", asset_id, func.lower(name)),
+    )
+
+    @validates("delta_prompt")
+    def _split_delta_prompt(self, key, value):
+        self._sync_layers(value)
+        return value
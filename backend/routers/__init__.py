@@ -5,3 +5,5 @@ from .variants import router as variants_router
 from .scenes import router as scenes_router
 from .settings import router as settings_router
 from .llm import router as llm_router
+from .jobs import router as jobs_router
+from .search import router as search_router
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
 from models import Asset, AssetType
-from schemas import AssetCreate, AssetUpdate, AssetResponse, AssetListResponse
+from schemas import AssetCreate, AssetUpdate, AssetResponse, AssetListResponse, SimilarItem
+from services.scene_refs import mark_asset_dependents_stale
 
 router = APIRouter(prefix="/api/assets", tags=["assets"])
 
@@ -33,6 +34,9 @@ def list_assets(
 def create_asset(asset: AssetCreate, db: Session = Depends(get_db)):
     db_asset = Asset(**asset.model_dump())
     db.add(db_asset)
+    db.flush()
+    # Tags that did not resolve before may resolve to the new asset now
+    mark_asset_dependents_stale(db, db_asset)
     db.commit()
     db.refresh(db_asset)
     return db_asset
@@ -46,15 +50,42 @@ def get_asset(asset_id: int, db: Session = Depends(get_db)):
     return asset
 
 
+@router.get("/{asset_id}/similar", response_model=List[SimilarItem])
+def get_similar_assets(
+    asset_id: int,
+    project_id: Optional[int] = Query(None, description="Scope for a global asset; defaults to the asset's project"),
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.0, ge=0.0, le=1.0),
+    db: Session = Depends(get_db)
+):
+    """Assets with the most similar prompts, among the project's and the global ones."""
+    from services.similarity import find_similar
+
+    asset = db.query(Asset).filter(Asset.id == asset_id).first()
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if not asset.is_global:
+        project_id = asset.project_id
+    return find_similar(db, project_id, "asset", asset_id, limit, min_score)
+
+
 @router.put("/{asset_id}", response_model=AssetResponse)
 def update_asset(asset_id: int, asset: AssetUpdate, db: Session = Depends(get_db)):
     db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if not db_asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    for key, value in asset.model_dump(exclude_unset=True).items():
+    old_name, old_project_id = db_asset.name, db_asset.project_id
+    changes = {
+        key: value for key, value in asset.model_dump(exclude_unset=True).items()
+        if getattr(db_asset, key) != value
+    }
+    for key, value in changes.items():
         setattr(db_asset, key, value)
 
+    if changes:
+        mark_asset_dependents_stale(db, db_asset, {old_name, db_asset.name}, previous_project_id=old_project_id)
+
     db.commit()
     db.refresh(db_asset)
     return db_asset
@@ -65,5 +96,6 @@ def delete_asset(asset_id: int, db: Session = Depends(get_db)):
     asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
+    mark_asset_dependents_stale(db, asset)
     db.delete(asset)
     db.commit()
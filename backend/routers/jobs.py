@@ -0,0 +1,72 @@
+# backend/routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from typing import AsyncIterator, Optional
+from database import get_db
+from models import Job, JobStatus
+from schemas import JobCreate, JobResponse, JobListResponse
+from services.job_queue import JOB_KINDS, TERMINAL_STATUSES, get_job_queue, serialize_job, submit_job
+from services.streaming import format_sse, sse_response
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.post("", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(request: JobCreate, db: Session = Depends(get_db)):
+    """Queue LLM work; poll GET /api/jobs/{id} or subscribe to its events for the result."""
+    try:
+        payload = JOB_KINDS[request.kind].schema.model_validate(request.payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    return serialize_job(submit_job(db, request.kind, payload))
+
+
+@router.get("", response_model=JobListResponse)
+def list_jobs(
+    status: Optional[JobStatus] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Job)
+    if status is not None:
+        query = query.filter(Job.status == status)
+    return JobListResponse(jobs=[serialize_job(job) for job in query.order_by(Job.id.desc()).limit(limit).all()])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: int, db: Session = Depends(get_db)):
+    """Server-sent ``status`` events for every state change until the job finishes."""
+    queue = get_job_queue()
+    # Subscribe before reading the row so no change is missed in between
+    updates = queue.subscribe(job_id) if queue is not None else None
+    job = db.get(Job, job_id)
+    if not job:
+        if updates is not None:
+            queue.unsubscribe(job_id, updates)
+        raise HTTPException(status_code=404, detail="Job not found")
+    current = JobResponse(**serialize_job(job)).model_dump(mode="json")
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield format_sse("status", current)
+            if updates is None or JobStatus(current["status"]) in TERMINAL_STATUSES:
+                return
+            while True:
+                state = await updates.get()
+                yield format_sse("status", JobResponse(**state).model_dump(mode="json"))
+                if state["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            if updates is not None:
+                queue.unsubscribe(job_id, updates)
+
+    return sse_response(events())
@@ -1,14 +1,21 @@
 # backend/routers/llm.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from loguru import logger
 from database import get_db
 from schemas import (
     EnrichRequest, EnrichVariantRequest,
-    EnrichLayeredResponse, LayeredPrompt,
-    LLMLogsResponse, TestConnectionResponse
+    EnrichLayeredResponse,
+    LLMLogsResponse, LLMMetricsResponse, LLMCacheStatsResponse, TestConnectionResponse
 )
-from services.llm_client import get_llm_client, get_request_logs, LLMError
+from services.llm_client import (
+    LLMClient, get_llm_client, get_request_logs, parse_layered_response,
+    LLMError, LLMUnavailableError
+)
+from services.completion_cache import get_cache_stats, clear_cache
+from services.llm_telemetry import METRICS_WINDOWS, compute_llm_metrics, flush_request_logs
+from services.streaming import LayeredStreamParser, format_sse, sse_response
+from typing import AsyncIterator
 import traceback
 
 router = APIRouter(prefix="/api/llm", tags=["llm"])
@@ -22,14 +29,48 @@ def get_llm_logs():
     return {"logs": list(reversed(logs))}
 
 
+@router.get("/metrics", response_model=LLMMetricsResponse)
+def get_llm_metrics(
+    window: str = Query("24h", pattern="^(" + "|".join(METRICS_WINDOWS) + ")$"),
+    db: Session = Depends(get_db)
+):
+    """Latency percentiles, throughput, error rate and token totals per provider/model/kind."""
+    # Include requests still waiting for the next batch write
+    flush_request_logs(db)
+    return compute_llm_metrics(db, window)
+
+
+@router.get("/cache", response_model=LLMCacheStatsResponse)
+def get_llm_cache_stats(db: Session = Depends(get_db)):
+    """Get size and hit count of the persistent completion cache."""
+    return get_cache_stats(db)
+
+
+@router.delete("/cache", response_model=LLMCacheStatsResponse)
+def clear_llm_cache(db: Session = Depends(get_db)):
+    """Drop every cached completion."""
+    clear_cache(db)
+    return get_cache_stats(db)
+
+
+def _llm_client(db: Session) -> LLMClient:
+    """The active client, with the session closed so no connection is held while the LLM runs."""
+    try:
+        return get_llm_client(db)
+    finally:
+        db.close()
+
+
 @router.post("/test", response_model=TestConnectionResponse)
-def test_connection(db: Session = Depends(get_db)):
+async def test_connection(db: Session = Depends(get_db)):
     """Test LLM connection with a simple request."""
     try:
-        client = get_llm_client(db)
-        message = client.complete(
+        client = _llm_client(db)
+        message = await client.complete(
             messages=[{"role": "user", "content": "Say 'OK' if you can read this."}],
-            max_tokens=10
+            max_tokens=10,
+            use_cache=False,
+            kind="test"
         )
         return TestConnectionResponse(
             success=True,
@@ -43,21 +84,19 @@ def test_connection(db: Session = Depends(get_db)):
 
 
 @router.post("/enrich", response_model=EnrichLayeredResponse)
-def enrich_asset(request: EnrichRequest, db: Session = Depends(get_db)):
+async def enrich_asset(request: EnrichRequest, db: Session = Depends(get_db)):
     """Enrich asset with layered prompt structure."""
     try:
-        client = get_llm_client(db)
+        client = _llm_client(db)
         messages = [{"role": m.role, "content": m.content} for m in request.messages]
-        result = client.enrich(
+        result = await client.enrich(
             asset_type=request.asset_type,
             messages=messages,
             current_prompt=request.current_prompt
         )
-        outfit = result.get("outfit_suggestion")
-        return EnrichLayeredResponse(
-            layers=LayeredPrompt(**{k: v for k, v in result.items() if k != "outfit_suggestion"}),
-            outfit_suggestion=LayeredPrompt(**outfit) if outfit else None
-        )
+        return EnrichLayeredResponse.from_result(result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except LLMError as e:
         raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
@@ -66,20 +105,86 @@ def enrich_asset(request: EnrichRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/enrich-variant", response_model=EnrichLayeredResponse)
-def enrich_variant(request: EnrichVariantRequest, db: Session = Depends(get_db)):
+async def enrich_variant(request: EnrichVariantRequest, db: Session = Depends(get_db)):
     """Enrich variant with layered delta structure."""
     try:
-        client = get_llm_client(db)
+        client = _llm_client(db)
         messages = [{"role": m.role, "content": m.content} for m in request.messages]
-        result = client.enrich_variant(
+        result = await client.enrich_variant(
             asset_type=request.asset_type,
             base_prompt=request.base_prompt,
             messages=messages,
             current_delta=request.current_delta
         )
-        return EnrichLayeredResponse(layers=LayeredPrompt(**result))
+        return EnrichLayeredResponse.from_result(result)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except LLMError as e:
         raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"LLM Error: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"LLM error: {str(e)}")
+
+
+async def _layered_events(deltas: AsyncIterator[str], with_outfit: bool) -> AsyncIterator[str]:
+    """Turn completion deltas into SSE events, one per completed layer."""
+    parser = LayeredStreamParser()
+    try:
+        async for delta in deltas:
+            for field, value in parser.feed(delta):
+                if field == "outfit_suggestion" and not with_outfit:
+                    continue
+                yield format_sse("layer", {"field": field, "value": value})
+
+        result = parser.result()
+        if not parser.fields:
+            # Not recognisably JSON while streaming; let the strict parser decide
+            result = parse_layered_response(parser.full_text)
+        if not with_outfit:
+            result.pop("outfit_suggestion", None)
+        response = EnrichLayeredResponse.from_result(result)
+        yield format_sse("done", response.model_dump())
+    except LLMError as e:
+        yield format_sse("error", {"detail": str(e)})
+    except Exception as e:
+        logger.error(f"LLM Error: {traceback.format_exc()}")
+        yield format_sse("error", {"detail": f"LLM error: {str(e)}"})
+
+
+@router.post("/enrich/stream")
+async def enrich_asset_stream(request: EnrichRequest, db: Session = Depends(get_db)):
+    """Stream asset enrichment as server-sent events.
+
+    Emits a ``layer`` event as soon as each of core/standard/detail/
+    outfit_suggestion is complete, then ``done`` with the full result.
+    """
+    try:
+        client = _llm_client(db)
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    messages = [{"role": m.role, "content": m.content} for m in request.messages]
+    deltas = client.stream_enrich(
+        asset_type=request.asset_type,
+        messages=messages,
+        current_prompt=request.current_prompt
+    )
+    return sse_response(_layered_events(deltas, with_outfit=True))
+
+
+@router.post("/enrich-variant/stream")
+async def enrich_variant_stream(request: EnrichVariantRequest, db: Session = Depends(get_db)):
+    """Stream variant enrichment as server-sent events."""
+    try:
+        client = _llm_client(db)
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    messages = [{"role": m.role, "content": m.content} for m in request.messages]
+    deltas = client.stream_enrich_variant(
+        asset_type=request.asset_type,
+        base_prompt=request.base_prompt,
+        messages=messages,
+        current_delta=request.current_delta
+    )
+    return sse_response(_layered_events(deltas, with_outfit=False))
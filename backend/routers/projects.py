@@ -1,10 +1,14 @@
 # backend/routers/projects.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, sessionmaker
+from typing import AsyncIterator, List, Literal
 from database import get_db
-from models import Project
-from schemas import ProjectCreate, ProjectUpdate, ProjectResponse
+from models import Project, Scene
+from schemas import (
+    ProjectCreate, ProjectUpdate, ProjectResponse, GenerateAllRequest, SceneResponse, TagSuggestion,
+    DuplicateReport
+)
+from services.streaming import format_sse, sse_response
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
@@ -52,3 +56,88 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Project not found")
     db.delete(project)
     db.commit()
+
+
+@router.get("/{project_id}/stale-scenes", response_model=List[SceneResponse])
+def list_stale_scenes(project_id: int, db: Session = Depends(get_db)):
+    """Scenes whose generated prompt predates a change to the scene or its assets."""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return db.query(Scene).filter(
+        Scene.project_id == project_id, Scene.is_stale == True
+    ).order_by(Scene.created_at).all()
+
+
+@router.get("/{project_id}/tags", response_model=List[TagSuggestion])
+def suggest_tags(
+    project_id: int,
+    prefix: str = Query("", max_length=255),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Autocomplete for [NAME] and [NAME:VARIANT] tags over project and global assets."""
+    from services.tag_index import search_tags
+
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return search_tags(db, project_id, prefix.lstrip("["), limit)
+
+
+@router.get("/{project_id}/duplicates", response_model=DuplicateReport)
+def find_duplicate_prompts(
+    project_id: int,
+    kind: Literal["asset", "variant"] = Query("asset"),
+    threshold: float = Query(0.9, ge=0.5, le=1.0),
+    db: Session = Depends(get_db)
+):
+    """Clusters of near-identical prompts among the project's and the global assets or variants."""
+    from services.similarity import find_duplicates
+
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"kind": kind, "threshold": threshold, "clusters": find_duplicates(db, project_id, kind, threshold)}
+
+
+@router.post("/{project_id}/generate-all")
+async def generate_all_scenes(
+    project_id: int,
+    request: GenerateAllRequest,
+    db: Session = Depends(get_db)
+):
+    """Generate prompts for the project's scenes in parallel, as server-sent events.
+
+    Emits one ``scene`` event per scene as soon as it is committed, then
+    ``done`` with the totals.
+    """
+    from services.batch_generation import select_scene_ids, generate_scenes
+
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    scene_ids = select_scene_ids(db, project_id, request.scene_ids, request.stale_only)
+    # The request session is closed before the body streams; scenes use their own
+    session_factory = sessionmaker(bind=db.get_bind())
+
+    async def events() -> AsyncIterator[str]:
+        total = len(scene_ids)
+        completed = failed = 0
+        yield format_sse("start", {"total": total, "scene_ids": scene_ids})
+        results = generate_scenes(
+            session_factory, scene_ids,
+            style_id=request.style_id, assembler=request.assembler,
+            polish=request.polish, concurrency=request.concurrency, force=request.force
+        )
+        try:
+            async for result in results:
+                completed += 1
+                failed += result["status"] == "error"
+                yield format_sse("scene", {**result, "completed": completed, "total": total})
+        finally:
+            await results.aclose()
+        yield format_sse("done", {"total": total, "succeeded": completed - failed, "failed": failed})
+
+    return sse_response(events())
@@ -1,10 +1,16 @@
 # backend/routers/scenes.py
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, sessionmaker
+from typing import AsyncIterator, List, Optional
 from database import get_db
-from models import Scene, Asset, AssetType
-from schemas import SceneCreate, SceneUpdate, SceneResponse, GeneratePromptRequest
+from models import Scene
+from schemas import (
+    SceneCreate, SceneUpdate, SceneResponse, GeneratePromptRequest, GeneratePromptResponse,
+    AssemblyPayloadReport
+)
+from services.llm_client import LLMError, LLMUnavailableError
+from services.scene_refs import SCENE_PROMPT_INPUTS, sync_scene_refs
+from services.streaming import format_sse, sse_response
 
 router = APIRouter(prefix="/api/scenes", tags=["scenes"])
 
@@ -24,6 +30,7 @@ def list_scenes(
 def create_scene(scene: SceneCreate, db: Session = Depends(get_db)):
     db_scene = Scene(**scene.model_dump())
     db.add(db_scene)
+    sync_scene_refs(db, db_scene)
     db.commit()
     db.refresh(db_scene)
     return db_scene
@@ -43,9 +50,18 @@ def update_scene(scene_id: int, scene: SceneUpdate, db: Session = Depends(get_db
     if not db_scene:
         raise HTTPException(status_code=404, detail="Scene not found")
 
-    for key, value in scene.model_dump(exclude_unset=True).items():
+    changes = {
+        key: value for key, value in scene.model_dump(exclude_unset=True).items()
+        if getattr(db_scene, key) != value
+    }
+    for key, value in changes.items():
         setattr(db_scene, key, value)
 
+    if "action_text" in changes:
+        sync_scene_refs(db, db_scene)
+    if db_scene.generated_prompt is not None and any(key in SCENE_PROMPT_INPUTS for key in changes):
+        db_scene.is_stale = True
+
     db.commit()
     db.refresh(db_scene)
     return db_scene
@@ -60,38 +76,153 @@ def delete_scene(scene_id: int, db: Session = Depends(get_db)):
     db.commit()
 
 
-@router.post("/{scene_id}/generate", response_model=SceneResponse)
-def generate_prompt(
+def _resolve_style_id(scene: Scene, request: GeneratePromptRequest, db: Session) -> Optional[int]:
+    from services.prompt_engine import resolve_style_id
+
+    return resolve_style_id(scene, request.style_id, db)
+
+
+@router.get("/{scene_id}/payload-report", response_model=AssemblyPayloadReport)
+def get_payload_report(
+    scene_id: int,
+    style_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Estimated assembly tokens saved by the framing-based layer pre-selection."""
+    from services.prompt_engine import aggregate_scene_data
+    from services.scene_assembler import build_payload_report
+
+    scene = db.query(Scene).filter(Scene.id == scene_id).first()
+    if not scene:
+        raise HTTPException(status_code=404, detail="Scene not found")
+
+    style_id = _resolve_style_id(scene, GeneratePromptRequest(style_id=style_id), db)
+    return build_payload_report(aggregate_scene_data(scene, style_id, db))
+
+
+@router.post("/{scene_id}/generate", response_model=GeneratePromptResponse)
+async def generate_prompt(
     scene_id: int,
     request: GeneratePromptRequest,
     db: Session = Depends(get_db)
 ):
-    from services.prompt_engine import generate_scene_prompt
+    """Generate the scene prompt.
+
+    When the aggregated inputs, preset and model match the last generation
+    the stored prompt is returned without calling the LLM (``reused``);
+    ``force`` regenerates anyway. No database connection is held while the
+    LLM runs: the scene is read before and written in a new transaction after.
+    """
+    from services.prompt_engine import prepare_scene_prompt, save_scene_prompt
+    from services.scene_assembler import run_assembly
 
     scene = db.query(Scene).filter(Scene.id == scene_id).first()
     if not scene:
         raise HTTPException(status_code=404, detail="Scene not found")
 
     # Get default style if not specified
-    style_id = request.style_id
-    if style_id is None and scene.style_id:
-        style_id = scene.style_id
-    if style_id is None:
-        default_style = db.query(Asset).filter(
-            Asset.type == AssetType.STYLE,
-            Asset.is_global == True,
-            Asset.name == "Cinematic"
-        ).first()
-        if default_style:
-            style_id = default_style.id
+    style_id = _resolve_style_id(scene, request, db)
 
     # Update scene lighting if provided
     if request.lighting_id is not None:
         scene.lighting_id = request.lighting_id
 
-    generated = generate_scene_prompt(scene, style_id, db)
-    scene.generated_prompt = generated
+    try:
+        plan = prepare_scene_prompt(
+            scene, style_id, db, assembler=request.assembler, polish=request.polish, force=request.force
+        )
+        if plan is None:
+            db.commit()
+            db.refresh(scene)
+            return GeneratePromptResponse.model_validate(scene).model_copy(update={"reused": True})
+
+        # The lighting change is applied again together with the prompt
+        db.rollback()
+        prompt = await run_assembly(plan)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    scene = db.get(Scene, scene_id)
+    if not scene:
+        raise HTTPException(status_code=404, detail="Scene not found")
+    if request.lighting_id is not None:
+        scene.lighting_id = request.lighting_id
+    save_scene_prompt(scene, plan, prompt)
     db.commit()
     db.refresh(scene)
+    return GeneratePromptResponse.model_validate(scene).model_copy(update={"reused": False})
 
-    return scene
+
+@router.post("/{scene_id}/generate/stream")
+async def generate_prompt_stream(
+    scene_id: int,
+    request: GeneratePromptRequest,
+    db: Session = Depends(get_db)
+):
+    """Stream scene prompt generation as server-sent events.
+
+    Emits ``token`` events while the LLM writes, then ``done`` with the
+    updated scene. The prompt (and any lighting change) is only persisted
+    once the stream completes; an aborted stream leaves the scene untouched.
+    Unchanged inputs skip straight to ``done`` with ``reused`` set, unless
+    ``force`` is given.
+    """
+    from services.prompt_engine import prepare_scene_prompt, save_scene_prompt
+    from services.scene_assembler import stream_assembly
+
+    scene = db.query(Scene).filter(Scene.id == scene_id).first()
+    if not scene:
+        raise HTTPException(status_code=404, detail="Scene not found")
+
+    style_id = _resolve_style_id(scene, request, db)
+    lighting_id = request.lighting_id if request.lighting_id is not None else scene.lighting_id
+    scene.lighting_id = lighting_id
+
+    try:
+        plan = prepare_scene_prompt(
+            scene, style_id, db, assembler=request.assembler, polish=request.polish, force=request.force
+        )
+        if plan is None:
+            db.commit()
+            db.refresh(scene)
+            done = GeneratePromptResponse.model_validate(scene).model_copy(update={"reused": True})
+            return sse_response(_single_event("done", done.model_dump(mode="json")))
+        deltas = stream_assembly(plan)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    finally:
+        # Nothing is written until the stream completes
+        db.rollback()
+    # The request session is closed before the body streams; persist through a fresh one
+    session_factory = sessionmaker(bind=db.get_bind())
+
+    async def events() -> AsyncIterator[str]:
+        parts = []
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                yield format_sse("token", {"text": delta})
+        except LLMError as e:
+            yield format_sse("error", {"detail": f"Scene assembly failed: {str(e)}"})
+            return
+
+        with session_factory() as session:
+            db_scene = session.get(Scene, scene_id)
+            if not db_scene:
+                yield format_sse("error", {"detail": "Scene not found"})
+                return
+            save_scene_prompt(db_scene, plan, "".join(parts).strip())
+            db_scene.lighting_id = lighting_id
+            session.commit()
+            session.refresh(db_scene)
+            yield format_sse("done", GeneratePromptResponse.model_validate(db_scene).model_dump(mode="json"))
+
+    return sse_response(events())
+
+
+async def _single_event(event: str, data: dict) -> AsyncIterator[str]:
+    yield format_sse(event, data)
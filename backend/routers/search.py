@@ -0,0 +1,28 @@
+# backend/routers/search.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from database import get_db
+from schemas import SearchResponse
+from services.search import SEARCH_KINDS, search
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResponse)
+def search_all(
+    q: str = Query(..., min_length=1, max_length=500),
+    project_id: Optional[int] = Query(None),
+    kind: Optional[List[Literal["asset", "variant", "scene"]]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over asset and variant layers and scene text, best matches first.
+
+    With ``project_id`` only that project's scenes and its own and the
+    global assets are searched. ``kind`` may be repeated to restrict the
+    result types.
+    """
+    results, total = search(db, q, project_id, kind or SEARCH_KINDS, limit, offset)
+    return SearchResponse(results=results, total=total, limit=limit, offset=offset)
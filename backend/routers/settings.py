@@ -4,10 +4,12 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Settings
 from schemas import SettingsResponse, SettingsUpdate
+from services.llm_client import invalidate_llm_clients
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
-SETTINGS_KEYS = ["llm_provider", "llm_api_key", "llm_model", "llm_base_url"]
+SETTINGS_KEYS = ["llm_provider", "llm_api_key", "llm_model", "llm_base_url", "llm_cache_enabled"]
+BOOLEAN_SETTINGS = {"llm_cache_enabled"}
 
 
 def mask_api_key(key: str) -> str:
@@ -24,6 +26,8 @@ def get_settings(db: Session = Depends(get_db)):
         value = setting.value if setting else ""
         if key == "llm_api_key":
             value = mask_api_key(value)
+        if key in BOOLEAN_SETTINGS:
+            value = value == "true"
         settings_dict[key] = value
 
     return SettingsResponse(**settings_dict)
@@ -37,6 +41,8 @@ def update_settings(settings: SettingsUpdate, db: Session = Depends(get_db)):
         # Skip API key if it's still masked (contains ****)
         if key == "llm_api_key" and "****" in value:
             continue
+        if key in BOOLEAN_SETTINGS:
+            value = "true" if value else "false"
         db_setting = db.query(Settings).filter(Settings.key == key).first()
         if db_setting:
             db_setting.value = value
@@ -45,6 +51,7 @@ def update_settings(settings: SettingsUpdate, db: Session = Depends(get_db)):
             db.add(db_setting)
 
     db.commit()
+    invalidate_llm_clients()
 
     # Return updated settings
     return get_settings(db)
@@ -1,9 +1,11 @@
 # backend/routers/variants.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from typing import List, Optional
 from database import get_db
 from models import Variant, Asset
-from schemas import VariantCreate, VariantUpdate, VariantDetailResponse
+from schemas import VariantCreate, VariantUpdate, VariantDetailResponse, SimilarItem
+from services.scene_refs import mark_variant_dependents_stale
 
 router = APIRouter(prefix="/api/variants", tags=["variants"])
 
@@ -17,6 +19,7 @@ def create_variant(variant: VariantCreate, db: Session = Depends(get_db)):
 
     db_variant = Variant(**variant.model_dump())
     db.add(db_variant)
+    mark_variant_dependents_stale(db, asset, [db_variant.name])
     db.commit()
     db.refresh(db_variant)
     return db_variant
@@ -30,15 +33,51 @@ def get_variant(variant_id: int, db: Session = Depends(get_db)):
     return variant
 
 
+@router.get("/{variant_id}/similar", response_model=List[SimilarItem])
+def get_similar_variants(
+    variant_id: int,
+    project_id: Optional[int] = Query(None, description="Scope for a global asset's variant; defaults to its project"),
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.0, ge=0.0, le=1.0),
+    db: Session = Depends(get_db)
+):
+    """Variants with the most similar prompts, across the project's and the global assets."""
+    from services.similarity import find_similar
+
+    variant = db.query(Variant).filter(Variant.id == variant_id).first()
+    if not variant:
+        raise HTTPException(status_code=404, detail="Variant not found")
+    if not variant.asset.is_global:
+        project_id = variant.asset.project_id
+    return find_similar(db, project_id, "variant", variant_id, limit, min_score)
+
+
 @router.put("/{variant_id}", response_model=VariantDetailResponse)
 def update_variant(variant_id: int, variant: VariantUpdate, db: Session = Depends(get_db)):
     db_variant = db.query(Variant).filter(Variant.id == variant_id).first()
     if not db_variant:
         raise HTTPException(status_code=404, detail="Variant not found")
 
-    for key, value in variant.model_dump(exclude_unset=True).items():
+    old_name, old_asset = db_variant.name, db_variant.asset
+    changes = {
+        key: value for key, value in variant.model_dump(exclude_unset=True).items()
+        if getattr(db_variant, key) != value
+    }
+    asset = old_asset
+    if "asset_id" in changes:
+        asset = db.query(Asset).filter(Asset.id == changes["asset_id"]).first()
+        if not asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+    for key, value in changes.items():
         setattr(db_variant, key, value)
 
+    if changes:
+        names = {old_name, db_variant.name}
+        mark_variant_dependents_stale(db, asset, names)
+        if asset is not old_asset:
+            # Tags of the old asset no longer resolve to this variant
+            mark_variant_dependents_stale(db, old_asset, names)
+
     db.commit()
     db.refresh(db_variant)
     return db_variant
@@ -49,5 +88,6 @@ def delete_variant(variant_id: int, db: Session = Depends(get_db)):
     variant = db.query(Variant).filter(Variant.id == variant_id).first()
     if not variant:
         raise HTTPException(status_code=404, detail="Variant not found")
+    mark_variant_dependents_stale(db, variant.asset, [variant.name])
     db.delete(variant)
     db.commit()
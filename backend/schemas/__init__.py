@@ -1,14 +1,23 @@
 # backend/schemas/__init__.py
-from .project import ProjectBase, ProjectCreate, ProjectUpdate, ProjectResponse
+from .project import (
+    ProjectBase, ProjectCreate, ProjectUpdate, ProjectResponse, GenerateAllRequest, TagSuggestion
+)
 from .asset import (
     AssetBase, AssetCreate, AssetUpdate, AssetResponse, AssetListResponse,
     VariantResponse
 )
 from .variant import VariantBase, VariantCreate, VariantUpdate, VariantDetailResponse
-from .scene import SceneBase, SceneCreate, SceneUpdate, SceneResponse, GeneratePromptRequest
+from .scene import (
+    SceneBase, SceneCreate, SceneUpdate, SceneResponse, GeneratePromptRequest, GeneratePromptResponse,
+    AssemblyPayloadReport
+)
 from .llm import (
     ChatMessage, EnrichRequest, EnrichVariantRequest,
     LayeredPrompt, EnrichLayeredResponse,
-    LLMRequestLogResponse, LLMLogsResponse, TestConnectionResponse
+    LLMRequestLogResponse, LLMLogsResponse, LLMMetricsGroup, LLMMetricsResponse,
+    LLMCacheStatsResponse, TestConnectionResponse
 )
 from .settings import SettingsResponse, SettingsUpdate
+from .job import JobCreate, GenerateSceneJob, JobResponse, JobListResponse
+from .search import SearchResult, SearchResponse
+from .similarity import SimilarItem, DuplicateCluster, DuplicateReport
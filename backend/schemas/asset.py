@@ -29,6 +29,7 @@ class AssetCreate(AssetBase):
 class AssetUpdate(BaseModel):
     name: Optional[str] = None
     base_prompt: Optional[str] = None
+    project_id: Optional[int] = None
 
 
 class AssetResponse(AssetBase):
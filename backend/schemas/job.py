@@ -0,0 +1,31 @@
+# backend/schemas/job.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from models.job import JobStatus
+from .scene import GeneratePromptRequest
+
+
+class JobCreate(BaseModel):
+    kind: Literal["enrich", "enrich_variant", "generate_scene"]
+    payload: Dict[str, Any]  # Body of the matching synchronous endpoint
+
+
+class GenerateSceneJob(GeneratePromptRequest):
+    scene_id: int
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobListResponse(BaseModel):
+    jobs: List[JobResponse]
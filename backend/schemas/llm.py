@@ -1,5 +1,6 @@
 # backend/schemas/llm.py
 from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Optional
 from models.asset import AssetType
 
@@ -32,6 +33,15 @@ class EnrichLayeredResponse(BaseModel):
     layers: LayeredPrompt
     outfit_suggestion: Optional[LayeredPrompt] = None  # NEU
 
+    @classmethod
+    def from_result(cls, result: dict) -> "EnrichLayeredResponse":
+        """Build from LLMClient.enrich / enrich_variant output."""
+        outfit = result.get("outfit_suggestion")
+        return cls(
+            layers=LayeredPrompt(**{k: v for k, v in result.items() if k != "outfit_suggestion"}),
+            outfit_suggestion=LayeredPrompt(**outfit) if outfit else None
+        )
+
 
 class LLMRequestLogResponse(BaseModel):
     timestamp: str
@@ -42,12 +52,43 @@ class LLMRequestLogResponse(BaseModel):
     generation_time_ms: int
     status: str  # "success" or "error"
     error_message: Optional[str] = None
+    cached: bool = False
+    coalesced: int = 0
+    kind: str = "completion"
 
 
 class LLMLogsResponse(BaseModel):
     logs: List[LLMRequestLogResponse]
 
 
+class LLMMetricsGroup(BaseModel):
+    provider: str
+    model: str
+    kind: str  # "enrich", "variant", "assembly", "test"
+    requests: int
+    errors: int
+    cached: int
+    error_rate: float
+    p50_ms: int
+    p95_ms: int
+    p99_ms: int
+    tokens_per_second: float
+    input_tokens: int
+    output_tokens: int
+
+
+class LLMMetricsResponse(BaseModel):
+    window: str
+    since: datetime
+    groups: List[LLMMetricsGroup]
+
+
+class LLMCacheStatsResponse(BaseModel):
+    entries: int
+    size_bytes: int
+    hits: int
+
+
 class TestConnectionResponse(BaseModel):
     success: bool
     message: str
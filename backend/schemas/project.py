@@ -1,7 +1,8 @@
 # backend/schemas/project.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
+from models.asset import AssetType
 
 
 class ProjectBase(BaseModel):
@@ -25,3 +26,23 @@ class ProjectResponse(ProjectBase):
 
     class Config:
         from_attributes = True
+
+
+class GenerateAllRequest(BaseModel):
+    scene_ids: Optional[List[int]] = None  # None: every scene of the project
+    stale_only: bool = False  # Only stale scenes and scenes without a generated prompt
+    concurrency: Optional[int] = Field(None, ge=1, le=12)  # Below the database pool size
+    style_id: Optional[int] = None
+    assembler: Optional[Literal["llm", "template"]] = None
+    polish: bool = False
+    force: bool = False  # Regenerate scenes whose inputs are unchanged
+
+
+class TagSuggestion(BaseModel):
+    tag: str  # NAME or NAME:VARIANT, as written in action_text
+    asset_id: int
+    asset_name: str
+    variant_id: Optional[int] = None
+    variant_name: Optional[str] = None
+    type: AssetType
+    is_global: bool
@@ -1,7 +1,7 @@
 # backend/schemas/scene.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 
 class SceneBase(BaseModel):
@@ -28,6 +28,7 @@ class SceneResponse(SceneBase):
     id: int
     project_id: int
     generated_prompt: Optional[str] = None
+    is_stale: bool = False
     created_at: datetime
     updated_at: datetime
 
@@ -38,3 +39,18 @@ class SceneResponse(SceneBase):
 class GeneratePromptRequest(BaseModel):
     style_id: Optional[int] = None
     lighting_id: Optional[int] = None
+    assembler: Optional[Literal["llm", "template"]] = None  # None: the preset's assembler
+    polish: bool = False  # LLM pass over a template draft
+    force: bool = False  # Regenerate even if the inputs are unchanged
+
+
+class GeneratePromptResponse(SceneResponse):
+    reused: bool = False  # The stored prompt matched the current inputs
+
+
+class AssemblyPayloadReport(BaseModel):
+    shot_class: str
+    full_tokens: int  # All layers, legacy indented JSON
+    selected_tokens: int  # Pre-selected layers, compact JSON
+    saved_tokens: int
+    saved_percent: float
@@ -0,0 +1,22 @@
+# backend/schemas/search.py
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from models.asset import AssetType
+
+
+class SearchResult(BaseModel):
+    kind: Literal["asset", "variant", "scene"]
+    id: int
+    title: str  # Asset name, NAME:VARIANT, or scene name
+    asset_type: Optional[AssetType] = None
+    asset_id: Optional[int] = None  # Parent asset of a variant
+    project_id: Optional[int] = None  # None for global assets
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+    score: float  # Higher is better
+
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    total: int
+    limit: int
+    offset: int
@@ -8,6 +8,7 @@ class SettingsResponse(BaseModel):
     llm_api_key: str  # Will be masked in response
     llm_model: str
     llm_base_url: str
+    llm_cache_enabled: bool = False
 
 
 class SettingsUpdate(BaseModel):
@@ -15,3 +16,4 @@ class SettingsUpdate(BaseModel):
     llm_api_key: Optional[str] = None
     llm_model: Optional[str] = None
     llm_base_url: Optional[str] = None
+    llm_cache_enabled: Optional[bool] = None
@@ -0,0 +1,23 @@
+# backend/schemas/similarity.py
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+
+class SimilarItem(BaseModel):
+    kind: Literal["asset", "variant"]
+    id: int
+    name: str  # Asset name, or NAME:VARIANT
+    asset_id: Optional[int] = None  # Parent asset of a variant
+    score: Optional[float] = None  # Cosine similarity, 0..1
+
+
+class DuplicateCluster(BaseModel):
+    kind: Literal["asset", "variant"]
+    score: float  # Weakest similarity linking the members
+    members: List[SimilarItem]
+
+
+class DuplicateReport(BaseModel):
+    kind: Literal["asset", "variant"]
+    threshold: float
+    clusters: List[DuplicateCluster]
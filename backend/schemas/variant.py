@@ -16,6 +16,7 @@ class VariantCreate(VariantBase):
 class VariantUpdate(BaseModel):
     name: Optional[str] = None
     delta_prompt: Optional[str] = None
+    asset_id: Optional[int] = None
 
 
 class VariantDetailResponse(VariantBase):
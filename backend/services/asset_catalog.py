@@ -0,0 +1,187 @@
+# backend/services/asset_catalog.py
+"""In-memory catalog of a project's assets and variants for tag resolution.
+
+A catalog holds the project's assets plus the global ones, with decoded
+layers and case-insensitive name maps, so resolving a scene's tags does not
+touch the database. Every asset or variant write bumps a version counter
+for the affected project (``None`` for global assets); a cached catalog is
+only served while the versions it was built at are still current. At most
+CATALOG_CACHE_PROJECTS catalogs are kept, least recently used evicted first.
+"""
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Asset, AssetType, Variant
+
+CATALOG_CACHE_PROJECTS = int(os.getenv("CATALOG_CACHE_PROJECTS", "32"))
+
+# Projects written by a session since its last commit or rollback
+_PENDING_KEY = "catalog_pending_projects"
+# Marker for a write whose project is unknown: invalidates every catalog
+_ALL = "*"
+
+# SQLite's lower() only folds ASCII, so names are folded the same way in Python
+# to match the lower(name) indexes and the old ilike lookups
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def fold_name(name: str) -> str:
+    """Case-fold a name the way SQLite's lower() does (ASCII only)."""
+    return name.translate(_ASCII_LOWER)
+
+
+@dataclass(frozen=True)
+class CatalogAsset:
+    id: int
+    name: str
+    type: AssetType
+    project_id: Optional[int]
+    is_global: bool
+    layers: Dict[str, str]
+
+    @classmethod
+    def from_asset(cls, asset: Asset) -> "CatalogAsset":
+        return cls(asset.id, asset.name, asset.type, asset.project_id, asset.is_global, asset.layers)
+
+
+@dataclass
+class ProjectCatalog:
+    project_id: int
+    assets_by_id: Dict[int, CatalogAsset]
+    assets_by_name: Dict[str, CatalogAsset]  # Folded name -> lowest ID
+    variants: Dict[Tuple[int, str], Dict[str, str]]  # (asset ID, folded name) -> layers of the lowest ID
+
+    def find_asset(self, name: str) -> Optional[CatalogAsset]:
+        return self.assets_by_name.get(fold_name(name))
+
+    def find_variant(self, asset_id: int, name: str) -> Optional[Dict[str, str]]:
+        return self.variants.get((asset_id, fold_name(name)))
+
+
+_lock = threading.Lock()
+_epoch = 0
+_versions: Dict[Optional[int], int] = {}
+_catalogs: "OrderedDict[tuple, Tuple[tuple, ProjectCatalog]]" = OrderedDict()
+
+
+def _current_versions(project_id: int) -> tuple:
+    return (_epoch, _versions.get(project_id, 0), _versions.get(None, 0))
+
+
+def bump_catalog_versions(project_ids: Iterable):
+    """Invalidate the catalogs of the given projects (None: global assets)."""
+    global _epoch
+    with _lock:
+        for project_id in project_ids:
+            if project_id == _ALL:
+                _epoch += 1
+                _catalogs.clear()
+            else:
+                _versions[project_id] = _versions.get(project_id, 0) + 1
+
+
+def invalidate_catalogs():
+    bump_catalog_versions([_ALL])
+
+
+def _load_catalog(db: Session, project_id: int) -> ProjectCatalog:
+    in_scope = (Asset.project_id == project_id) | (Asset.is_global == True)
+    assets_by_id: Dict[int, CatalogAsset] = {}
+    assets_by_name: Dict[str, CatalogAsset] = {}
+    for row in db.query(
+        Asset.id, Asset.name, Asset.type, Asset.project_id, Asset.is_global,
+        Asset.layer_core, Asset.layer_standard, Asset.layer_detail
+    ).filter(in_scope).order_by(Asset.id):
+        asset = CatalogAsset(
+            row.id, row.name, row.type, row.project_id, row.is_global,
+            {"core": row.layer_core, "standard": row.layer_standard, "detail": row.layer_detail}
+        )
+        assets_by_id[asset.id] = asset
+        assets_by_name.setdefault(fold_name(asset.name), asset)
+
+    variants: Dict[Tuple[int, str], Dict[str, str]] = {}
+    for row in db.query(
+        Variant.asset_id, Variant.name, Variant.layer_core, Variant.layer_standard, Variant.layer_detail
+    ).join(Asset, Variant.asset_id == Asset.id).filter(in_scope).order_by(Variant.id):
+        variants.setdefault(
+            (row.asset_id, fold_name(row.name)),
+            {"core": row.layer_core, "standard": row.layer_standard, "detail": row.layer_detail}
+        )
+    return ProjectCatalog(project_id, assets_by_id, assets_by_name, variants)
+
+
+def get_project_catalog(db: Session, project_id: int) -> ProjectCatalog:
+    """The project's catalog, loaded in two queries on a miss."""
+    pending = db.info.get(_PENDING_KEY, ())
+    if project_id in pending or None in pending or _ALL in pending:
+        # Built from this session's uncommitted writes: don't share it
+        return _load_catalog(db, project_id)
+
+    key = (db.get_bind(), project_id)
+    with _lock:
+        versions = _current_versions(project_id)
+        cached = _catalogs.get(key)
+        if cached and cached[0] == versions:
+            _catalogs.move_to_end(key)
+            return cached[1]
+
+    catalog = _load_catalog(db, project_id)
+    with _lock:
+        # A write during the load bumped the versions; the entry is then already stale
+        _catalogs[key] = (versions, catalog)
+        _catalogs.move_to_end(key)
+        while len(_catalogs) > max(CATALOG_CACHE_PROJECTS, 1):
+            _catalogs.popitem(last=False)
+    return catalog
+
+
+def _written_projects(session: Session) -> Set:
+    projects: Set = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Asset):
+            attrs = inspect(obj).attrs
+            projects.add(obj.project_id)
+            # Moved out of another project, or in or out of the global scope
+            projects.update(attrs.project_id.history.deleted)
+            if obj.is_global or attrs.is_global.history.deleted:
+                projects.add(None)
+        elif isinstance(obj, Variant):
+            asset = session.identity_map.get(session.identity_key(Asset, obj.asset_id)) if obj.asset_id else None
+            if asset is None:
+                projects.add(_ALL)
+            else:
+                projects.add(asset.project_id)
+                if asset.is_global:
+                    projects.add(None)
+    return projects
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context):
+    projects = _written_projects(session)
+    if projects:
+        session.info.setdefault(_PENDING_KEY, set()).update(projects)
+        bump_catalog_versions(projects)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _after_transaction(session: Session):
+    projects = session.info.pop(_PENDING_KEY, None)
+    if projects:
+        bump_catalog_versions(projects)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE bypasses the flush; we can't tell which projects it hit
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Asset, Variant):
+        invalidate_catalogs()
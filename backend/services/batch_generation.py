@@ -0,0 +1,135 @@
+# backend/services/batch_generation.py
+"""Project-wide scene generation with bounded parallelism."""
+import asyncio
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
+from loguru import logger
+from sqlalchemy.orm import Session
+from models import Scene
+from services.llm_client import LLMError
+from services.prompt_engine import prepare_scene_prompt, resolve_style_id, save_scene_prompt
+from services.scene_assembler import AssemblyPlan, run_assembly
+
+# Scenes hold no connection while the LLM runs, but each takes one (in a worker
+# thread) to load and to save; staying below the pool (5 + 10 overflow) leaves
+# room for requests
+BATCH_GENERATION_MAX_CONCURRENCY = 12
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", "8"))
+
+
+def select_scene_ids(
+    db: Session,
+    project_id: int,
+    scene_ids: Optional[List[int]] = None,
+    stale_only: bool = False
+) -> List[int]:
+    """Scenes of the project to generate, in storyboard order."""
+    query = db.query(Scene.id).filter(Scene.project_id == project_id)
+    if scene_ids is not None:
+        query = query.filter(Scene.id.in_(scene_ids))
+    if stale_only:
+        # Outdated prompts, and scenes that have none yet
+        query = query.filter(
+            (Scene.is_stale == True) | Scene.generated_prompt.is_(None) | (Scene.generated_prompt == "")
+        )
+    return [scene_id for (scene_id,) in query.order_by(Scene.created_at, Scene.id).all()]
+
+
+def _prepare_scene(
+    session_factory: Callable[[], Session],
+    scene_id: int,
+    style_id: Optional[int],
+    assembler: Optional[str],
+    polish: bool,
+    force: bool
+) -> Union[Dict, AssemblyPlan]:
+    """Aggregate one scene in a short session.
+
+    Returns the plan when the LLM has to run, else the finished result
+    (a reused prompt is committed right away).
+    """
+    with session_factory() as db:
+        scene = db.get(Scene, scene_id)
+        if not scene:
+            return {"scene_id": scene_id, "status": "error", "detail": "Scene not found"}
+        plan = prepare_scene_prompt(
+            scene, resolve_style_id(scene, style_id, db), db,
+            assembler=assembler, polish=polish, force=force
+        )
+        if plan is not None:
+            return plan
+        generated = scene.generated_prompt
+        db.commit()
+        return {"scene_id": scene_id, "status": "done", "generated_prompt": generated, "reused": True}
+
+
+def _save_scene(session_factory: Callable[[], Session], scene_id: int, plan: AssemblyPlan, prompt: str) -> Dict:
+    with session_factory() as db:
+        scene = db.get(Scene, scene_id)
+        if not scene:
+            return {"scene_id": scene_id, "status": "error", "detail": "Scene not found"}
+        save_scene_prompt(scene, plan, prompt)
+        db.commit()
+        return {"scene_id": scene_id, "status": "done", "generated_prompt": prompt, "reused": False}
+
+
+async def _generate_one(
+    session_factory: Callable[[], Session],
+    scene_id: int,
+    style_id: Optional[int],
+    assembler: Optional[str],
+    polish: bool,
+    force: bool
+) -> Dict:
+    """Generate one scene: load, call the LLM with no session open, then save.
+
+    The database steps run in worker threads so they do not block the event loop.
+    """
+    try:
+        prepared = await asyncio.to_thread(
+            _prepare_scene, session_factory, scene_id, style_id, assembler, polish, force
+        )
+        if not isinstance(prepared, AssemblyPlan):
+            return prepared
+        prompt = await run_assembly(prepared)
+    except LLMError as e:
+        return {"scene_id": scene_id, "status": "error", "detail": str(e)}
+    return await asyncio.to_thread(_save_scene, session_factory, scene_id, prepared, prompt)
+
+
+async def generate_scenes(
+    session_factory: Callable[[], Session],
+    scene_ids: List[int],
+    style_id: Optional[int] = None,
+    assembler: Optional[str] = None,
+    polish: bool = False,
+    concurrency: Optional[int] = None,
+    force: bool = False
+) -> AsyncIterator[Dict]:
+    """Generate scenes concurrently, yielding each result as it is committed.
+
+    At most ``concurrency`` scenes (capped at BATCH_GENERATION_MAX_CONCURRENCY)
+    are in flight at once. Closing the iterator cancels the scenes that have
+    not finished; the ones already yielded stay committed. Scenes whose
+    inputs are unchanged since their last generation keep their prompt
+    (``reused``) unless ``force`` is set.
+    """
+    limit = min(concurrency or BATCH_GENERATION_CONCURRENCY, BATCH_GENERATION_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def bounded(scene_id: int) -> Dict:
+        async with semaphore:
+            try:
+                return await _generate_one(session_factory, scene_id, style_id, assembler, polish, force)
+            except Exception as e:
+                logger.exception(f"Batch generation failed for scene {scene_id}")
+                return {"scene_id": scene_id, "status": "error", "detail": str(e)}
+
+    tasks = [asyncio.ensure_future(bounded(scene_id)) for scene_id in scene_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,129 @@
+# backend/services/completion_cache.py
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import LLMCacheEntry
+
+# Limits for the persistent completion cache
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
+def completion_cache_key(model: str, messages: List[dict], max_tokens: Optional[int] = None) -> str:
+    """Content address of a completion: hash of model, system prompt, messages and max_tokens."""
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    conversation = [{"role": m["role"], "content": m["content"]} for m in messages if m["role"] != "system"]
+    payload = json.dumps(
+        {"model": model, "system": system, "messages": conversation, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """LRU/TTL completion cache stored in the app database."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_bytes: int = LLM_CACHE_MAX_BYTES
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[str]:
+        with self.session_factory() as db:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+            if not entry:
+                return None
+
+            now = datetime.utcnow()
+            if entry.created_at < now - self.ttl:
+                db.delete(entry)
+                db.commit()
+                return None
+
+            entry.last_accessed_at = now
+            entry.hit_count += 1
+            response = entry.response
+            db.commit()
+            return response
+
+    def put(self, key: str, model: str, response: str, input_tokens: int = 0, output_tokens: int = 0):
+        size_bytes = len(response.encode("utf-8"))
+        if size_bytes > self.max_bytes:
+            return
+
+        with self.session_factory() as db:
+            now = datetime.utcnow()
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+            if entry is None:
+                entry = LLMCacheEntry(key=key)
+                db.add(entry)
+            entry.model = model
+            entry.response = response
+            entry.size_bytes = size_bytes
+            entry.input_tokens = input_tokens
+            entry.output_tokens = output_tokens
+            entry.created_at = now
+            entry.last_accessed_at = now
+            db.flush()
+
+            self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db: Session, now: datetime):
+        """Drop expired entries, then least recently used ones until within limits."""
+        db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.created_at < now - self.ttl
+        ).delete(synchronize_session=False)
+
+        count, total_bytes = db.query(
+            func.count(LLMCacheEntry.id),
+            func.coalesce(func.sum(LLMCacheEntry.size_bytes), 0)
+        ).one()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        evict_ids = []
+        lru = db.query(LLMCacheEntry.id, LLMCacheEntry.size_bytes).order_by(
+            LLMCacheEntry.last_accessed_at, LLMCacheEntry.id
+        )
+        for entry_id, size_bytes in lru.yield_per(500):
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            evict_ids.append(entry_id)
+            count -= 1
+            total_bytes -= size_bytes
+
+        db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.id.in_(evict_ids)
+        ).delete(synchronize_session=False)
+        logger.debug(f"LLM cache evicted {len(evict_ids)} entries")
+
+
+def get_cache_stats(db: Session) -> dict:
+    count, total_bytes, hits = db.query(
+        func.count(LLMCacheEntry.id),
+        func.coalesce(func.sum(LLMCacheEntry.size_bytes), 0),
+        func.coalesce(func.sum(LLMCacheEntry.hit_count), 0)
+    ).one()
+    return {"entries": count, "size_bytes": total_bytes, "hits": hits}
+
+
+def clear_cache(db: Session) -> int:
+    deleted = db.query(LLMCacheEntry).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,242 @@
+# backend/services/job_queue.py
+"""Durable background jobs for LLM work, run by an in-process worker pool.
+
+Jobs are rows in the ``jobs`` table, so a restart (or a client that goes
+away) does not lose work: pending jobs, and jobs that were running when
+the process stopped, are picked up again when the queue starts.
+"""
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Type
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from models import Job, JobStatus, Scene
+from schemas import (
+    EnrichRequest, EnrichVariantRequest, EnrichLayeredResponse,
+    GenerateSceneJob, GeneratePromptResponse
+)
+from services.llm_client import LLMClient, get_llm_client
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Including restarts mid-run
+
+TERMINAL_STATUSES = (JobStatus.DONE, JobStatus.FAILED)
+
+
+def _llm_client(db: Session) -> LLMClient:
+    client = get_llm_client(db)
+    db.commit()  # Release the connection while the LLM runs
+    return client
+
+
+async def _run_enrich(request: EnrichRequest, db: Session) -> dict:
+    client = _llm_client(db)
+    result = await client.enrich(
+        asset_type=request.asset_type,
+        messages=[m.model_dump() for m in request.messages],
+        current_prompt=request.current_prompt
+    )
+    return EnrichLayeredResponse.from_result(result).model_dump()
+
+
+async def _run_enrich_variant(request: EnrichVariantRequest, db: Session) -> dict:
+    client = _llm_client(db)
+    result = await client.enrich_variant(
+        asset_type=request.asset_type,
+        base_prompt=request.base_prompt,
+        messages=[m.model_dump() for m in request.messages],
+        current_delta=request.current_delta
+    )
+    return EnrichLayeredResponse.from_result(result).model_dump()
+
+
+async def _run_generate_scene(request: GenerateSceneJob, db: Session) -> dict:
+    from services.prompt_engine import prepare_scene_prompt, resolve_style_id, save_scene_prompt
+    from services.scene_assembler import run_assembly
+
+    scene = db.get(Scene, request.scene_id)
+    if not scene:
+        raise ValueError("Scene not found")
+    if request.lighting_id is not None:
+        scene.lighting_id = request.lighting_id
+    plan = prepare_scene_prompt(
+        scene, resolve_style_id(scene, request.style_id, db), db,
+        assembler=request.assembler, polish=request.polish, force=request.force
+    )
+    if plan is not None:
+        # No connection is held while the LLM runs; lighting is applied with the prompt
+        db.rollback()
+        prompt = await run_assembly(plan)
+        scene = db.get(Scene, request.scene_id)
+        if not scene:
+            raise ValueError("Scene not found")
+        if request.lighting_id is not None:
+            scene.lighting_id = request.lighting_id
+        save_scene_prompt(scene, plan, prompt)
+    db.commit()
+    db.refresh(scene)
+    response = GeneratePromptResponse.model_validate(scene).model_copy(update={"reused": plan is None})
+    return response.model_dump(mode="json")
+
+
+@dataclass
+class JobKind:
+    schema: Type[BaseModel]
+    handler: Callable[[Any, Session], Awaitable[dict]]
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    "enrich": JobKind(EnrichRequest, _run_enrich),
+    "enrich_variant": JobKind(EnrichVariantRequest, _run_enrich_variant),
+    "generate_scene": JobKind(GenerateSceneJob, _run_generate_scene),
+}
+
+
+def serialize_job(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class JobQueue:
+    """Runs jobs from the database with a fixed number of workers."""
+
+    def __init__(self, session_factory: Callable[[], Session], workers: int = JOB_WORKERS):
+        self.session_factory = session_factory
+        self.workers = max(workers, 1)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    def start(self):
+        """Requeue unfinished jobs and start the workers."""
+        with self.session_factory() as db:
+            for job in db.query(Job).filter(
+                Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+            ).order_by(Job.id).all():
+                if job.attempts >= JOB_MAX_ATTEMPTS:
+                    job.status = JobStatus.FAILED
+                    job.error = f"Gave up after {job.attempts} attempts"
+                    job.finished_at = datetime.utcnow()
+                    continue
+                job.status = JobStatus.PENDING
+                self._queue.put_nowait(job.id)
+            db.commit()
+        if self._queue.qsize():
+            logger.info(f"Resuming {self._queue.qsize()} pending jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers; jobs they were running resume on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, job_id: int):
+        self._queue.put_nowait(job_id)
+
+    def subscribe(self, job_id: int) -> asyncio.Queue:
+        """Queue receiving the job's serialized state after every change."""
+        updates: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(updates)
+        return updates
+
+    def unsubscribe(self, job_id: int, updates: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(updates)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def _publish(self, job: Job):
+        state = serialize_job(job)
+        for updates in self._subscribers.get(job.id, ()):
+            updates.put_nowait(state)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception:
+                logger.exception(f"Job {job_id} crashed the worker loop")
+            finally:
+                self._queue.task_done()
+
+    async def run_job(self, job_id: int):
+        with self.session_factory() as db:
+            job = db.get(Job, job_id)
+            if not job or job.status != JobStatus.PENDING:
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            job.attempts += 1
+            db.commit()
+            self._publish(job)
+
+            kind = JOB_KINDS[job.kind]
+            try:
+                result = await kind.handler(kind.schema.model_validate_json(job.payload), db)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Job {job_id} ({job.kind}) failed: {e}")
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+            else:
+                job.status = JobStatus.DONE
+                job.result = json.dumps(result, ensure_ascii=False)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            self._publish(job)
+
+    async def join(self):
+        """Wait until every queued job has been processed."""
+        await self._queue.join()
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def start_job_queue(session_factory: Callable[[], Session], workers: int = JOB_WORKERS) -> JobQueue:
+    global _job_queue
+    _job_queue = JobQueue(session_factory, workers)
+    _job_queue.start()
+    return _job_queue
+
+
+async def stop_job_queue():
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue = None
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    return _job_queue
+
+
+def submit_job(db: Session, kind: str, payload: BaseModel) -> Job:
+    """Persist a job; it runs as soon as a worker is free.
+
+    Without a running queue the job stays pending until the next start.
+    """
+    job = Job(kind=kind, status=JobStatus.PENDING, payload=payload.model_dump_json())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    if _job_queue is not None:
+        _job_queue.enqueue(job.id)
+    return job
@@ -1,15 +1,23 @@
 # backend/services/llm_client.py
+import asyncio
+import hashlib
 import json
 import re
 import time
 from datetime import datetime
-from openai import OpenAI
-from sqlalchemy.orm import Session
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from sqlalchemy.orm import Session, sessionmaker
 from models import Settings
 from models.asset import AssetType
-from typing import List, Optional, Dict
+from typing import AsyncIterator, Callable, List, Optional, Dict
 from dataclasses import dataclass, asdict
 from collections import deque
+from loguru import logger
+from services.completion_cache import CompletionCache, completion_cache_key
+from services.llm_resilience import CircuitOpenError, get_provider_guard
+from services.llm_telemetry import record_request_log
+from services.metrics import observe_llm_request
 
 
 @dataclass
@@ -22,6 +30,9 @@ class LLMRequestLog:
     generation_time_ms: int
     status: str  # "success" or "error"
     error_message: Optional[str] = None
+    cached: bool = False
+    coalesced: int = 0  # Additional callers that shared this upstream call
+    kind: str = "completion"  # "enrich", "variant", "assembly", "test", ...
 
     @property
     def tokens_per_second(self) -> float:
@@ -36,6 +47,8 @@ _request_logs: deque = deque(maxlen=10)
 
 def add_request_log(log: LLMRequestLog):
     _request_logs.append(log)
+    record_request_log(log)
+    observe_llm_request(log)
 
 
 def get_request_logs() -> List[dict]:
@@ -46,6 +59,32 @@ class LLMError(Exception):
     pass
 
 
+class LLMUnavailableError(LLMError):
+    """The provider is failing fast while its circuit breaker is open."""
+
+
+# Shared keep-alive connection pool for all LLM clients. Every AsyncOpenAI
+# instance is built on top of it, so concurrent requests reuse warm
+# connections instead of opening a new pool (and TLS session) per call.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 LAYERED_BASE_PROMPT = """You are an expert at writing prompts for AI image generators.
 Your goal is to ensure VISUAL CONSISTENCY across multiple generated images.
 
@@ -294,13 +333,51 @@ def parse_layered_response(response: str) -> Dict[str, str]:
         raise LLMError(f"Failed to parse layered response: {e}")
 
 
+@dataclass
+class _Flight:
+    """An upstream completion that identical concurrent requests wait on."""
+    task: Optional[asyncio.Future] = None
+    coalesced: int = 0
+
+
+def _retrieve_exception(task: asyncio.Future):
+    # Every caller may have been cancelled; don't warn about an unread error
+    if not task.cancelled():
+        task.exception()
+
+
 class LLMClient:
-    def __init__(self, base_url: str, api_key: str, model: str, provider: str = "unknown"):
-        self.client = OpenAI(base_url=base_url, api_key=api_key)
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        provider: str = "unknown",
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        # Retries are handled by the provider guard, not the SDK
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            max_retries=0,
+            http_client=http_client or get_http_client()
+        )
+        self.guard = get_provider_guard(provider)
         self.model = model
         self.provider = provider
+        self.cache: Optional[CompletionCache] = None
+        self._inflight: Dict[str, _Flight] = {}
 
-    def _log_request(self, response, generation_time_ms: int, status: str, error_message: Optional[str] = None):
+    def _log_request(
+        self,
+        response,
+        generation_time_ms: int,
+        status: str,
+        error_message: Optional[str] = None,
+        cached: bool = False,
+        coalesced: int = 0,
+        kind: str = "completion"
+    ):
         """Log the request details."""
         input_tokens = 0
         output_tokens = 0
@@ -317,50 +394,211 @@ class LLMClient:
             output_tokens=output_tokens,
             generation_time_ms=generation_time_ms,
             status=status,
-            error_message=error_message
+            error_message=error_message,
+            cached=cached,
+            coalesced=coalesced,
+            kind=kind
         )
         add_request_log(log)
 
-    def enrich(
+    def _cache_get(self, key: str) -> Optional[str]:
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    def _cache_put(self, key: str, content: str, response):
+        usage = getattr(response, "usage", None)
+        try:
+            self.cache.put(
+                key,
+                self.model,
+                content,
+                input_tokens=(usage.prompt_tokens or 0) if usage else 0,
+                output_tokens=(usage.completion_tokens or 0) if usage else 0
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    async def _chat(
         self,
-        asset_type: AssetType,
         messages: List[dict],
-        current_prompt: Optional[str] = None
-    ) -> Dict[str, str]:
-        """Enrich asset with layered prompt structure."""
-        system_prompt = build_layered_system_prompt(asset_type)
-
-        if current_prompt:
-            system_prompt += f"\n\nCurrent description (improve upon this):\n{current_prompt}"
+        max_tokens: Optional[int] = None,
+        parse: Optional[Callable[[str], object]] = None,
+        use_cache: bool = True,
+        kind: str = "completion"
+    ):
+        """Run one chat completion and log it.
+
+        Served from the completion cache when enabled. Identical requests
+        already in flight are coalesced onto the same upstream call. If
+        ``parse`` is given, the parsed content is returned and only
+        parseable responses are cached.
+        """
+        key = completion_cache_key(self.model, messages, max_tokens)
+        if use_cache and self.cache is not None:
+            start_time = time.time()
+            # The cache is a database table; keep its I/O off the event loop
+            cached = await asyncio.to_thread(self._cache_get, key)
+            if cached is not None:
+                generation_time_ms = int((time.time() - start_time) * 1000)
+                self._log_request(None, generation_time_ms, "success", cached=True, kind=kind)
+                return self._parse(cached, parse, kind)
+
+        flight = self._inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            flight.task = asyncio.ensure_future(self._upstream_chat(messages, max_tokens, key, flight, kind))
+            flight.task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = flight
+        else:
+            flight.coalesced += 1
+
+        # Shielded so a cancelled caller doesn't cancel the call for the others
+        content, response = await asyncio.shield(flight.task)
+        result = self._parse(content, parse, kind)
+        if leader and use_cache and self.cache is not None and content:
+            await asyncio.to_thread(self._cache_put, key, content, response)
+        return result
 
-        chat_messages = [{"role": "system", "content": system_prompt}]
-        chat_messages.extend([{"role": m["role"], "content": m["content"]} for m in messages])
+    def _parse(self, content: Optional[str], parse: Optional[Callable[[str], object]], kind: str):
+        """Apply ``parse`` to a completion; an unusable response is logged and raised as LLMError."""
+        if not parse:
+            return content
+        try:
+            return parse(content)
+        except Exception as e:
+            error_msg = str(e) if isinstance(e, LLMError) else f"Failed to parse LLM response: {e}"
+            self._log_request(None, 0, "error", error_msg, kind=kind)
+            raise LLMError(error_msg)
 
+    async def _upstream_chat(
+        self,
+        messages: List[dict],
+        max_tokens: Optional[int],
+        key: str,
+        flight: "_Flight",
+        kind: str
+    ):
+        """The single upstream call shared by every coalesced caller."""
         start_time = time.time()
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=chat_messages
-            )
+            kwargs = {"model": self.model, "messages": messages}
+            if max_tokens:
+                kwargs["max_tokens"] = max_tokens
+            response = await self.guard.call(lambda: self.client.chat.completions.create(**kwargs))
             generation_time_ms = int((time.time() - start_time) * 1000)
-            self._log_request(response, generation_time_ms, "success")
-            return parse_layered_response(response.choices[0].message.content)
+            self._log_request(response, generation_time_ms, "success", coalesced=flight.coalesced, kind=kind)
+            return response.choices[0].message.content, response
         except Exception as e:
             generation_time_ms = int((time.time() - start_time) * 1000)
             error_msg = str(e)
-            self._log_request(None, generation_time_ms, "error", error_msg)
-            if isinstance(e, LLMError):
-                raise
+            self._log_request(None, generation_time_ms, "error", error_msg, coalesced=flight.coalesced, kind=kind)
+            if isinstance(e, CircuitOpenError):
+                raise LLMUnavailableError(error_msg)
             raise LLMError(f"LLM request failed: {error_msg}")
+        finally:
+            # Nothing awaits between logging and here, so no caller can join uncounted
+            self._inflight.pop(key, None)
+
+    async def _stream_chat(
+        self,
+        messages: List[dict],
+        max_tokens: Optional[int] = None,
+        parse: Optional[Callable[[str], object]] = None,
+        use_cache: bool = True,
+        kind: str = "completion"
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion as content deltas and log it once finished.
+
+        A cache hit is replayed as a single delta. The assembled content is
+        cached only if the stream completed and, when given, ``parse`` accepts it.
+        """
+        cache_key = None
+        if use_cache and self.cache is not None:
+            start_time = time.time()
+            cache_key = completion_cache_key(self.model, messages, max_tokens)
+            cached = await asyncio.to_thread(self._cache_get, cache_key)
+            if cached is not None:
+                generation_time_ms = int((time.time() - start_time) * 1000)
+                self._log_request(None, generation_time_ms, "success", cached=True, kind=kind)
+                yield cached
+                return
+
+        start_time = time.time()
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        if max_tokens:
+            kwargs["max_tokens"] = max_tokens
+
+        parts: List[str] = []
+        usage_chunk = None
+        stream = None
+        try:
+            # The concurrency slot is held for the whole stream
+            async with self.guard.slot():
+                stream = await self.guard.call(
+                    lambda: self.client.chat.completions.create(**kwargs),
+                    hold_slot=False
+                )
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage_chunk = chunk
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        delta = chunk.choices[0].delta.content
+                        parts.append(delta)
+                        yield delta
+        except Exception as e:
+            generation_time_ms = int((time.time() - start_time) * 1000)
+            error_msg = str(e)
+            self._log_request(None, generation_time_ms, "error", error_msg, kind=kind)
+            if isinstance(e, CircuitOpenError):
+                raise LLMUnavailableError(error_msg)
+            raise LLMError(f"LLM request failed: {error_msg}")
+        finally:
+            if stream is not None:
+                await stream.close()
+
+        generation_time_ms = int((time.time() - start_time) * 1000)
+        self._log_request(usage_chunk, generation_time_ms, "success", kind=kind)
+
+        content = "".join(parts)
+        if cache_key is not None and content:
+            try:
+                if parse:
+                    parse(content)
+            except Exception:
+                return
+            await asyncio.to_thread(self._cache_put, cache_key, content, usage_chunk)
+
+    def _enrich_messages(
+        self,
+        asset_type: AssetType,
+        messages: List[dict],
+        current_prompt: Optional[str] = None
+    ) -> List[dict]:
+        system_prompt = build_layered_system_prompt(asset_type)
+
+        if current_prompt:
+            system_prompt += f"\n\nCurrent description (improve upon this):\n{current_prompt}"
 
-    def enrich_variant(
+        chat_messages = [{"role": "system", "content": system_prompt}]
+        chat_messages.extend([{"role": m["role"], "content": m["content"]} for m in messages])
+        return chat_messages
+
+    def _variant_messages(
         self,
         asset_type: AssetType,
         base_prompt: str,
         messages: List[dict],
         current_delta: Optional[str] = None
-    ) -> Dict[str, str]:
-        """Enrich variant with layered delta structure."""
+    ) -> List[dict]:
         system_prompt = build_variant_system_prompt(asset_type, base_prompt)
 
         if current_delta:
@@ -368,55 +606,135 @@ class LLMClient:
 
         chat_messages = [{"role": "system", "content": system_prompt}]
         chat_messages.extend([{"role": m["role"], "content": m["content"]} for m in messages])
+        return chat_messages
 
-        start_time = time.time()
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=chat_messages
-            )
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            self._log_request(response, generation_time_ms, "success")
-            return parse_layered_response(response.choices[0].message.content)
-        except Exception as e:
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            error_msg = str(e)
-            self._log_request(None, generation_time_ms, "error", error_msg)
-            if isinstance(e, LLMError):
-                raise
-            raise LLMError(f"LLM request failed: {error_msg}")
+    async def enrich(
+        self,
+        asset_type: AssetType,
+        messages: List[dict],
+        current_prompt: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Enrich asset with layered prompt structure."""
+        chat_messages = self._enrich_messages(asset_type, messages, current_prompt)
+        return await self._chat(chat_messages, parse=parse_layered_response, kind="enrich")
+
+    async def enrich_variant(
+        self,
+        asset_type: AssetType,
+        base_prompt: str,
+        messages: List[dict],
+        current_delta: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Enrich variant with layered delta structure."""
+        chat_messages = self._variant_messages(asset_type, base_prompt, messages, current_delta)
+        return await self._chat(chat_messages, parse=parse_layered_response, kind="variant")
+
+    def stream_enrich(
+        self,
+        asset_type: AssetType,
+        messages: List[dict],
+        current_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream the raw layered JSON of an asset enrichment."""
+        chat_messages = self._enrich_messages(asset_type, messages, current_prompt)
+        return self._stream_chat(chat_messages, parse=parse_layered_response, kind="enrich")
 
-    def complete(self, messages: List[dict], max_tokens: Optional[int] = None) -> str:
+    def stream_enrich_variant(
+        self,
+        asset_type: AssetType,
+        base_prompt: str,
+        messages: List[dict],
+        current_delta: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream the raw layered JSON of a variant enrichment."""
+        chat_messages = self._variant_messages(asset_type, base_prompt, messages, current_delta)
+        return self._stream_chat(chat_messages, parse=parse_layered_response, kind="variant")
+
+    async def complete(
+        self,
+        messages: List[dict],
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        kind: str = "completion"
+    ) -> str:
         """General chat completion with logging."""
-        start_time = time.time()
-        try:
-            kwargs = {"model": self.model, "messages": messages}
-            if max_tokens:
-                kwargs["max_tokens"] = max_tokens
-            response = self.client.chat.completions.create(**kwargs)
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            self._log_request(response, generation_time_ms, "success")
-            return response.choices[0].message.content
-        except Exception as e:
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            error_msg = str(e)
-            self._log_request(None, generation_time_ms, "error", error_msg)
-            raise LLMError(f"LLM request failed: {error_msg}")
+        return await self._chat(messages, max_tokens=max_tokens, use_cache=use_cache, kind=kind)
+
+    def stream_complete(
+        self,
+        messages: List[dict],
+        max_tokens: Optional[int] = None,
+        kind: str = "completion"
+    ) -> AsyncIterator[str]:
+        """General chat completion, streamed as content deltas."""
+        return self._stream_chat(messages, max_tokens=max_tokens, kind=kind)
 
 
-def get_llm_client(db: Session) -> LLMClient:
-    settings = {}
-    for key in ["llm_provider", "llm_api_key", "llm_model", "llm_base_url"]:
-        setting = db.query(Settings).filter(Settings.key == key).first()
-        settings[key] = setting.value if setting else ""
+# Process-wide registry of LLM clients keyed on the settings fingerprint.
+# The active key is remembered so hot calls skip the settings lookup
+# entirely; PUT /api/settings drops it via invalidate_llm_clients(). Only
+# the client for the current settings is kept, so a changed API key or
+# endpoint does not leave the old client (and its credentials) behind.
+LLM_SETTINGS_KEYS = ["llm_provider", "llm_api_key", "llm_model", "llm_base_url"]
+
+_client_registry: Dict[tuple, LLMClient] = {}
+_active_client_key: Optional[tuple] = None
+
 
-    # LM Studio doesn't require an API key
-    if not settings["llm_api_key"] and settings["llm_provider"] != "lmstudio":
+def _settings_fingerprint(settings: Dict[str, str]) -> tuple:
+    api_key_hash = hashlib.sha256(settings["llm_api_key"].encode()).hexdigest()
+    return (settings["llm_provider"], settings["llm_base_url"], settings["llm_model"], api_key_hash)
+
+
+def invalidate_llm_clients():
+    global _active_client_key
+    _active_client_key = None
+
+
+def get_llm_client(db: Session) -> LLMClient:
+    global _active_client_key
+    if _active_client_key is not None:
+        return _client_registry[_active_client_key]
+
+    rows = db.query(Settings).filter(
+        Settings.key.in_(LLM_SETTINGS_KEYS + ["llm_cache_enabled"])
+    ).all()
+    values = {row.key: row.value for row in rows}
+    settings = {key: values.get(key) or "" for key in LLM_SETTINGS_KEYS}
+
+    # LM Studio and the offline mock don't require an API key
+    if not settings["llm_api_key"] and settings["llm_provider"] not in ("lmstudio", "mock"):
         raise LLMError("LLM API key not configured")
 
-    return LLMClient(
-        base_url=settings["llm_base_url"],
-        api_key=settings["llm_api_key"] or "not-needed",
-        model=settings["llm_model"],
-        provider=settings["llm_provider"]
-    )
+    key = _settings_fingerprint(settings)
+    client = _client_registry.get(key)
+    if client is None:
+        if settings["llm_provider"] == "mock":
+            from services.mock_llm import MOCK_BASE_URL, get_mock_http_client
+
+            client = LLMClient(
+                base_url=MOCK_BASE_URL,
+                api_key="not-needed",
+                model=settings["llm_model"] or "mock",
+                provider="mock",
+                http_client=get_mock_http_client()
+            )
+        else:
+            client = LLMClient(
+                base_url=settings["llm_base_url"],
+                api_key=settings["llm_api_key"] or "not-needed",
+                model=settings["llm_model"],
+                provider=settings["llm_provider"]
+            )
+        # Requests already running keep their reference to the old client
+        _client_registry.clear()
+        _client_registry[key] = client
+
+    # Completion cache is opt-in and lives in the same database
+    if values.get("llm_cache_enabled") == "true":
+        client.cache = CompletionCache(sessionmaker(bind=db.get_bind()))
+    else:
+        client.cache = None
+
+    _active_client_key = key
+    return client
@@ -0,0 +1,232 @@
+# backend/services/llm_resilience.py
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from loguru import logger
+import openai
+
+T = TypeVar("T")
+
+
+def _env_float(name: str, provider: str, default: float) -> float:
+    """Read a limit from the environment, preferring the provider-specific variant.
+
+    E.g. LLM_MAX_CONCURRENCY_OPENROUTER overrides LLM_MAX_CONCURRENCY.
+    """
+    value = os.getenv(f"{name}_{provider.upper()}", os.getenv(name))
+    return float(value) if value else default
+
+
+@dataclass
+class ResiliencePolicy:
+    max_concurrency: int = 8
+    rate_per_second: float = 5.0  # Token bucket refill rate, 0 disables
+    burst: int = 10  # Token bucket capacity
+    max_retries: int = 3
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 30.0
+    failure_threshold: int = 5  # Consecutive failures that open the circuit
+    reset_timeout: float = 30.0  # Seconds before a trial call is let through
+
+    @classmethod
+    def from_env(cls, provider: str) -> "ResiliencePolicy":
+        defaults = cls()
+        return cls(
+            max_concurrency=int(_env_float("LLM_MAX_CONCURRENCY", provider, defaults.max_concurrency)),
+            rate_per_second=_env_float("LLM_RATE_PER_SECOND", provider, defaults.rate_per_second),
+            burst=int(_env_float("LLM_RATE_BURST", provider, defaults.burst)),
+            max_retries=int(_env_float("LLM_MAX_RETRIES", provider, defaults.max_retries)),
+            retry_base_delay=_env_float("LLM_RETRY_BASE_DELAY", provider, defaults.retry_base_delay),
+            retry_max_delay=_env_float("LLM_RETRY_MAX_DELAY", provider, defaults.retry_max_delay),
+            failure_threshold=int(_env_float("LLM_CIRCUIT_FAILURE_THRESHOLD", provider, defaults.failure_threshold)),
+            reset_timeout=_env_float("LLM_CIRCUIT_RESET_SECONDS", provider, defaults.reset_timeout),
+        )
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter."""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            raise CircuitOpenError("LLM provider unavailable, circuit breaker is open")
+        if state == "half_open":
+            self._trial_running = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_running:
+                logger.warning(f"LLM circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def record_neutral(self):
+        """A call that failed for reasons that say nothing about provider health."""
+        self._trial_running = False
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """Errors that indicate the provider is down (rate limiting does not)."""
+    return _is_retryable(error) and getattr(error, "status_code", None) != 429
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the provider via Retry-After / retry-after-ms."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderGuard:
+    """Concurrency limit, rate limit, retries and circuit breaker for one provider."""
+
+    def __init__(self, policy: ResiliencePolicy):
+        self.policy = policy
+        self.semaphore = asyncio.Semaphore(max(policy.max_concurrency, 1))
+        self.bucket = TokenBucket(policy.rate_per_second, policy.burst)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the provider's concurrency slots."""
+        async with self.semaphore:
+            yield
+
+    def backoff_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """Seconds to wait before retry ``attempt``, or None to give up."""
+        requested = retry_after_seconds(error)
+        if requested is not None:
+            # Retrying earlier than asked would just be rejected again
+            return requested if requested <= self.policy.retry_max_delay else None
+        ceiling = min(self.policy.retry_max_delay, self.policy.retry_base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], hold_slot: bool = True) -> T:
+        """Run ``fn`` with retries.
+
+        With ``hold_slot=False`` the caller is expected to hold ``slot()``
+        itself, e.g. for the whole lifetime of a stream.
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            await self.bucket.acquire()
+            try:
+                if hold_slot:
+                    async with self.slot():
+                        result = await fn()
+                else:
+                    result = await fn()
+            except Exception as e:
+                if _is_provider_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_neutral()
+
+                delay = self.backoff_delay(attempt, e) if _is_retryable(e) else None
+                if delay is None or attempt >= self.policy.max_retries:
+                    raise
+                attempt += 1
+                logger.info(f"LLM call failed ({e}), retry {attempt}/{self.policy.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.record_neutral()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+
+_guards: Dict[str, ProviderGuard] = {}
+
+
+def get_provider_guard(provider: str) -> ProviderGuard:
+    """Process-wide guard per provider, so limits apply across clients."""
+    guard = _guards.get(provider)
+    if guard is None:
+        guard = ProviderGuard(ResiliencePolicy.from_env(provider))
+        _guards[provider] = guard
+    return guard
@@ -0,0 +1,155 @@
+# backend/services/llm_telemetry.py
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from loguru import logger
+from sqlalchemy.orm import Session
+from models import LLMRequestRecord
+
+# Request logs are buffered in memory and written in batches
+TELEMETRY_BATCH_SIZE = int(os.getenv("LLM_TELEMETRY_BATCH_SIZE", "50"))
+TELEMETRY_FLUSH_SECONDS = float(os.getenv("LLM_TELEMETRY_FLUSH_SECONDS", "5"))
+TELEMETRY_RETENTION_DAYS = int(os.getenv("LLM_TELEMETRY_RETENTION_DAYS", "30"))
+_PRUNE_INTERVAL_SECONDS = 3600
+
+METRICS_WINDOWS = {
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+_pending: List = []
+_pending_lock = threading.Lock()
+_flush_wanted: Optional[asyncio.Event] = None
+_last_prune = 0.0
+
+
+def record_request_log(log):
+    """Queue an LLMRequestLog for the next batch write."""
+    with _pending_lock:
+        _pending.append(log)
+        full = len(_pending) >= TELEMETRY_BATCH_SIZE
+    if full and _flush_wanted is not None:
+        _flush_wanted.set()
+
+
+def flush_request_logs(db: Session) -> int:
+    """Write all queued request logs and apply retention. Returns rows written."""
+    global _last_prune
+    with _pending_lock:
+        batch = list(_pending)
+        _pending.clear()
+
+    if batch:
+        db.bulk_insert_mappings(LLMRequestRecord, [
+            {
+                "timestamp": datetime.fromisoformat(log.timestamp),
+                "provider": log.provider,
+                "model": log.model,
+                "kind": log.kind,
+                "input_tokens": log.input_tokens,
+                "output_tokens": log.output_tokens,
+                "generation_time_ms": log.generation_time_ms,
+                "status": log.status,
+                "error_message": log.error_message,
+                "cached": log.cached,
+                "coalesced": log.coalesced,
+            }
+            for log in batch
+        ])
+
+    if time.monotonic() - _last_prune > _PRUNE_INTERVAL_SECONDS:
+        cutoff = datetime.now() - timedelta(days=TELEMETRY_RETENTION_DAYS)
+        db.query(LLMRequestRecord).filter(
+            LLMRequestRecord.timestamp < cutoff
+        ).delete(synchronize_session=False)
+        _last_prune = time.monotonic()
+
+    db.commit()
+    return len(batch)
+
+
+async def run_telemetry_writer(session_factory: Callable[[], Session]):
+    """Background task: flush every few seconds or as soon as a batch is full."""
+    global _flush_wanted
+    _flush_wanted = asyncio.Event()
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(_flush_wanted.wait(), timeout=TELEMETRY_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _flush_wanted.clear()
+            try:
+                await asyncio.to_thread(_flush, session_factory)
+            except Exception as e:
+                logger.warning(f"Failed to write LLM telemetry: {e}")
+    finally:
+        _flush_wanted = None
+        _flush(session_factory)
+
+
+def _flush(session_factory: Callable[[], Session]):
+    with session_factory() as db:
+        flush_request_logs(db)
+
+
+def _percentile(sorted_values: List[int], pct: float) -> int:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def compute_llm_metrics(db: Session, window: str) -> Dict:
+    """Latency percentiles, throughput, error rate and token totals per provider/model/kind."""
+    since = datetime.now() - METRICS_WINDOWS[window]
+    rows = db.query(
+        LLMRequestRecord.provider,
+        LLMRequestRecord.model,
+        LLMRequestRecord.kind,
+        LLMRequestRecord.status,
+        LLMRequestRecord.cached,
+        LLMRequestRecord.generation_time_ms,
+        LLMRequestRecord.input_tokens,
+        LLMRequestRecord.output_tokens,
+    ).filter(LLMRequestRecord.timestamp >= since).all()
+
+    grouped: Dict[tuple, List] = defaultdict(list)
+    for row in rows:
+        grouped[(row.provider, row.model, row.kind)].append(row)
+
+    groups = []
+    for (provider, model, kind), group_rows in sorted(grouped.items()):
+        # Latency and throughput only describe real upstream calls
+        upstream = [r for r in group_rows if r.status == "success" and not r.cached]
+        latencies = sorted(r.generation_time_ms for r in upstream)
+        upstream_ms = sum(latencies)
+        upstream_output = sum(r.output_tokens for r in upstream)
+        errors = sum(1 for r in group_rows if r.status == "error")
+
+        groups.append({
+            "provider": provider,
+            "model": model,
+            "kind": kind,
+            "requests": len(group_rows),
+            "errors": errors,
+            "cached": sum(1 for r in group_rows if r.cached),
+            "error_rate": errors / len(group_rows),
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            "tokens_per_second": (upstream_output / upstream_ms * 1000) if upstream_ms else 0.0,
+            "input_tokens": sum(r.input_tokens for r in group_rows),
+            "output_tokens": sum(r.output_tokens for r in group_rows),
+        })
+
+    return {"window": window, "since": since, "groups": groups}
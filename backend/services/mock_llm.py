@@ -0,0 +1,179 @@
+# backend/services/mock_llm.py
+"""Offline LLM provider for load tests and benchmarks (llm_provider = "mock").
+
+Speaks the OpenAI chat-completions protocol, streaming included, through
+an httpx transport, so requests go through the same LLMClient, guard and
+cache code as a real provider. Behaviour is configured via environment:
+
+    MOCK_LLM_LATENCY_MS         median time to first token (default 300)
+    MOCK_LLM_LATENCY_SIGMA      lognormal spread of that latency, 0 = fixed (default 0.5)
+    MOCK_LLM_TOKENS_PER_SECOND  output rate after the first token, 0 = instant (default 80)
+    MOCK_LLM_ERROR_RATE         fraction of requests that fail (default 0)
+    MOCK_LLM_ERROR_STATUS       HTTP status of injected failures (default 503)
+    MOCK_LLM_SEED               seed for reproducible runs
+
+The guard's default rate limit applies to the mock as well; set
+LLM_RATE_PER_SECOND_MOCK=0 to measure unthrottled throughput.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+import httpx
+
+MOCK_BASE_URL = "http://mock-llm/v1"
+
+_WORD = re.compile(r"[A-Za-zÄÖÜäöüß][\w'-]*")
+
+
+@dataclass
+class MockLLMConfig:
+    latency_ms: float = 300.0
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 80.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "MockLLMConfig":
+        seed = os.getenv("MOCK_LLM_SEED")
+        return cls(
+            latency_ms=float(os.getenv("MOCK_LLM_LATENCY_MS", "300")),
+            latency_sigma=float(os.getenv("MOCK_LLM_LATENCY_SIGMA", "0.5")),
+            tokens_per_second=float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "80")),
+            error_rate=float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+            error_status=int(os.getenv("MOCK_LLM_ERROR_STATUS", "503")),
+            seed=int(seed) if seed else None,
+        )
+
+
+def _estimate_tokens(text: str) -> int:
+    return max((len(text) + 3) // 4, 1)
+
+
+def _words(text: str, limit: int) -> List[str]:
+    return _WORD.findall(text)[:limit]
+
+
+def mock_completion_text(messages: List[dict]) -> str:
+    """Plausible output for the request: layered JSON for enrichment, prose otherwise."""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    user = " ".join(m["content"] for m in messages if m["role"] == "user")
+    words = _words(user, 60) or ["subject"]
+
+    if '{"core":' in system:
+        layers = {
+            "core": " ".join(words[:8]),
+            "standard": " ".join(words[8:16]) or "balanced proportions",
+            "detail": " ".join(words[16:24]) or "fine surface texture",
+        }
+        if "outfit_suggestion" in system:
+            layers["outfit_suggestion"] = {
+                "core": "practical clothing", "standard": "muted colors", "detail": "worn seams"
+            }
+        return json.dumps(layers)
+    return " ".join(words).capitalize() + "."
+
+
+class MockLLMTransport(httpx.AsyncBaseTransport):
+    def __init__(self, config: Optional[MockLLMConfig] = None):
+        self.config = config or MockLLMConfig.from_env()
+        self.random = random.Random(self.config.seed)
+
+    def _first_token_delay(self) -> float:
+        median = self.config.latency_ms / 1000
+        if self.config.latency_sigma <= 0:
+            return median
+        return self.random.lognormvariate(0, self.config.latency_sigma) * median
+
+    def _token_delay(self, tokens: int) -> float:
+        rate = self.config.tokens_per_second
+        return tokens / rate if rate > 0 else 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/chat/completions"):
+            return httpx.Response(404, json={"error": {"message": "Not found"}})
+
+        body = json.loads(request.content)
+        if self.random.random() < self.config.error_rate:
+            await asyncio.sleep(self._first_token_delay())
+            return httpx.Response(
+                self.config.error_status,
+                json={"error": {"message": "Injected mock failure", "type": "mock_error"}}
+            )
+
+        content = mock_completion_text(body.get("messages", []))
+        if body.get("max_tokens"):
+            content = content[:body["max_tokens"] * 4]
+        usage = {
+            "prompt_tokens": sum(_estimate_tokens(m.get("content") or "") for m in body.get("messages", [])),
+            "completion_tokens": _estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = body.get("model", "mock")
+
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                stream=_MockStream(self._stream_events(content, model, usage))
+            )
+
+        await asyncio.sleep(self._first_token_delay() + self._token_delay(usage["completion_tokens"]))
+        return httpx.Response(200, json={
+            "id": "cmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    async def _stream_events(self, content: str, model: str, usage: dict) -> AsyncIterator[bytes]:
+        def event(choices: list, **extra) -> bytes:
+            chunk = {
+                "id": "cmpl-mock", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model, "choices": choices, **extra
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        await asyncio.sleep(self._first_token_delay())
+        # Roughly one token per chunk
+        for start in range(0, len(content), 4):
+            yield event([{"index": 0, "delta": {"content": content[start:start + 4]}, "finish_reason": None}])
+            await asyncio.sleep(self._token_delay(1))
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        yield event([], usage=usage)
+        yield b"data: [DONE]\n\n"
+
+
+class _MockStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.chunks:
+            yield chunk
+
+    async def aclose(self):
+        await self.chunks.aclose()
+
+
+_mock_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_mock_http_client() -> httpx.AsyncClient:
+    """Shared client for the mock provider, configured from the environment once."""
+    global _mock_http_client
+    if _mock_http_client is None or _mock_http_client.is_closed:
+        _mock_http_client = httpx.AsyncClient(transport=MockLLMTransport())
+    return _mock_http_client
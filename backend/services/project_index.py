@@ -0,0 +1,165 @@
+# backend/services/project_index.py
+"""Per-project in-memory indexes kept in step with asset and variant writes.
+
+An index covers a project's assets and variants plus the global ones. Each
+kind of index (tag prefixes, prompt similarity) has a ProjectIndexCache
+that builds indexes on first use and keeps them, least recently used
+evicted first. Asset and variant writes are recorded once per flush and,
+when the transaction commits, applied to every cached index on the same
+engine; a rollback discards them. Bulk statements, which bypass the flush,
+drop the cached indexes instead.
+
+An index provides ``covers(project_id, is_global)``, ``has_asset``,
+``write_asset(AssetWrite)``, ``drop_asset``, ``write_variant(VariantWrite)``
+and ``drop_variant``.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Callable, Dict, List
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Asset, AssetType, Variant
+
+_OPS_KEY = "project_index_ops"
+
+
+@dataclass(frozen=True)
+class AssetWrite:
+    id: int
+    name: str
+    type: AssetType
+    is_global: bool
+    layers: Dict[str, str]
+
+
+@dataclass(frozen=True)
+class VariantWrite:
+    id: int
+    asset_id: int
+    name: str
+    layers: Dict[str, str]
+
+
+def _apply(index, op: tuple):
+    kind = op[0]
+    if kind == "put_asset":
+        _, asset, project_id = op
+        if index.covers(project_id, asset.is_global):
+            index.write_asset(asset)
+        else:
+            index.drop_asset(asset.id)
+    elif kind == "drop_asset":
+        index.drop_asset(op[1])
+    elif kind == "put_variant":
+        _, variant, moved = op
+        if index.has_asset(variant.asset_id):
+            index.write_variant(variant)
+        elif moved:
+            index.drop_variant(variant.id)
+    elif kind == "drop_variant":
+        index.drop_variant(op[1])
+
+
+class ProjectIndexCache:
+    """Indexes of one kind keyed by (engine, project ID)."""
+
+    def __init__(self, build: Callable[[Session, int], Any], capacity: int):
+        self.build = build
+        self.capacity = capacity
+        self.lock = threading.Lock()  # Guards the cached indexes and their updates
+        self._generation = 0  # Bumped whenever cached indexes change or are dropped
+        self._indexes: "OrderedDict[tuple, Any]" = OrderedDict()
+        _caches.append(self)
+
+    def get(self, db: Session, project_id: int):
+        key = (db.get_bind(), project_id)
+        with self.lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+            generation = self._generation
+
+        index = self.build(db, project_id)
+        with self.lock:
+            # Commits applied while we were loading may be missing from this build
+            if generation == self._generation:
+                self._indexes[key] = index
+                while len(self._indexes) > max(self.capacity, 1):
+                    self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self.lock:
+            self._indexes.clear()
+            self._generation += 1
+
+    def apply(self, bind, ops: List[tuple]):
+        with self.lock:
+            self._generation += 1
+            for (engine, _), index in self._indexes.items():
+                if engine is bind:
+                    for op in ops:
+                        _apply(index, op)
+
+
+_caches: List[ProjectIndexCache] = []
+
+
+def clear_project_indexes():
+    for cache in _caches:
+        cache.clear()
+
+
+def _record_ops(session: Session) -> List[tuple]:
+    """Snapshot the flushed asset and variant writes; assets first."""
+    asset_ops, variant_ops = [], []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        deleted = obj in session.deleted
+        if isinstance(obj, Asset):
+            if deleted:
+                asset_ops.append(("drop_asset", obj.id))
+            else:
+                asset = AssetWrite(obj.id, obj.name, obj.type, obj.is_global, obj.layers)
+                asset_ops.append(("put_asset", asset, obj.project_id))
+        elif isinstance(obj, Variant):
+            if deleted:
+                variant_ops.append(("drop_variant", obj.id))
+            else:
+                moved_from = inspect(obj).attrs.asset_id.history.deleted
+                variant = VariantWrite(obj.id, obj.asset_id, obj.name, obj.layers)
+                variant_ops.append(("put_variant", variant, bool(moved_from)))
+    return asset_ops + variant_ops
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context):
+    ops = _record_ops(session)
+    if ops:
+        session.info.setdefault(_OPS_KEY, []).extend(ops)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session):
+    ops = session.info.pop(_OPS_KEY, None)
+    if not ops:
+        return
+    bind = session.get_bind()
+    for cache in _caches:
+        cache.apply(bind, ops)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session):
+    session.info.pop(_OPS_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Asset, Variant):
+        clear_project_indexes()
@@ -1,18 +1,44 @@
 # backend/services/prompt_engine.py
 import re
-import json
 from typing import List, Optional, Dict, Tuple
+from loguru import logger
 from sqlalchemy.orm import Session
-from models import Scene, Asset, Variant
+from models import Scene, Asset
 from models.asset import AssetType
-from services.scene_assembler import SceneData
+from config.image_models import get_preset, get_layer_rules, select_layers
+from services.asset_catalog import CatalogAsset, get_project_catalog
+from services.scene_assembler import AssemblyPlan, SceneData, get_active_preset_name, build_payload_report
+
+# [NAME] or [NAME:VARIANT] in a scene's action text
+TAG_PATTERN = re.compile(r'\[([A-Za-zÄÖÜäöüß0-9_ .\-]+)(?::([^\]]+))?\]')
+
+# Global style used when neither the request nor the scene sets one
+DEFAULT_STYLE_NAME = "Cinematic"
+
+# Keywords in the camera's name and core layer that identify its framing.
+# Checked in order, first match wins; unknown framings keep every layer.
+SHOT_CLASS_KEYWORDS = [
+    ("medium close", "medium"),
+    ("close-up", "close_up"),
+    ("close up", "close_up"),
+    ("closeup", "close_up"),
+    ("macro", "close_up"),
+    ("medium", "medium"),
+    ("waist-up", "medium"),
+    ("over-the-shoulder", "medium"),
+    ("point-of-view", "medium"),
+    ("wide", "wide"),
+    ("establishing", "wide"),
+    ("full body", "wide"),
+    ("bird's eye", "wide"),
+    ("overhead", "wide"),
+]
 
 
 def parse_scene_text(text: str) -> List[dict]:
     """Parse asset references from action text."""
-    pattern = r'\[([A-Za-zÄÖÜäöüß0-9_ .\-]+)(?::([^\]]+))?\]'
     refs = []
-    for match in re.finditer(pattern, text):
+    for match in TAG_PATTERN.finditer(text):
         refs.append({
             "asset": match.group(1),
             "variant": match.group(2),
@@ -21,113 +47,220 @@ def parse_scene_text(text: str) -> List[dict]:
     return refs
 
 
-def parse_layered_prompt(prompt_str: str) -> Dict[str, str]:
-    """Parse a layered prompt JSON string to dict."""
-    if not prompt_str:
-        return {"core": "", "standard": "", "detail": ""}
+def classify_shot(camera_name: str, camera: Dict[str, str], has_characters: bool) -> str:
+    """Classify the framing as close_up, medium, wide or establishing."""
+    if not has_characters:
+        return "establishing"
+    text = f"{camera_name} {camera.get('core', '')}".lower()
+    for keyword, shot_class in SHOT_CLASS_KEYWORDS:
+        if keyword in text:
+            return shot_class
+    return "wide"
 
-    try:
-        data = json.loads(prompt_str)
-        return {
-            "core": data.get("core", ""),
-            "standard": data.get("standard", ""),
-            "detail": data.get("detail", "")
-        }
-    except json.JSONDecodeError:
-        # Legacy: treat as plain text, put everything in core
-        return {"core": prompt_str, "standard": "", "detail": ""}
+
+def _pick_layers(layers: Optional[Dict[str, str]], keep: List[str]) -> Optional[Dict[str, str]]:
+    if not layers:
+        return None
+    picked = {layer: layers[layer] for layer in keep if layers.get(layer)}
+    return picked or None
 
 
-def resolve_asset_ref(ref: dict, project_id: int, db: Session) -> Optional[Dict]:
-    """Resolve an asset reference to its full details."""
-    asset = db.query(Asset).filter(
-        Asset.name.ilike(ref["asset"]),
-        (Asset.project_id == project_id) | (Asset.is_global == True)
-    ).first()
+def _tag_key(ref: dict) -> str:
+    return f"{ref['asset']}:{ref['variant']}" if ref["variant"] else ref["asset"]
 
-    if not asset:
-        return None
 
-    result = {
-        "asset": asset,
-        "type": asset.type,
-        "name": asset.name,
-        "base": parse_layered_prompt(asset.base_prompt),
-        "variant": None
+def resolve_asset_refs(
+    refs: List[dict],
+    project_id: int,
+    db: Session,
+    asset_ids: Tuple[int, ...] = ()
+) -> Tuple[Dict[str, Dict], Dict[int, CatalogAsset]]:
+    """Resolve all references of a scene against the project's cached catalog.
+
+    Returns the resolved references keyed by tag (NAME or NAME:VARIANT) and
+    the assets requested by ID (camera, lighting, style). Only IDs outside
+    the project and the global assets cost a query.
+    """
+    wanted_ids = {asset_id for asset_id in asset_ids if asset_id}
+    if not refs and not wanted_ids:
+        return {}, {}
+
+    catalog = get_project_catalog(db, project_id)
+    by_id = {
+        asset_id: catalog.assets_by_id[asset_id]
+        for asset_id in wanted_ids if asset_id in catalog.assets_by_id
     }
+    missing = wanted_ids - by_id.keys()
+    if missing:
+        for asset in db.query(Asset).filter(Asset.id.in_(missing)).all():
+            by_id[asset.id] = CatalogAsset.from_asset(asset)
+
+    resolved: Dict[str, Dict] = {}
+    for ref in refs:
+        asset = catalog.find_asset(ref["asset"])
+        if not asset:
+            continue
+        variant = catalog.find_variant(asset.id, ref["variant"]) if ref["variant"] else None
+        resolved[_tag_key(ref)] = {
+            "asset": asset,
+            "type": asset.type,
+            "name": asset.name,
+            "base": asset.layers,
+            "variant": variant
+        }
+    return resolved, by_id
 
-    if ref["variant"]:
-        variant = db.query(Variant).filter(
-            Variant.asset_id == asset.id,
-            Variant.name.ilike(ref["variant"])
-        ).first()
-        if variant:
-            result["variant"] = parse_layered_prompt(variant.delta_prompt)
 
-    return result
+def resolve_asset_ref(ref: dict, project_id: int, db: Session) -> Optional[Dict]:
+    """Resolve an asset reference to its full details."""
+    resolved, _ = resolve_asset_refs([ref], project_id, db)
+    return resolved.get(_tag_key(ref))
+
 
+def aggregate_scene_data(
+    scene: Scene,
+    style_id: Optional[int],
+    db: Session,
+    preset_name: Optional[str] = None
+) -> SceneData:
+    """Aggregate all scene data into structured format for assembly.
 
-def aggregate_scene_data(scene: Scene, style_id: Optional[int], db: Session) -> SceneData:
-    """Aggregate all scene data into structured format for assembly."""
+    Asset layers are pre-selected for the shot's framing according to the
+    preset's layer rules, so the LLM is only sent text it can actually use.
+    """
 
     # Keep the original direction text WITH tags
     direction = scene.action_text or ""
 
-    # Parse and resolve asset references
+    # Parse and resolve asset references, together with the scene's camera,
+    # lighting and style assets
     refs = parse_scene_text(direction)
+    resolved, by_id = resolve_asset_refs(
+        refs, scene.project_id, db, (scene.shot_type_id, scene.lighting_id, style_id)
+    )
 
     # Build assets dictionary keyed by tag (e.g., "ANNA:Medieval" or "LIBRARY")
-    assets: Dict[str, Dict] = {}
-
-    for ref in refs:
-        resolved = resolve_asset_ref(ref, scene.project_id, db)
-        if resolved:
-            # Build the tag key (NAME or NAME:VARIANT)
-            tag_key = ref["asset"]
-            if ref["variant"]:
-                tag_key = f"{ref['asset']}:{ref['variant']}"
-
-            assets[tag_key] = {
-                "type": resolved["type"].value,  # "character", "location", "object"
-                "name": resolved["name"],
-                "base": resolved["base"],
-                "variant": resolved["variant"]
-            }
+    assets: Dict[str, Dict] = {
+        tag_key: {
+            "type": item["type"].value,  # "character", "location", "object"
+            "name": item["name"],
+            "base": item["base"],
+            "variant": item["variant"]
+        }
+        for tag_key, item in resolved.items()
+    }
 
     # Get camera (shot type)
     camera = {"core": "", "standard": "", "detail": ""}
-    if scene.shot_type_id:
-        shot_type = db.query(Asset).filter(Asset.id == scene.shot_type_id).first()
-        if shot_type:
-            camera = parse_layered_prompt(shot_type.base_prompt)
+    camera_name = ""
+    shot_type = by_id.get(scene.shot_type_id)
+    if shot_type:
+        camera = shot_type.layers
+        camera_name = shot_type.name
 
     # Get lighting
     lighting = {"core": "", "standard": "", "detail": ""}
-    if scene.lighting_id:
-        lighting_asset = db.query(Asset).filter(Asset.id == scene.lighting_id).first()
-        if lighting_asset:
-            lighting = parse_layered_prompt(lighting_asset.base_prompt)
+    lighting_asset = by_id.get(scene.lighting_id)
+    if lighting_asset:
+        lighting = lighting_asset.layers
 
     # Get style
     style = {"core": "", "standard": "", "detail": ""}
-    if style_id:
-        style_asset = db.query(Asset).filter(Asset.id == style_id).first()
-        if style_asset:
-            style = parse_layered_prompt(style_asset.base_prompt)
+    style_asset = by_id.get(style_id)
+    if style_asset:
+        style = style_asset.layers
+
+    # Select the layers visible at this framing
+    has_characters = any(a["type"] == AssetType.CHARACTER.value for a in assets.values())
+    shot_class = classify_shot(camera_name, camera, has_characters)
+    rules = get_layer_rules(get_preset(preset_name or get_active_preset_name(db)))
+    selected_assets = {
+        tag: {
+            "type": asset["type"],
+            "name": asset["name"],
+            "base": _pick_layers(asset["base"], select_layers(rules, shot_class, asset["type"], "base")) or {},
+            "variant": _pick_layers(asset["variant"], select_layers(rules, shot_class, asset["type"], "variant"))
+        }
+        for tag, asset in assets.items()
+    }
 
-    return SceneData(
+    scene_data = SceneData(
         direction=direction,
-        assets=assets,
+        assets=selected_assets,
         camera=camera,
         lighting=lighting,
-        style=style
+        style=style,
+        shot_class=shot_class,
+        full_assets=assets
+    )
+    # The report serializes the whole legacy payload; only build it when debug logs are kept
+    logger.opt(lazy=True).debug(
+        "Scene {} assembly payload ({}): {}", lambda: scene.id, lambda: shot_class,
+        lambda: _describe_payload(build_payload_report(scene_data))
     )
+    return scene_data
+
+
+def _describe_payload(report: Dict) -> str:
+    return f"{report['full_tokens']} -> {report['selected_tokens']} tokens (-{report['saved_percent']}%)"
+
+
+def resolve_style_id(scene: Scene, style_id: Optional[int], db: Session) -> Optional[int]:
+    """Style for generation: requested, then the scene's, then the global default."""
+    if style_id is None and scene.style_id:
+        style_id = scene.style_id
+    if style_id is None:
+        default_style = db.query(Asset).filter(
+            Asset.type == AssetType.STYLE,
+            Asset.is_global == True,
+            Asset.name == DEFAULT_STYLE_NAME
+        ).first()
+        if default_style:
+            style_id = default_style.id
+    return style_id
 
 
-# Legacy function for backwards compatibility during transition
-def generate_scene_prompt(scene: Scene, style_id: Optional[int], db: Session) -> str:
-    """Generate scene prompt - now uses LLM assembly."""
-    from services.scene_assembler import assemble_scene_sync
+async def generate_scene_prompt(
+    scene: Scene,
+    style_id: Optional[int],
+    db: Session,
+    assembler: Optional[str] = None,
+    polish: bool = False
+) -> str:
+    """Generate the scene prompt with the preset's (or the requested) assembler."""
+    from services.scene_assembler import assemble_scene
 
     scene_data = aggregate_scene_data(scene, style_id, db)
-    return assemble_scene_sync(scene_data, db)
+    return await assemble_scene(scene_data, db, assembler=assembler, polish=polish)
+
+
+def prepare_scene_prompt(
+    scene: Scene,
+    style_id: Optional[int],
+    db: Session,
+    assembler: Optional[str] = None,
+    polish: bool = False,
+    force: bool = False
+) -> Optional[AssemblyPlan]:
+    """The database half of a prompt refresh: aggregate, fingerprint and plan the assembly.
+
+    Returns None, and marks the scene fresh (without committing), when its
+    inputs are unchanged since the last run. Otherwise the caller should end
+    its transaction, await ``run_assembly(plan)`` and store the result with
+    ``save_scene_prompt``.
+    """
+    from services.scene_assembler import fingerprint_assembly, get_active_preset_name, plan_assembly
+
+    preset_name = get_active_preset_name(db)
+    scene_data = aggregate_scene_data(scene, style_id, db, preset_name)
+    input_hash = fingerprint_assembly(scene_data, db, preset_name, assembler=assembler, polish=polish)
+    if not force and scene.generated_prompt and scene.prompt_input_hash == input_hash:
+        scene.is_stale = False
+        return None
+    return plan_assembly(scene_data, db, preset_name, assembler, polish, input_hash=input_hash)
+
+
+def save_scene_prompt(scene: Scene, plan: AssemblyPlan, prompt: str):
+    scene.generated_prompt = prompt
+    scene.prompt_input_hash = plan.input_hash
+
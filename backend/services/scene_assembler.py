@@ -1,10 +1,11 @@
 # backend/services/scene_assembler.py
+import hashlib
 import json
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from sqlalchemy.orm import Session
 from models import Settings
-from services.llm_client import get_llm_client, LLMError
+from services.llm_client import LLMClient, LLMError, LLMUnavailableError, get_llm_client
 from config.image_models import get_preset
 
 
@@ -15,6 +16,8 @@ class SceneData:
     camera: Dict[str, str]
     lighting: Dict[str, str]
     style: Dict[str, str]
+    shot_class: Optional[str] = None  # close_up, medium, wide or establishing
+    full_assets: Optional[Dict[str, Dict]] = None  # All layers, before the pre-selection
 
 
 ASSEMBLY_SYSTEM_PROMPT = """You are an expert at assembling image generation prompts.
@@ -46,11 +49,12 @@ Focus entirely on the location - ignore "waist-up" or similar character-focused
 
 Each asset has layers: CORE (always visible), STANDARD (medium detail), DETAIL (close-up only)
 
-Select layers based on CAMERA:
-- CLOSE-UP: CHARACTER face CORE only (no outfit), LOCATION blurred
-- MEDIUM: CHARACTER CORE+STANDARD, LOCATION CORE
-- WIDE/FULL: All layers for everything
-- ESTABLISHING (no characters): LOCATION gets full detail emphasis
+Layers have already been selected for the framing given in **shot**, so use
+every layer you receive and do not invent the ones that were left out:
+- close_up: CHARACTER face only (no outfit), render the LOCATION as a soft blur
+- medium: CHARACTER CORE+STANDARD, LOCATION CORE
+- wide: All layers for everything
+- establishing (no characters): LOCATION gets full detail emphasis
 
 ## MIXING BASE + VARIANT
 
@@ -90,16 +94,67 @@ For this image model:
 """
 
 
+POLISH_SYSTEM_PROMPT = """You polish draft image generation prompts for {model_name}.
+
+The draft was assembled mechanically from asset descriptions. Rewrite it so it
+reads naturally as a {style} prompt of at most {max_words} words.
+
+Keep every visual fact from the draft and do not add new ones.
+Return ONLY the final prompt."""
+
+
+def _compact_layers(layers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Drop empty layers; None if nothing is left."""
+    if not layers:
+        return None
+    return {layer: text for layer, text in layers.items() if text} or None
+
+
 def build_assembly_prompt(scene_data: SceneData, max_words: int, style: str) -> str:
-    """Build the user prompt for scene assembly."""
-    data = {
+    """Build the user prompt for scene assembly (compact JSON, no empty layers)."""
+    assets = {}
+    for tag, asset in scene_data.assets.items():
+        entry = {"type": asset["type"], "name": asset["name"], "base": _compact_layers(asset["base"]) or {}}
+        variant = _compact_layers(asset.get("variant"))
+        if variant:
+            entry["variant"] = variant
+        assets[tag] = entry
+
+    data = {"direction": scene_data.direction}
+    if scene_data.shot_class:
+        data["shot"] = scene_data.shot_class
+    data["assets"] = assets
+    for section in ("camera", "lighting", "style"):
+        layers = _compact_layers(getattr(scene_data, section))
+        if layers:
+            data[section] = layers
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for payload reporting."""
+    return (len(text) + 3) // 4
+
+
+def build_payload_report(scene_data: SceneData) -> Dict:
+    """Token estimate of the legacy all-layers payload vs. the pre-selected one."""
+    legacy = json.dumps({
         "direction": scene_data.direction,
-        "assets": scene_data.assets,
+        "assets": scene_data.full_assets if scene_data.full_assets is not None else scene_data.assets,
         "camera": scene_data.camera,
         "lighting": scene_data.lighting,
         "style": scene_data.style
+    }, indent=2)
+    full_tokens = estimate_tokens(legacy)
+    selected_tokens = estimate_tokens(build_assembly_prompt(scene_data, 0, ""))
+    saved = max(full_tokens - selected_tokens, 0)
+    return {
+        "shot_class": scene_data.shot_class,
+        "full_tokens": full_tokens,
+        "selected_tokens": selected_tokens,
+        "saved_tokens": saved,
+        "saved_percent": round(saved * 100 / full_tokens, 1) if full_tokens else 0.0
     }
-    return json.dumps(data, indent=2)
 
 
 def get_assembly_system_prompt(preset_name: str, max_words: int, style: str) -> str:
@@ -112,16 +167,20 @@ def get_assembly_system_prompt(preset_name: str, max_words: int, style: str) ->
     return base
 
 
-async def assemble_scene(
+def get_active_preset_name(db: Session) -> str:
+    setting = db.query(Settings).filter(Settings.key == "image_model_preset").first()
+    return setting.value if setting else "nano_banana_pro"
+
+
+def build_assembly_messages(
     scene_data: SceneData,
     db: Session,
     preset_name: Optional[str] = None
-) -> str:
-    """Assemble a scene using LLM to generate the final prompt."""
+) -> List[dict]:
+    """Build the chat messages for scene assembly."""
     # Get image model preset
     if preset_name is None:
-        setting = db.query(Settings).filter(Settings.key == "image_model_preset").first()
-        preset_name = setting.value if setting else "nano_banana_pro"
+        preset_name = get_active_preset_name(db)
 
     preset = get_preset(preset_name)
 
@@ -137,39 +196,144 @@ async def assemble_scene(
         preset["style"]
     )
 
-    # Call LLM
-    try:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def resolve_assembler(preset_name: str, assembler: Optional[str] = None) -> str:
+    """Assembler for a generation: the request's choice, else the preset's, else "llm"."""
+    return assembler or get_preset(preset_name).get("assembler", "llm")
+
+
+def fingerprint_assembly(
+    scene_data: SceneData,
+    db: Session,
+    preset_name: Optional[str] = None,
+    assembler: Optional[str] = None,
+    polish: bool = False
+) -> str:
+    """Hash of everything an assembled prompt depends on.
+
+    Covers the aggregated scene data, the preset and assembler and, when
+    the LLM takes part, the provider and model.
+    """
+    if preset_name is None:
+        preset_name = get_active_preset_name(db)
+
+    assembler = resolve_assembler(preset_name, assembler)
+    polish = polish and assembler == "template"
+    model = None
+    if assembler == "llm" or polish:
         client = get_llm_client(db)
-        result = client.complete(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
+        model = [client.provider, client.model]
+
+    inputs = {
+        "direction": scene_data.direction,
+        "assets": scene_data.assets,
+        "camera": scene_data.camera,
+        "lighting": scene_data.lighting,
+        "style": scene_data.style,
+        "shot_class": scene_data.shot_class,
+        "preset": [preset_name, get_preset(preset_name)],
+        "assembler": assembler,
+        "polish": polish,
+        "model": model,
+    }
+    encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def build_polish_messages(draft: str, preset_name: str) -> List[dict]:
+    """Chat messages for the optional LLM pass over a template draft."""
+    preset = get_preset(preset_name)
+    system_prompt = POLISH_SYSTEM_PROMPT.format(
+        model_name=preset["name"], max_words=preset["max_words"], style=preset["style"]
+    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": draft}
+    ]
+
+
+@dataclass
+class AssemblyPlan:
+    """A scene assembly with its database lookups done.
+
+    Running it needs no session, so callers can release their connection
+    before awaiting the LLM. Without ``messages`` the draft is the result.
+    """
+    draft: Optional[str] = None
+    messages: Optional[List[dict]] = None
+    kind: str = "assembly"
+    client: Optional[LLMClient] = None
+    input_hash: Optional[str] = None  # Fingerprint to store with the prompt
+
+
+def plan_assembly(
+    scene_data: SceneData,
+    db: Session,
+    preset_name: Optional[str] = None,
+    assembler: Optional[str] = None,
+    polish: bool = False,
+    input_hash: Optional[str] = None
+) -> AssemblyPlan:
+    """Prepare a scene assembly: the template draft and/or the LLM messages and client.
+
+    The "llm" assembler writes the prompt with one LLM call; "template"
+    joins the layers locally, optionally followed by an LLM polish pass.
+    """
+    from services.template_assembler import assemble_from_template
+
+    if preset_name is None:
+        preset_name = get_active_preset_name(db)
+
+    if resolve_assembler(preset_name, assembler) == "template":
+        draft = assemble_from_template(scene_data, get_preset(preset_name))
+        if not polish:
+            return AssemblyPlan(draft=draft, input_hash=input_hash)
+        messages = build_polish_messages(draft, preset_name)
+        kind = "polish"
+    else:
+        messages = build_assembly_messages(scene_data, db, preset_name)
+        kind = "assembly"
+    return AssemblyPlan(messages=messages, kind=kind, client=get_llm_client(db), input_hash=input_hash)
+
+
+async def run_assembly(plan: AssemblyPlan) -> str:
+    """The assembled prompt of a plan."""
+    if plan.messages is None:
+        return plan.draft
+    try:
+        result = await plan.client.complete(messages=plan.messages, kind=plan.kind)
         return result.strip()
+    except LLMUnavailableError as e:
+        raise LLMUnavailableError(f"Scene assembly failed: {str(e)}")
     except Exception as e:
         raise LLMError(f"Scene assembly failed: {str(e)}")
 
 
-def assemble_scene_sync(
+async def _single(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def stream_assembly(plan: AssemblyPlan) -> AsyncIterator[str]:
+    """The assembled prompt of a plan, yielded as the LLM generates it.
+
+    A plan without LLM messages is yielded as a single chunk.
+    """
+    if plan.messages is None:
+        return _single(plan.draft)
+    return plan.client.stream_complete(messages=plan.messages, kind=plan.kind)
+
+
+async def assemble_scene(
     scene_data: SceneData,
     db: Session,
-    preset_name: Optional[str] = None
+    preset_name: Optional[str] = None,
+    assembler: Optional[str] = None,
+    polish: bool = False
 ) -> str:
-    """Synchronous version of assemble_scene."""
-    import asyncio
-
-    # Check if there's already a running event loop
-    try:
-        loop = asyncio.get_running_loop()
-        # If we're already in an async context, we need to run in a new thread
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(
-                asyncio.run,
-                assemble_scene(scene_data, db, preset_name)
-            )
-            return future.result()
-    except RuntimeError:
-        # No running event loop, we can use asyncio.run directly
-        return asyncio.run(assemble_scene(scene_data, db, preset_name))
+    """Assemble a scene into the final prompt."""
+    return await run_assembly(plan_assembly(scene_data, db, preset_name, assembler, polish))
@@ -0,0 +1,78 @@
+# backend/services/scene_refs.py
+"""Which scenes reference which assets, and marking their prompts stale on edits."""
+from typing import Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Asset, AssetType, Scene, SceneAssetRef
+from services.asset_catalog import fold_name
+from services.prompt_engine import DEFAULT_STYLE_NAME, parse_scene_text
+
+# Scene fields that feed into the generated prompt
+SCENE_PROMPT_INPUTS = ("action_text", "shot_type_id", "style_id", "lighting_id")
+
+
+def sync_scene_refs(db: Session, scene: Scene):
+    """Replace the scene's reference rows with the tags in its action text."""
+    db.flush()  # The scene needs an ID
+    db.query(SceneAssetRef).filter(SceneAssetRef.scene_id == scene.id).delete(synchronize_session=False)
+    seen = set()
+    for ref in parse_scene_text(scene.action_text or ""):
+        key = (fold_name(ref["asset"]), fold_name(ref["variant"]) if ref["variant"] else "")
+        if key not in seen:
+            seen.add(key)
+            db.add(SceneAssetRef(scene_id=scene.id, asset_name=key[0], variant_name=key[1]))
+
+
+def rebuild_scene_refs(db: Session) -> int:
+    """Index every scene, e.g. for a database created before the table existed."""
+    scenes = db.query(Scene).all()
+    for scene in scenes:
+        sync_scene_refs(db, scene)
+    db.commit()
+    return len(scenes)
+
+
+def _mark_stale(db: Session, condition, project_id: Optional[int]) -> int:
+    query = db.query(Scene).filter(condition, Scene.generated_prompt.isnot(None), Scene.is_stale == False)
+    if project_id is not None:
+        query = query.filter(Scene.project_id == project_id)
+    return query.update({Scene.is_stale: True}, synchronize_session=False)
+
+
+def mark_asset_dependents_stale(
+    db: Session,
+    asset: Asset,
+    names: Optional[Iterable[str]] = None,
+    previous_project_id: Optional[int] = None
+) -> int:
+    """Mark scenes using the asset stale: by tag (under any of ``names``) or as camera/lighting/style.
+
+    Global assets can be used by every project. ``previous_project_id`` is
+    the project the asset was just moved out of; its scenes are marked too.
+    Returns the number of scenes marked.
+    """
+    folded = {fold_name(name) for name in (names or [asset.name])}
+    condition = (
+        Scene.id.in_(select(SceneAssetRef.scene_id).where(SceneAssetRef.asset_name.in_(folded)))
+        | (Scene.shot_type_id == asset.id)
+        | (Scene.lighting_id == asset.id)
+        | (Scene.style_id == asset.id)
+    )
+    if asset.type == AssetType.STYLE and asset.is_global and asset.name == DEFAULT_STYLE_NAME:
+        # Scenes without a style are generated with the default one
+        condition = condition | Scene.style_id.is_(None)
+    if asset.is_global:
+        return _mark_stale(db, condition, None)
+    marked = _mark_stale(db, condition, asset.project_id)
+    if previous_project_id is not None and previous_project_id != asset.project_id:
+        marked += _mark_stale(db, condition, previous_project_id)
+    return marked
+
+
+def mark_variant_dependents_stale(db: Session, asset: Asset, variant_names: Iterable[str]) -> int:
+    """Mark scenes tagging [ASSET:Variant] stale for any of ``variant_names``."""
+    refs = select(SceneAssetRef.scene_id).where(
+        SceneAssetRef.asset_name == fold_name(asset.name),
+        SceneAssetRef.variant_name.in_({fold_name(name) for name in variant_names})
+    )
+    return _mark_stale(db, Scene.id.in_(refs), None if asset.is_global else asset.project_id)
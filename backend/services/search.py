@@ -0,0 +1,111 @@
+# backend/services/search.py
+"""Ranked full-text search over the FTS5 indexes (see models/search_index.py)."""
+import html
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from models import AssetType
+
+SEARCH_KINDS = ("asset", "variant", "scene")
+
+# Snippet markers that can't occur in stored text; swapped for <mark> after escaping
+_OPEN, _CLOSE = "\x02", "\x03"
+_TOKEN = re.compile(r"\w+")
+
+# Per kind: FROM clause, selected columns and scope filter. bm25 weights
+# follow the FTS column order; names count most, then core layers.
+_QUERIES = {
+    "asset": (
+        "assets_fts JOIN assets AS a ON a.id = assets_fts.rowid",
+        "'asset' AS kind, a.id AS id, a.name AS title, a.type AS asset_type, NULL AS asset_id, "
+        "a.project_id AS project_id, "
+        "snippet(assets_fts, -1, :open, :close, '…', 16) AS snippet, "
+        "bm25(assets_fts, 10.0, 4.0, 2.0, 1.0) AS score",
+        "assets_fts MATCH :query",
+        "(a.project_id = :project_id OR a.is_global = 1)",
+    ),
+    "variant": (
+        "variants_fts JOIN variants AS v ON v.id = variants_fts.rowid JOIN assets AS a ON a.id = v.asset_id",
+        "'variant' AS kind, v.id AS id, a.name || ':' || v.name AS title, a.type AS asset_type, "
+        "a.id AS asset_id, a.project_id AS project_id, "
+        "snippet(variants_fts, -1, :open, :close, '…', 16) AS snippet, "
+        "bm25(variants_fts, 10.0, 4.0, 2.0, 1.0) AS score",
+        "variants_fts MATCH :query",
+        "(a.project_id = :project_id OR a.is_global = 1)",
+    ),
+    "scene": (
+        "scenes_fts JOIN scenes AS s ON s.id = scenes_fts.rowid",
+        "'scene' AS kind, s.id AS id, s.name AS title, NULL AS asset_type, NULL AS asset_id, "
+        "s.project_id AS project_id, "
+        "snippet(scenes_fts, -1, :open, :close, '…', 16) AS snippet, "
+        "bm25(scenes_fts, 5.0, 2.0, 1.0) AS score",
+        "scenes_fts MATCH :query",
+        "s.project_id = :project_id",
+    ),
+}
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """FTS5 MATCH expression for free text: all words, the last one as a prefix.
+
+    Each word is quoted, so user input can't inject FTS syntax.
+    """
+    words = _TOKEN.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a snippet and turn the match markers into <mark> tags."""
+    escaped = html.escape(snippet or "", quote=False)
+    return escaped.replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def search(
+    db: Session,
+    query: str,
+    project_id: Optional[int] = None,
+    kinds: Sequence[str] = SEARCH_KINDS,
+    limit: int = 20,
+    offset: int = 0
+) -> Tuple[List[Dict], int]:
+    """Best matches first across the requested kinds, plus the total match count.
+
+    With a project, assets and variants are limited to the project's and the
+    global ones, and scenes to the project's.
+    """
+    match = build_match_query(query)
+    if not match or not kinds:
+        return [], 0
+
+    branches, counts = [], []
+    for kind in dict.fromkeys(kinds):
+        source, columns, condition, scope = _QUERIES[kind]
+        where = f"{condition} AND {scope}" if project_id is not None else condition
+        branches.append(f"SELECT {columns} FROM {source} WHERE {where}")
+        counts.append(f"SELECT count(*) FROM {source} WHERE {where}")
+
+    params = {"query": match, "project_id": project_id, "open": _OPEN, "close": _CLOSE}
+    rows = db.execute(
+        text(" UNION ALL ".join(branches) + " ORDER BY score, kind, id LIMIT :limit OFFSET :offset"),
+        {**params, "limit": limit, "offset": offset}
+    ).mappings().all()
+    total = db.execute(text("SELECT " + " + ".join(f"({count})" for count in counts)), params).scalar()
+
+    return [
+        {
+            "kind": row["kind"],
+            "id": row["id"],
+            "title": row["title"],
+            "asset_type": AssetType[row["asset_type"]] if row["asset_type"] else None,
+            "asset_id": row["asset_id"],
+            "project_id": row["project_id"],
+            "snippet": highlight(row["snippet"]),
+            "score": -row["score"],
+        }
+        for row in rows
+    ], total
@@ -0,0 +1,463 @@
+# backend/services/similarity.py
+"""Near-duplicate detection over asset and variant prompts.
+
+Each prompt (its core, standard and detail layers) becomes a hashed bag of
+word unigrams and bigrams, weighted TF-IDF at query time and compared by
+cosine similarity. Everything is NumPy over CSR-style arrays:
+
+- ``similar``: exact cosine of one prompt against every other, in one
+  vectorized pass.
+- ``duplicates``: MinHash signatures, banded LSH to find candidate pairs,
+  then exact cosine to confirm them and union-find to group the clusters.
+  With 12 bands of 8 rows, pairs above ~0.8 Jaccard overlap (about 0.9
+  cosine) are found with high probability while unrelated prompts almost
+  never become candidates. Lower thresholds would lose most pairs, so below
+  LSH_MIN_THRESHOLD the pairs come from an exact prefix-filtered join.
+
+An index covers a project's assets and variants plus the global ones. It is
+built on first use and then updated incrementally by services.project_index,
+like the tag index. At most SIMILARITY_INDEX_CACHE_PROJECTS are kept.
+Queries run on a read-only snapshot, so the lock is only held to take it.
+"""
+import copy
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from models import Asset, Variant
+from services.project_index import AssetWrite, ProjectIndexCache, VariantWrite
+
+SIMILARITY_INDEX_CACHE_PROJECTS = int(os.getenv("SIMILARITY_INDEX_CACHE_PROJECTS", "4"))
+
+DIMENSIONS = 1 << 20
+BANDS, ROWS = 12, 8
+LSH_MIN_THRESHOLD = 0.9
+SIGNATURE_SIZE = BANDS * ROWS
+# Buckets larger than this (e.g. many identical prompts) pair every member
+# with the first one instead of with each other; clustering still joins them
+MAX_BUCKET_PAIRS = 64
+
+KINDS = ("asset", "variant")
+_WORD = re.compile(r"\w+")
+
+_rng = np.random.default_rng(20240611)
+# Odd multipliers for multiply-add hashing modulo 2**32
+_HASH_A = (_rng.integers(1, 1 << 31, SIGNATURE_SIZE, dtype=np.uint32) << np.uint32(1)) | np.uint32(1)
+_HASH_B = _rng.integers(0, 1 << 32, SIGNATURE_SIZE, dtype=np.uint32)
+
+
+def prompt_text(layers: Dict[str, str]) -> str:
+    return " ".join(value for value in layers.values() if value)
+
+
+def _features(text: str) -> List[int]:
+    words = _WORD.findall(text.casefold())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # crc32 rather than hash(): str hashes are salted per process
+    return [zlib.crc32(gram.encode()) & (DIMENSIONS - 1) for gram in grams]
+
+
+def vectorize(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR arrays (indptr, sorted unique feature indices, log-scaled term counts)."""
+    rows, features = [], []
+    for row, text in enumerate(texts):
+        grams = _features(text)
+        rows.extend([row] * len(grams))
+        features.extend(grams)
+
+    keys = np.asarray(rows, dtype=np.int64) * DIMENSIONS + np.asarray(features, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    indices = (keys % DIMENSIONS).astype(np.int32)
+    indptr = np.searchsorted(keys // DIMENSIONS, np.arange(len(texts) + 1)).astype(np.int64)
+    return indptr, indices, (1.0 + np.log(counts)).astype(np.float32)
+
+
+def minhash(indptr: np.ndarray, indices: np.ndarray, chunk: int = 1 << 16) -> np.ndarray:
+    """MinHash signature (rows x SIGNATURE_SIZE) of each row's features; rows must be non-empty."""
+    count = len(indptr) - 1
+    signatures = np.empty((count, SIGNATURE_SIZE), dtype=np.uint32)
+    start_row = 0
+    while start_row < count:
+        # Whole rows per chunk, bounding the (features x signature) temporary
+        end_row = max(int(np.searchsorted(indptr, indptr[start_row] + chunk, side="right")) - 1, start_row + 1)
+        start, end = indptr[start_row], indptr[end_row]
+        hashed = indices[start:end].astype(np.uint32)[:, None] * _HASH_A + _HASH_B
+        signatures[start_row:end_row] = np.minimum.reduceat(hashed, indptr[start_row:end_row] - start, axis=0)
+        start_row = end_row
+    return signatures
+
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + length) for each pair."""
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+class SimilarityIndex:
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        self.asset_names: Dict[int, str] = {}
+        self.asset_global: Dict[int, bool] = {}
+        self.variant_names: Dict[int, Tuple[int, str]] = {}  # variant ID -> (asset ID, name)
+        self._rows: Dict[Tuple[str, int], int] = {}
+        self._kind = np.empty(0, dtype=np.int8)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.empty(0, dtype=np.int32)
+        self._tf = np.empty(0, dtype=np.float32)
+        self._signatures = np.empty((0, SIGNATURE_SIZE), dtype=np.uint32)
+        self._df = np.zeros(DIMENSIONS, dtype=np.int32)
+        self._weights: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._snapshot: Optional["SimilarityIndex"] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def covers(self, project_id: Optional[int], is_global: bool) -> bool:
+        return is_global or project_id == self.project_id
+
+    def has_asset(self, asset_id: int) -> bool:
+        return asset_id in self.asset_names
+
+    # Writes. Apart from _alive and _df, arrays are replaced rather than
+    # modified in place, which lets snapshots share them.
+
+    def add_many(self, kinds: List[str], ids: List[int], texts: List[str]):
+        """Append prompts in bulk; existing rows for the same (kind, ID) are replaced."""
+        self._snapshot = None
+        for kind, item_id in zip(kinds, ids):
+            self._drop_row(kind, item_id)
+        indptr, indices, tf = vectorize(texts)
+        keep = np.diff(indptr) > 0  # Empty prompts have nothing to compare
+        if not keep.all():
+            lengths = np.diff(indptr)[keep]
+            indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            kinds = [kind for kind, k in zip(kinds, keep) if k]
+            ids = [item_id for item_id, k in zip(ids, keep) if k]
+        if not ids:
+            return
+
+        first = len(self._ids)
+        self._kind = np.concatenate([self._kind, np.array([KINDS.index(k) for k in kinds], dtype=np.int8)])
+        self._ids = np.concatenate([self._ids, np.array(ids, dtype=np.int64)])
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        self._indptr = np.concatenate([self._indptr, indptr[1:] + self._indptr[-1]])
+        self._indices = np.concatenate([self._indices, indices])
+        self._tf = np.concatenate([self._tf, tf])
+        self._signatures = np.concatenate([self._signatures, minhash(indptr, indices)])
+        np.add.at(self._df, indices, 1)
+        for offset, (kind, item_id) in enumerate(zip(kinds, ids)):
+            self._rows[(kind, item_id)] = first + offset
+        self._weights = None
+
+    def _drop_row(self, kind: str, item_id: int):
+        row = self._rows.pop((kind, item_id), None)
+        if row is None:
+            return
+        self._alive[row] = False
+        np.subtract.at(self._df, self._indices[self._indptr[row]:self._indptr[row + 1]], 1)
+        self._weights = None
+        if (~self._alive).sum() > max(len(self._rows), 1024):
+            self._compact()
+
+    def _compact(self):
+        rows = np.flatnonzero(self._alive)
+        lengths = np.diff(self._indptr)[rows]
+        starts = self._indptr[rows]
+        gather = _ranges(starts, lengths)
+        self._indices, self._tf = self._indices[gather], self._tf[gather]
+        self._indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self._kind, self._ids = self._kind[rows], self._ids[rows]
+        self._signatures = self._signatures[rows]
+        self._alive = np.ones(len(rows), dtype=bool)
+        self._rows = {(KINDS[k], int(i)): row for row, (k, i) in enumerate(zip(self._kind, self._ids))}
+
+    def put_asset(self, asset_id: int, name: str, is_global: bool, text: str):
+        self._snapshot = None
+        self.asset_names[asset_id] = name
+        self.asset_global[asset_id] = is_global
+        self.add_many(["asset"], [asset_id], [text])
+
+    def drop_asset(self, asset_id: int):
+        self._snapshot = None
+        for variant_id, (owner, _) in list(self.variant_names.items()):
+            if owner == asset_id:
+                self.drop_variant(variant_id)
+        self.asset_names.pop(asset_id, None)
+        self.asset_global.pop(asset_id, None)
+        self._drop_row("asset", asset_id)
+
+    def put_variant(self, variant_id: int, asset_id: int, name: str, text: str):
+        self._snapshot = None
+        if asset_id not in self.asset_names:
+            self.drop_variant(variant_id)
+            return
+        self.variant_names[variant_id] = (asset_id, name)
+        self.add_many(["variant"], [variant_id], [text])
+
+    def drop_variant(self, variant_id: int):
+        self._snapshot = None
+        self.variant_names.pop(variant_id, None)
+        self._drop_row("variant", variant_id)
+
+    def write_asset(self, asset: AssetWrite):
+        self.put_asset(asset.id, asset.name, asset.is_global, prompt_text(asset.layers))
+
+    def write_variant(self, variant: VariantWrite):
+        self.put_variant(variant.id, variant.asset_id, variant.name, prompt_text(variant.layers))
+
+    # Queries
+
+    def snapshot(self) -> "SimilarityIndex":
+        """Read-only copy to query without holding the lock; reused until the next write."""
+        if self._snapshot is None:
+            self._tfidf()
+            view = copy.copy(self)
+            view.asset_names = dict(self.asset_names)
+            view.asset_global = dict(self.asset_global)
+            view.variant_names = dict(self.variant_names)
+            view._rows = dict(self._rows)
+            view._alive = self._alive.copy()
+            self._snapshot = view
+        return self._snapshot
+
+    def _tfidf(self) -> Tuple[np.ndarray, np.ndarray]:
+        """TF-IDF weights per stored feature and the L2 norm of each row."""
+        if self._weights is None:
+            n = max(len(self._rows), 1)
+            idf = (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+            weights = self._tf * idf[self._indices]
+            norms = np.sqrt(np.add.reduceat(weights * weights, self._indptr[:-1])) if len(weights) else weights
+            self._weights = (weights, norms)
+        return self._weights
+
+    def label(self, kind: str, item_id: int) -> Dict:
+        if kind == "asset":
+            return {"kind": kind, "id": item_id, "name": self.asset_names.get(item_id, ""), "asset_id": None}
+        asset_id, name = self.variant_names.get(item_id, (None, ""))
+        return {"kind": kind, "id": item_id, "name": f"{self.asset_names.get(asset_id, '')}:{name}",
+                "asset_id": asset_id}
+
+    def similar(self, kind: str, item_id: int, limit: int = 10, min_score: float = 0.0) -> List[Dict]:
+        """Most similar prompts of the same kind, best first."""
+        row = self._rows.get((kind, item_id))
+        if row is None:
+            return []
+        weights, norms = self._tfidf()
+        start, end = self._indptr[row], self._indptr[row + 1]
+        query = np.zeros(DIMENSIONS, dtype=np.float32)
+        query[self._indices[start:end]] = weights[start:end]
+        scores = np.add.reduceat(weights * query[self._indices], self._indptr[:-1]) / (norms * norms[row])
+
+        candidates = self._alive & (self._kind == KINDS.index(kind)) & (scores >= max(min_score, 1e-9))
+        candidates[row] = False
+        rows = np.flatnonzero(candidates)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-scores[rows], limit - 1)[:limit]]
+        rows = rows[np.lexsort((self._ids[rows], -scores[rows]))]
+        return [
+            {**self.label(kind, int(self._ids[r])), "score": round(float(scores[r]), 4)}
+            for r in rows
+        ]
+
+    def _candidate_pairs(self, rows: np.ndarray) -> np.ndarray:
+        """LSH candidate pairs (indices into ``rows``), deduplicated."""
+        pairs = []
+        for band in range(BANDS):
+            block = np.ascontiguousarray(self._signatures[rows, band * ROWS:(band + 1) * ROWS])
+            keys = block.view(np.dtype((np.void, block.dtype.itemsize * ROWS))).ravel()
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+            starts = np.concatenate([[0], boundaries])
+            sizes = np.diff(np.concatenate([starts, [len(order)]]))
+            for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+                members = order[start:start + size]
+                if size > MAX_BUCKET_PAIRS:
+                    pairs.append(np.column_stack([np.full(size - 1, members[0]), members[1:]]))
+                else:
+                    i, j = np.triu_indices(size, k=1)
+                    pairs.append(np.column_stack([members[i], members[j]]))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        pairs = np.sort(np.concatenate(pairs), axis=1)
+        return np.unique(pairs, axis=0)
+
+    def _exact_pairs(self, rows: np.ndarray, threshold: float,
+                     chunk: int = 1 << 21) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All pairs of ``rows`` with cosine >= ``threshold``, as (left rows, right rows, scores).
+
+        Exact prefix filtering: each row's features are ordered most common
+        first, and a prefix holding less than ``threshold`` of the row's norm
+        is skipped. If a row's remaining features miss another row, their
+        cosine is at most the skipped norm (Cauchy-Schwarz), so every pair
+        above the threshold is found from both sides and is looked up from
+        its lower row only. The dot product over the looked-up features plus
+        the skipped norm bounds the cosine, and only pairs within that bound
+        are scored.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        if len(rows) < 2:
+            return empty, empty, np.empty(0)
+        weights, norms = self._tfidf()
+        lengths = np.diff(self._indptr)[rows]
+        position = _ranges(self._indptr[rows], lengths)
+        member = np.repeat(np.arange(len(rows)), lengths)
+        features = self._indices[position]
+        unit = weights[position].astype(np.float64) / norms[rows][member]
+        order = np.lexsort((features, -self._df[features], member))
+        member, features, unit = member[order], features[order], unit[order]
+
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        squares = np.cumsum(unit * unit)
+        within_row = squares - np.repeat(squares[starts] - unit[starts] ** 2, lengths)
+        probed = within_row >= threshold * threshold - 1e-6  # Rounding errs towards probing
+        skipped_norm = np.sqrt(np.bincount(member[~probed], weights=unit[~probed] ** 2, minlength=len(rows)))
+
+        by_feature = np.argsort(features, kind="stable")
+        sorted_features = features[by_feature]
+        probe_member, probe_unit = member[probed], unit[probed]
+        lo = np.searchsorted(sorted_features, features[probed], side="left")
+        counts = np.searchsorted(sorted_features, features[probed], side="right") - lo
+        ends = np.cumsum(counts)
+        found = []
+        start = 0
+        while start < len(counts):
+            # Whole rows per chunk, so each pair's partial dot product is complete
+            stop = int(np.searchsorted(ends, ends[start] - counts[start] + chunk, side="right"))
+            if stop < len(counts):
+                stop = int(np.searchsorted(probe_member, probe_member[stop], side="left"))
+            if stop <= start:
+                stop = int(np.searchsorted(probe_member, probe_member[start], side="right"))
+            matches = by_feature[_ranges(lo[start:stop], counts[start:stop])]
+            left = np.repeat(probe_member[start:stop], counts[start:stop])
+            right = member[matches]
+            dots = np.repeat(probe_unit[start:stop], counts[start:stop]) * unit[matches]
+            lower = left < right
+            keys, inverse = np.unique(left[lower] * len(rows) + right[lower], return_inverse=True)
+            bound = skipped_norm[keys // len(rows)] + np.bincount(inverse, weights=dots[lower])
+            keys = keys[bound >= threshold - 1e-6]
+            left, right = rows[keys // len(rows)], rows[keys % len(rows)]
+            scores = self._pair_scores(left, right)
+            confirmed = scores >= threshold
+            found.append((left[confirmed], right[confirmed], scores[confirmed]))
+            start = stop
+        if not found:
+            return empty, empty, np.empty(0)
+        return tuple(np.concatenate(parts) for parts in zip(*found))
+
+    def _pair_scores(self, left: np.ndarray, right: np.ndarray, batch: int = 1 << 16) -> np.ndarray:
+        """Exact cosine for row pairs, via a sorted (row, feature) key lookup."""
+        weights, norms = self._tfidf()
+        row_of = np.repeat(np.arange(len(self._indptr) - 1), np.diff(self._indptr))
+        keys = row_of.astype(np.int64) * DIMENSIONS + self._indices  # Sorted: rows ascending, features sorted
+        dots = np.empty(len(left))
+        for start in range(0, len(left), batch):
+            # Batches bound the (pair x feature) temporaries
+            batch_left, batch_right = left[start:start + batch], right[start:start + batch]
+            lengths = np.diff(self._indptr)[batch_left]
+            pair = np.repeat(np.arange(len(batch_left)), lengths)
+            position = _ranges(self._indptr[batch_left], lengths)
+            wanted = batch_right[pair].astype(np.int64) * DIMENSIONS + self._indices[position]
+            found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            hit = keys[found] == wanted
+            dots[start:start + batch] = np.bincount(
+                pair[hit], weights=weights[position[hit]] * weights[found[hit]], minlength=len(batch_left)
+            )
+        return dots / (norms[left] * norms[right])
+
+    def duplicates(self, kind: str, threshold: float = 0.9) -> List[Dict]:
+        """Clusters of near-identical prompts of one kind, largest first."""
+        rows = np.flatnonzero(self._alive & (self._kind == KINDS.index(kind)))
+        if threshold >= LSH_MIN_THRESHOLD:
+            pairs = self._candidate_pairs(rows)
+            left, right = rows[pairs[:, 0]], rows[pairs[:, 1]]
+            scores = self._pair_scores(left, right)
+        else:
+            left, right, scores = self._exact_pairs(rows, threshold)
+        confirmed = scores >= threshold
+
+        edges = list(zip(left[confirmed].tolist(), right[confirmed].tolist(), scores[confirmed].tolist()))
+
+        parent: Dict[int, int] = {}
+
+        def find(x: int) -> int:
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b, _ in edges:
+            parent[find(b)] = find(a)
+        clusters: Dict[int, List[int]] = {}
+        for row in parent:
+            clusters.setdefault(find(row), []).append(row)
+        # A cluster's score is its weakest confirmed link
+        lowest: Dict[int, float] = {}
+        for a, _, score in edges:
+            root = find(a)
+            lowest[root] = min(lowest.get(root, 1.0), score)
+
+        report = [
+            {
+                "kind": kind,
+                "score": round(min(lowest[root], 1.0), 4),
+                "members": [self.label(kind, int(self._ids[r])) for r in sorted(members, key=self._ids.__getitem__)],
+            }
+            for root, members in clusters.items()
+        ]
+        report.sort(key=lambda c: (-len(c["members"]), -c["score"], c["members"][0]["id"]))
+        return report
+
+
+def build_similarity_index(db: Session, project_id: int) -> SimilarityIndex:
+    index = SimilarityIndex(project_id)
+    in_scope = (Asset.project_id == project_id) | (Asset.is_global == True)
+    kinds, ids, texts = [], [], []
+    for row in db.query(
+        Asset.id, Asset.name, Asset.is_global, Asset.layer_core, Asset.layer_standard, Asset.layer_detail
+    ).filter(in_scope):
+        index.asset_names[row.id] = row.name
+        index.asset_global[row.id] = row.is_global
+        kinds.append("asset")
+        ids.append(row.id)
+        texts.append(" ".join(filter(None, (row.layer_core, row.layer_standard, row.layer_detail))))
+    for row in db.query(
+        Variant.id, Variant.asset_id, Variant.name, Variant.layer_core, Variant.layer_standard, Variant.layer_detail
+    ).join(Asset, Variant.asset_id == Asset.id).filter(in_scope):
+        index.variant_names[row.id] = (row.asset_id, row.name)
+        kinds.append("variant")
+        ids.append(row.id)
+        texts.append(" ".join(filter(None, (row.layer_core, row.layer_standard, row.layer_detail))))
+    index.add_many(kinds, ids, texts)
+    return index
+
+
+_cache = ProjectIndexCache(build_similarity_index, SIMILARITY_INDEX_CACHE_PROJECTS)
+
+
+def get_similarity_index(db: Session, project_id: int) -> SimilarityIndex:
+    return _cache.get(db, project_id)
+
+
+def find_similar(db: Session, project_id: int, kind: str, item_id: int,
+                 limit: int = 10, min_score: float = 0.0) -> List[Dict]:
+    index = get_similarity_index(db, project_id)
+    with _cache.lock:
+        index = index.snapshot()
+    return index.similar(kind, item_id, limit, min_score)
+
+
+def find_duplicates(db: Session, project_id: int, kind: str, threshold: float = 0.9) -> List[Dict]:
+    index = get_similarity_index(db, project_id)
+    with _cache.lock:
+        index = index.snapshot()
+    return index.duplicates(kind, threshold)
+
+
+def clear_similarity_indexes():
+    _cache.clear()
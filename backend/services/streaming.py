@@ -0,0 +1,153 @@
+# backend/services/streaming.py
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi.responses import StreamingResponse
+
+LAYER_FIELDS = ("core", "standard", "detail")
+
+
+def format_sse(event: str, data) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep nginx from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def _normalize_layers(value) -> Dict[str, str]:
+    if not isinstance(value, dict):
+        return {field: "" for field in LAYER_FIELDS}
+    return {field: value.get(field, "") for field in LAYER_FIELDS}
+
+
+class LayeredStreamParser:
+    """Incremental parser for the layered JSON object returned by enrichment.
+
+    Feed it completion deltas as they arrive; every top-level field of
+    interest is returned as soon as its value is syntactically complete,
+    long before the closing brace of the object has been generated.
+    Anything before the first ``{`` (e.g. a markdown fence) is ignored.
+    """
+
+    FIELDS = LAYER_FIELDS + ("outfit_suggestion",)
+
+    def __init__(self):
+        self.text: List[str] = []
+        self.fields: Dict[str, object] = {}
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_value = False
+        self._key: Optional[str] = None
+        self._token: List[str] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        """Consume a chunk and return the (field, value) pairs it completed."""
+        self.text.append(chunk)
+        completed: List[Tuple[str, object]] = []
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            self._consume(char, completed)
+        return completed
+
+    def _consume(self, char: str, completed: List[Tuple[str, object]]):
+        top_level = self._depth == 1
+
+        if self._in_string:
+            self._token.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if top_level:
+                    self._finish_token(completed)
+            return
+
+        if char == '"':
+            self._in_string = True
+            if top_level:
+                self._token = []
+            self._token.append(char)
+        elif char in "{[":
+            if top_level:
+                self._token = []
+            self._token.append(char)
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth >= 1:
+                self._token.append(char)
+                if self._depth == 1:
+                    self._finish_token(completed)
+            else:
+                self._finish_token(completed)
+                self._finished = True
+        elif not top_level:
+            self._token.append(char)
+        elif char == ":":
+            self._expect_value = True
+            self._token = []
+        elif char == ",":
+            self._finish_token(completed)
+        elif not char.isspace():
+            # Bare literal (number, true, false, null)
+            self._token.append(char)
+
+    def _finish_token(self, completed: List[Tuple[str, object]]):
+        raw = "".join(self._token).strip()
+        self._token = []
+        if not raw:
+            return
+
+        if not self._expect_value:
+            try:
+                self._key = json.loads(raw)
+            except json.JSONDecodeError:
+                self._key = None
+            return
+
+        self._expect_value = False
+        key, self._key = self._key, None
+        if key not in self.FIELDS:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+
+        if key == "outfit_suggestion":
+            value = _normalize_layers(value) if value else None
+        elif not isinstance(value, str):
+            value = "" if value is None else str(value)
+        self.fields[key] = value
+        completed.append((key, value))
+
+    @property
+    def full_text(self) -> str:
+        return "".join(self.text)
+
+    def result(self) -> Dict:
+        """Final layered result, shaped like parse_layered_response()."""
+        result = {field: self.fields.get(field, "") for field in LAYER_FIELDS}
+        if self.fields.get("outfit_suggestion"):
+            result["outfit_suggestion"] = self.fields["outfit_suggestion"]
+        return result
@@ -0,0 +1,159 @@
+# backend/services/tag_index.py
+"""Prefix index over the [NAME] and [NAME:VARIANT] tags usable in a project.
+
+Each index covers a project's assets plus the global ones and keeps its
+tags in a sorted array, so a prefix lookup is a bisect followed by a
+short scan. Indexes are built on first use and kept in step with writes
+by services.project_index. At most TAG_INDEX_CACHE_PROJECTS indexes are
+kept, least recently used evicted first.
+"""
+import os
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from models import Asset, AssetType, Variant
+from services.project_index import AssetWrite, ProjectIndexCache, VariantWrite
+
+TAG_INDEX_CACHE_PROJECTS = int(os.getenv("TAG_INDEX_CACHE_PROJECTS", "32"))
+
+# (folded tag, asset ID, variant ID or 0)
+IndexKey = Tuple[str, int, int]
+
+
+def tag_key(text: str) -> str:
+    return text.casefold()
+
+
+@dataclass
+class _IndexedAsset:
+    name: str
+    type: AssetType
+    is_global: bool
+
+
+class TagIndex:
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        self._keys: List[IndexKey] = []
+        self._assets: Dict[int, _IndexedAsset] = {}
+        self._variants: Dict[int, Tuple[int, str]] = {}  # variant ID -> (asset ID, name)
+        self._variants_by_asset: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def covers(self, project_id: Optional[int], is_global: bool) -> bool:
+        return is_global or project_id == self.project_id
+
+    def has_asset(self, asset_id: int) -> bool:
+        return asset_id in self._assets
+
+    def _insert(self, key: IndexKey):
+        insort(self._keys, key)
+
+    def _remove(self, key: IndexKey):
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def _variant_key(self, variant_id: int) -> IndexKey:
+        asset_id, name = self._variants[variant_id]
+        return (tag_key(f"{self._assets[asset_id].name}:{name}"), asset_id, variant_id)
+
+    def put_asset(self, asset_id: int, name: str, asset_type: AssetType, is_global: bool):
+        """Add an asset, or update it (and re-key its variant tags on a rename)."""
+        current = self._assets.get(asset_id)
+        variant_ids = self._variants_by_asset.get(asset_id, set())
+        if current:
+            if current.name == name:
+                current.type, current.is_global = asset_type, is_global
+                return
+            self._remove((tag_key(current.name), asset_id, 0))
+            for variant_id in variant_ids:
+                self._remove(self._variant_key(variant_id))
+        self._assets[asset_id] = _IndexedAsset(name, asset_type, is_global)
+        self._insert((tag_key(name), asset_id, 0))
+        for variant_id in variant_ids:
+            self._insert(self._variant_key(variant_id))
+
+    def drop_asset(self, asset_id: int):
+        current = self._assets.get(asset_id)
+        if not current:
+            return
+        for variant_id in list(self._variants_by_asset.get(asset_id, ())):
+            self.drop_variant(variant_id)
+        self._remove((tag_key(current.name), asset_id, 0))
+        del self._assets[asset_id]
+        self._variants_by_asset.pop(asset_id, None)
+
+    def put_variant(self, variant_id: int, asset_id: int, name: str):
+        self.drop_variant(variant_id)
+        if asset_id not in self._assets:
+            return
+        self._variants[variant_id] = (asset_id, name)
+        self._variants_by_asset.setdefault(asset_id, set()).add(variant_id)
+        self._insert(self._variant_key(variant_id))
+
+    def drop_variant(self, variant_id: int):
+        if variant_id not in self._variants:
+            return
+        self._remove(self._variant_key(variant_id))
+        asset_id, _ = self._variants.pop(variant_id)
+        self._variants_by_asset[asset_id].discard(variant_id)
+
+    def write_asset(self, asset: AssetWrite):
+        self.put_asset(asset.id, asset.name, asset.type, asset.is_global)
+
+    def write_variant(self, variant: VariantWrite):
+        self.put_variant(variant.id, variant.asset_id, variant.name)
+
+    def search(self, prefix: str, limit: int = 20) -> List[Dict]:
+        """Tags starting with ``prefix`` (case-insensitive), in tag order."""
+        folded = tag_key(prefix)
+        results = []
+        for key in self._keys[bisect_left(self._keys, (folded,)):]:
+            if len(results) >= limit or not key[0].startswith(folded):
+                break
+            _, asset_id, variant_id = key
+            asset = self._assets[asset_id]
+            variant_name = self._variants[variant_id][1] if variant_id else None
+            results.append({
+                "tag": f"{asset.name}:{variant_name}" if variant_id else asset.name,
+                "asset_id": asset_id,
+                "asset_name": asset.name,
+                "variant_id": variant_id or None,
+                "variant_name": variant_name,
+                "type": asset.type,
+                "is_global": asset.is_global,
+            })
+        return results
+
+
+def build_tag_index(db: Session, project_id: int) -> TagIndex:
+    index = TagIndex(project_id)
+    in_scope = (Asset.project_id == project_id) | (Asset.is_global == True)
+    for row in db.query(Asset.id, Asset.name, Asset.type, Asset.is_global).filter(in_scope):
+        index.put_asset(row.id, row.name, row.type, row.is_global)
+    for row in db.query(Variant.id, Variant.asset_id, Variant.name).join(
+        Asset, Variant.asset_id == Asset.id
+    ).filter(in_scope):
+        index.put_variant(row.id, row.asset_id, row.name)
+    return index
+
+
+_cache = ProjectIndexCache(build_tag_index, TAG_INDEX_CACHE_PROJECTS)
+
+
+def get_tag_index(db: Session, project_id: int) -> TagIndex:
+    return _cache.get(db, project_id)
+
+
+def search_tags(db: Session, project_id: int, prefix: str, limit: int = 20) -> List[Dict]:
+    index = get_tag_index(db, project_id)
+    with _cache.lock:
+        return index.search(prefix, limit)
+
+
+def clear_tag_indexes():
+    _cache.clear()
@@ -0,0 +1,142 @@
+# backend/services/template_assembler.py
+"""Deterministic scene assembly from asset layers, without an LLM call."""
+import re
+from typing import Dict, List, Optional, Tuple
+from config.image_models import ALL_LAYERS
+from services.prompt_engine import TAG_PATTERN
+from services.scene_assembler import SceneData
+
+# Phrase priority when max_words forces truncation: every section keeps its
+# core before any section gets standard, and detail goes first.
+LAYER_PRIORITY = {layer: index for index, layer in enumerate(ALL_LAYERS)}
+
+Phrase = Tuple[int, str]  # (layer priority, text)
+
+
+def _merged_layers(asset: Dict, skip_base_core: bool = False) -> List[Phrase]:
+    """Base and variant layers interleaved per layer (base core, variant core, ...)."""
+    phrases = []
+    for layer in ALL_LAYERS:
+        base = (asset.get("base") or {}).get(layer)
+        if base and not (skip_base_core and layer == "core"):
+            phrases.append((LAYER_PRIORITY[layer], base))
+        variant = (asset.get("variant") or {}).get(layer)
+        if variant:
+            phrases.append((LAYER_PRIORITY[layer], variant))
+    return phrases
+
+
+def _section_layers(layers: Dict[str, str]) -> List[Phrase]:
+    return [(LAYER_PRIORITY[layer], layers[layer]) for layer in ALL_LAYERS if layers.get(layer)]
+
+
+def expand_tags(direction: str, assets: Dict[str, Dict]) -> str:
+    """Replace [NAME] / [NAME:Variant] with the asset's core description."""
+    def replace(match: re.Match) -> str:
+        tag = match.group(1) if match.group(2) is None else f"{match.group(1)}:{match.group(2)}"
+        asset = assets.get(tag)
+        if not asset:
+            return match.group(1)
+        return (asset.get("base") or {}).get("core") or asset["name"]
+
+    return " ".join(TAG_PATTERN.sub(replace, direction).split())
+
+
+def build_sections(scene_data: SceneData, preset: dict) -> List[List[Phrase]]:
+    """Phrases for each entry of the preset's structure, in order."""
+    structure = preset.get("structure", [])
+    action = expand_tags(scene_data.direction, scene_data.assets)
+    has_action = "action" in structure
+
+    subjects: List[Phrase] = []
+    if action and not has_action:
+        subjects.append((LAYER_PRIORITY["core"], action))
+    settings: List[Phrase] = []
+    for asset in scene_data.assets.values():
+        # The expanded action text already carries the base core
+        phrases = _merged_layers(asset, skip_base_core=bool(action))
+        (settings if asset["type"] == "location" else subjects).extend(phrases)
+
+    sources = {
+        "composition": _section_layers(scene_data.camera),
+        "subject": subjects,
+        "action": [(LAYER_PRIORITY["core"], action)] if action else [],
+        "setting": settings,
+        "atmosphere": _section_layers(scene_data.lighting),
+        "style": _section_layers(scene_data.style),
+    }
+    sections = []
+    for name in structure:
+        if name in sources:
+            sections.append(sources[name])
+        elif isinstance(preset.get(name), str) and preset[name]:
+            # Static preset text such as "quality": boilerplate, so it is cut first
+            sections.append([(LAYER_PRIORITY["detail"], preset[name])])
+    return sections
+
+
+def _fit(sections: List[List[Phrase]], max_words: int) -> List[List[str]]:
+    """Keep the highest-priority phrases within max_words.
+
+    Priorities are filled in order. When a priority doesn't fit whole, its
+    longest phrases are cut to a common length so that every phrase keeps
+    its first words: a long direction is shortened instead of dropped, and
+    short phrases of the same priority survive with it.
+    """
+    by_priority: Dict[int, List[Tuple[int, int, List[str]]]] = {}
+    for section_index, phrases in enumerate(sections):
+        for phrase_index, (priority, text) in enumerate(phrases):
+            by_priority.setdefault(priority, []).append((section_index, phrase_index, text.split()))
+
+    kept: Dict[Tuple[int, int], str] = {}
+    budget = max_words
+    for priority in sorted(by_priority):
+        phrases = by_priority[priority]
+        # Largest per-phrase length that fits the remaining budget
+        low, high = 0, max(len(words) for _, _, words in phrases)
+        while low < high:
+            cap = (low + high + 1) // 2
+            if sum(min(len(words), cap) for _, _, words in phrases) <= budget:
+                low = cap
+            else:
+                high = cap - 1
+        for section_index, phrase_index, words in phrases:
+            if words[:low]:
+                kept[(section_index, phrase_index)] = " ".join(words[:low]).rstrip(",;:")
+                budget -= len(words[:low])
+    return [
+        [kept[(section_index, phrase_index)] for phrase_index in range(len(phrases))
+         if (section_index, phrase_index) in kept]
+        for section_index, phrases in enumerate(sections)
+    ]
+
+
+def _dedupe(phrases: List[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for phrase in phrases:
+        key = phrase.strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(phrase.strip())
+    return unique
+
+
+def assemble_from_template(scene_data: SceneData, preset: dict, max_words: Optional[int] = None) -> str:
+    """Assemble the final prompt by joining layers in the preset's section order.
+
+    Keyword presets get a comma-separated list, narrative presets one
+    sentence per section.
+    """
+    max_words = max_words or preset.get("max_words", 300)
+    sections = _fit(build_sections(scene_data, preset), max_words)
+
+    if preset.get("style") == "keywords":
+        return ", ".join(_dedupe([phrase for section in sections for phrase in section]))
+
+    sentences = []
+    for section in sections:
+        text = ", ".join(_dedupe(section)).rstrip(".")
+        if text:
+            sentences.append(text[0].upper() + text[1:] + ".")
+    return " ".join(sentences)
@@ -1,4 +1,5 @@
 # backend/tests/test_api.py
+import json
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -7,6 +8,7 @@ from sqlalchemy.pool import StaticPool
 from main import app
 from database import get_db
 from models import Base
+from services.llm_client import invalidate_llm_clients
 
 
 # Use a single test engine/connection for all tests
@@ -35,6 +37,7 @@ def test_db():
     # Drop all tables after test
     Base.metadata.drop_all(bind=TEST_ENGINE)
     app.dependency_overrides.clear()
+    invalidate_llm_clients()
 
 
 @pytest.fixture
@@ -242,3 +245,632 @@ def test_delete_asset(client):
     # Verify deleted
     get_response = client.get(f"/api/assets/{asset_id}")
     assert get_response.status_code == 404
+
+
+# LLM Tests
+def test_enrich_endpoint(client, monkeypatch):
+    from tests.test_llm_client import _mock_llm_client
+    import routers.llm
+
+    monkeypatch.setattr(
+        routers.llm, "get_llm_client",
+        lambda db: _mock_llm_client('{"core": "a", "standard": "b", "detail": "c"}')
+    )
+
+    response = client.post("/api/llm/enrich", json={
+        "asset_type": "character",
+        "messages": [{"role": "user", "content": "Anna"}]
+    })
+    assert response.status_code == 200
+    assert response.json()["layers"] == {"core": "a", "standard": "b", "detail": "c"}
+
+
+def test_llm_client_cached_until_settings_change(client, test_db):
+    from sqlalchemy.orm import Session
+    from models import Settings
+    from services.llm_client import _client_registry, get_llm_client
+
+    client.put("/api/settings", json={
+        "llm_provider": "openai",
+        "llm_api_key": "sk-first-key",
+        "llm_model": "gpt-4o",
+        "llm_base_url": "https://api.openai.com/v1"
+    })
+
+    with Session(test_db) as db:
+        first = get_llm_client(db)
+        # Direct writes bypass the registry; the cached client stays active
+        db.query(Settings).filter(Settings.key == "llm_model").update({"value": "gpt-4o-mini"})
+        db.commit()
+        assert get_llm_client(db) is first
+
+    client.put("/api/settings", json={"llm_model": "gpt-4o-mini"})
+    with Session(test_db) as db:
+        second = get_llm_client(db)
+    assert second is not first
+    assert second.model == "gpt-4o-mini"
+
+    # Clients for earlier settings are not kept around
+    client.put("/api/settings", json={"llm_model": "gpt-4o"})
+    with Session(test_db) as db:
+        third = get_llm_client(db)
+    assert third is not first and third.model == "gpt-4o"
+    assert list(_client_registry.values()) == [third]
+
+    # Unchanged settings reuse the client
+    client.put("/api/settings", json={"llm_model": "gpt-4o"})
+    with Session(test_db) as db:
+        assert get_llm_client(db) is third
+
+
+def test_llm_cache_opt_in(client, test_db):
+    from sqlalchemy.orm import Session
+    from services.llm_client import get_llm_client
+
+    response = client.put("/api/settings", json={"llm_provider": "openai", "llm_api_key": "sk-some-key"})
+    assert response.json()["llm_cache_enabled"] is False
+    with Session(test_db) as db:
+        assert get_llm_client(db).cache is None
+
+    response = client.put("/api/settings", json={"llm_cache_enabled": True})
+    assert response.json()["llm_cache_enabled"] is True
+    with Session(test_db) as db:
+        assert get_llm_client(db).cache is not None
+
+    assert client.get("/api/llm/cache").json() == {"entries": 0, "size_bytes": 0, "hits": 0}
+
+
+def test_enrich_stream_endpoint(client, monkeypatch):
+    from tests.test_llm_client import _mock_llm_client
+    import routers.llm
+
+    content = '{"core": "a", "standard": "b", "detail": "c", "outfit_suggestion": {"core": "coat"}}'
+    monkeypatch.setattr(routers.llm, "get_llm_client", lambda db: _mock_llm_client(content))
+
+    response = client.post("/api/llm/enrich/stream", json={
+        "asset_type": "character",
+        "messages": [{"role": "user", "content": "Anna"}]
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    names = [event[0].removeprefix("event: ") for event in events]
+    assert names == ["layer", "layer", "layer", "layer", "done"]
+    done = json.loads(events[-1][1].removeprefix("data: "))
+    assert done["layers"] == {"core": "a", "standard": "b", "detail": "c"}
+    assert done["outfit_suggestion"]["core"] == "coat"
+
+
+# Scene generation Tests
+def _create_scene(client, action_text="[ANNA] walks"):
+    project_id = client.post("/api/projects", json={"name": "Test Project"}).json()["id"]
+    client.post("/api/assets", json={
+        "name": "Anna",
+        "type": "character",
+        "base_prompt": '{"core": "young woman", "standard": "", "detail": ""}',
+        "project_id": project_id
+    })
+    return client.post("/api/scenes", json={
+        "name": "Scene 1",
+        "project_id": project_id,
+        "action_text": action_text
+    }).json()
+
+
+def test_generate_stream_persists_on_completion(client, monkeypatch):
+    from tests.test_llm_client import _mock_llm_client
+    import services.scene_assembler
+
+    monkeypatch.setattr(
+        services.scene_assembler, "get_llm_client",
+        lambda db: _mock_llm_client("  A young woman walks through the market.  ")
+    )
+    scene = _create_scene(client)
+
+    response = client.post(f"/api/scenes/{scene['id']}/generate/stream", json={})
+    assert response.status_code == 200
+
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    tokens = [json.loads(data.removeprefix("data: "))["text"] for name, data in events if name == "event: token"]
+    assert len(tokens) > 1
+    assert events[-1][0] == "event: done"
+    assert json.loads(events[-1][1].removeprefix("data: "))["generated_prompt"] == \
+        "A young woman walks through the market."
+
+    stored = client.get(f"/api/scenes/{scene['id']}").json()
+    assert stored["generated_prompt"] == "A young woman walks through the market."
+
+
+def test_generate_stream_abort_persists_nothing(client, test_db, monkeypatch):
+    import asyncio
+    from sqlalchemy.orm import Session
+    from tests.test_llm_client import _mock_llm_client
+    from routers.scenes import generate_prompt_stream
+    from schemas import GeneratePromptRequest
+    import services.scene_assembler
+
+    monkeypatch.setattr(
+        services.scene_assembler, "get_llm_client",
+        lambda db: _mock_llm_client("A young woman walks through the market.")
+    )
+    scene = _create_scene(client)
+
+    async def read_one_token_then_disconnect():
+        with Session(test_db) as db:
+            response = await generate_prompt_stream(scene["id"], GeneratePromptRequest(), db)
+            first = await response.body_iterator.__anext__()
+            await response.body_iterator.aclose()
+            return first
+
+    assert asyncio.run(read_one_token_then_disconnect()).startswith("event: token")
+    assert client.get(f"/api/scenes/{scene['id']}").json()["generated_prompt"] is None
+
+
+def test_generate_with_template_assembler(client, monkeypatch):
+    from tests.test_llm_client import _mock_llm_client
+    import services.scene_assembler
+
+    def no_llm(db):
+        raise AssertionError("template assembly must not call the LLM")
+
+    monkeypatch.setattr(services.scene_assembler, "get_llm_client", no_llm)
+    scene = _create_scene(client, "[ANNA] walks")
+
+    response = client.post(f"/api/scenes/{scene['id']}/generate", json={"assembler": "template"})
+    assert response.status_code == 200
+    assert response.json()["generated_prompt"] == "Young woman walks."
+
+    calls = []
+    monkeypatch.setattr(
+        services.scene_assembler, "get_llm_client",
+        lambda db: _mock_llm_client("A young woman strolls.", calls)
+    )
+    response = client.post(
+        f"/api/scenes/{scene['id']}/generate", json={"assembler": "template", "polish": True}
+    )
+    assert response.json()["generated_prompt"] == "A young woman strolls."
+    assert json.loads(calls[0].content)["messages"][1]["content"] == "Young woman walks."
+
+
+def test_generate_maps_llm_errors(client, monkeypatch):
+    import services.scene_assembler
+    from services.llm_client import LLMUnavailableError
+
+    scene = _create_scene(client, "[ANNA] walks")
+    # No API key is configured
+    response = client.post(f"/api/scenes/{scene['id']}/generate", json={})
+    assert response.status_code == 502
+    assert "API key" in response.json()["detail"]
+
+    class OpenCircuit:
+        provider, model = "openrouter", "test-model"
+
+        async def complete(self, messages, max_tokens=None, use_cache=True, kind="completion"):
+            raise LLMUnavailableError("circuit open")
+
+    monkeypatch.setattr(services.scene_assembler, "get_llm_client", lambda db: OpenCircuit())
+    response = client.post(f"/api/scenes/{scene['id']}/generate", json={})
+    assert response.status_code == 503
+    assert client.get(f"/api/scenes/{scene['id']}").json()["generated_prompt"] is None
+
+
+def test_generate_reuses_prompt_for_unchanged_inputs(client, monkeypatch):
+    from tests.test_llm_client import _mock_llm_client
+    import services.scene_assembler
+
+    calls = []
+    llm = _mock_llm_client("A young woman walks.", calls)
+    monkeypatch.setattr(services.scene_assembler, "get_llm_client", lambda db: llm)
+    scene = _create_scene(client, "[ANNA] walks")
+    url = f"/api/scenes/{scene['id']}/generate"
+
+    assert client.post(url, json={}).json()["reused"] is False
+    response = client.post(url, json={}).json()
+    assert (response["reused"], response["generated_prompt"], len(calls)) == (True, "A young woman walks.", 1)
+
+    assert client.post(url, json={"force": True}).json()["reused"] is False
+    assert len(calls) == 2
+
+    # A different model, then a different scene input, invalidate the fingerprint
+    llm.model = "other-model"
+    assert client.post(url, json={}).json()["reused"] is False
+    client.put(f"/api/scenes/{scene['id']}", json={"action_text": "[ANNA] runs"})
+    assert client.post(url, json={}).json()["reused"] is False
+    assert len(calls) == 4
+
+    response = client.post(f"{url}/stream", json={})
+    name, data = response.text.strip().split("\n", 1)
+    assert name == "event: done"
+    assert json.loads(data.removeprefix("data: "))["reused"] is True
+    assert len(calls) == 4
+
+
+def test_generate_all_bounded_parallelism(client, monkeypatch):
+    import asyncio
+    import threading
+    import services.batch_generation
+    from services.llm_client import LLMError
+
+    running = []
+    peak = [0]
+
+    async def fake_run(plan):
+        running.append(plan)
+        peak[0] = max(peak[0], len(running))
+        await asyncio.sleep(0.01)
+        running.remove(plan)
+        if "Broken" in plan.draft:
+            raise LLMError("upstream failed")
+        return f"prompt {plan.draft}"
+
+    # The template draft of a scene without tags is its action text
+    monkeypatch.setattr(services.batch_generation, "run_assembly", fake_run)
+
+    # The in-memory test database is one connection; keep the worker threads off it at the same time
+    lock = threading.Lock()
+    for name in ("_prepare_scene", "_save_scene"):
+        def serialized(*args, _step=getattr(services.batch_generation, name)):
+            with lock:
+                return _step(*args)
+        monkeypatch.setattr(services.batch_generation, name, serialized)
+
+    project_id = client.post("/api/projects", json={"name": "Batch"}).json()["id"]
+    names = ["S1", "S2", "S3", "S4", "Broken"]
+    scenes = [
+        client.post("/api/scenes", json={"name": name, "project_id": project_id, "action_text": name}).json()
+        for name in names
+    ]
+
+    response = client.post(
+        f"/api/projects/{project_id}/generate-all", json={"concurrency": 2, "assembler": "template"}
+    )
+    assert response.status_code == 200
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    payloads = [(name.removeprefix("event: "), json.loads(data.removeprefix("data: "))) for name, data in events]
+
+    assert payloads[0] == ("start", {"total": 5, "scene_ids": [s["id"] for s in scenes]})
+    assert [p["completed"] for name, p in payloads if name == "scene"] == [1, 2, 3, 4, 5]
+    assert payloads[-1] == ("done", {"total": 5, "succeeded": 4, "failed": 1})
+    assert peak[0] == 2
+
+    stored = {s["name"]: s["generated_prompt"] for s in client.get(f"/api/scenes?project_id={project_id}").json()}
+    assert stored == {"S1": "prompt S1.", "S2": "prompt S2.", "S3": "prompt S3.", "S4": "prompt S4.", "Broken": None}
+
+    # Only the scene that failed is still missing a prompt
+    response = client.post(
+        f"/api/projects/{project_id}/generate-all", json={"stale_only": True, "assembler": "template"}
+    )
+    assert '"total": 1' in response.text
+    assert client.post(
+        f"/api/projects/{project_id}/generate-all", json={"concurrency": 32}
+    ).status_code == 422
+
+    assert client.post("/api/projects/999/generate-all", json={}).status_code == 404
+
+
+def test_submit_job(client):
+    response = client.post("/api/jobs", json={
+        "kind": "enrich",
+        "payload": {"asset_type": "character", "messages": [{"role": "user", "content": "Anna"}]}
+    })
+    assert response.status_code == 202
+    job = response.json()
+    # No worker pool without the app lifespan: the job waits for the next start
+    assert job["status"] == "pending"
+    assert client.get(f"/api/jobs/{job['id']}").json()["status"] == "pending"
+    assert [j["id"] for j in client.get("/api/jobs?status=pending").json()["jobs"]] == [job["id"]]
+
+    invalid = client.post("/api/jobs", json={"kind": "generate_scene", "payload": {}})
+    assert invalid.status_code == 422
+    assert client.get("/api/jobs/999").status_code == 404
+
+
+def test_moving_assets_and_variants_marks_both_sides_stale(client):
+    scene = _create_scene(client, "[ANNA:Party] waves")
+    other = _create_scene(client, "[ANNA:Party] sleeps")
+    project_id, other_project_id = scene["project_id"], other["project_id"]
+    anna = client.get(f"/api/assets?project_id={project_id}").json()[0]
+    party = client.post("/api/variants", json={
+        "asset_id": anna["id"], "name": "Party", "delta_prompt": '{"core": "red dress"}'
+    }).json()
+    bob = client.post("/api/assets", json={
+        "name": "Bob", "type": "character", "base_prompt": '{"core": "old man"}', "project_id": project_id
+    }).json()
+
+    def generate(scene_id):
+        assert client.post(f"/api/scenes/{scene_id}/generate", json={"assembler": "template"}).status_code == 200
+
+    def stale_ids(pid):
+        return [s["id"] for s in client.get(f"/api/projects/{pid}/stale-scenes").json()]
+
+    # Re-parenting the variant: [ANNA:Party] no longer resolves to it
+    generate(scene["id"])
+    assert client.put(f"/api/variants/{party['id']}", json={"asset_id": bob["id"]}).status_code == 200
+    assert stale_ids(project_id) == [scene["id"]]
+    assert client.put(f"/api/variants/{party['id']}", json={"asset_id": 999999}).status_code == 404
+
+    # Moving the asset: scenes in both projects are affected
+    generate(scene["id"])
+    generate(other["id"])
+    assert client.put(f"/api/assets/{anna['id']}", json={"project_id": other_project_id}).status_code == 200
+    assert stale_ids(project_id) == [scene["id"]]
+    assert stale_ids(other_project_id) == [other["id"]]
+
+
+def test_delete_scene_removes_its_asset_refs(client):
+    from models import SceneAssetRef
+
+    scene = _create_scene(client, "[ANNA] meets [BOB]")
+    with sessionmaker(bind=TEST_ENGINE)() as db:
+        assert db.query(SceneAssetRef).filter(SceneAssetRef.scene_id == scene["id"]).count() == 2
+
+    assert client.delete(f"/api/scenes/{scene['id']}").status_code == 204
+    with sessionmaker(bind=TEST_ENGINE)() as db:
+        assert db.query(SceneAssetRef).filter(SceneAssetRef.scene_id == scene["id"]).count() == 0
+
+
+def test_stale_scenes_follow_asset_and_variant_edits(client):
+    scene = _create_scene(client, "[ANNA:Party] waves")
+    project_id = scene["project_id"]
+    other = _create_scene(client, "[ANNA] sleeps")  # Same name, different project
+    anna = client.get(f"/api/assets?project_id={project_id}").json()[0]
+    party = client.post("/api/variants", json={
+        "asset_id": anna["id"], "name": "Party", "delta_prompt": '{"core": "red dress"}'
+    }).json()
+    winter = client.post("/api/variants", json={
+        "asset_id": anna["id"], "name": "Winter", "delta_prompt": '{"core": "wool coat"}'
+    }).json()
+
+    def generate(scene_id):
+        response = client.post(f"/api/scenes/{scene_id}/generate", json={"assembler": "template"})
+        assert response.json()["is_stale"] is False
+
+    def stale_ids(pid=project_id):
+        return [s["id"] for s in client.get(f"/api/projects/{pid}/stale-scenes").json()]
+
+    generate(scene["id"])
+    generate(other["id"])
+    assert stale_ids() == []
+
+    # A variant the scene does not use
+    client.put(f"/api/variants/{winter['id']}", json={"delta_prompt": '{"core": "fur coat"}'})
+    assert stale_ids() == []
+
+    client.put(f"/api/variants/{party['id']}", json={"delta_prompt": '{"core": "blue dress"}'})
+    assert stale_ids() == [scene["id"]]
+    assert stale_ids(other["project_id"]) == []
+
+    generate(scene["id"])
+    client.put(f"/api/assets/{anna['id']}", json={"base_prompt": '{"core": "older woman"}'})
+    assert stale_ids() == [scene["id"]]
+
+    # Editing the scene's own inputs
+    generate(scene["id"])
+    client.put(f"/api/scenes/{scene['id']}", json={"action_text": "[ANNA:Party] runs"})
+    assert stale_ids() == [scene["id"]]
+
+    # Renaming the tag away from ANNA means asset edits no longer touch it
+    generate(scene["id"])
+    client.put(f"/api/scenes/{scene['id']}", json={"action_text": "[BOB] runs"})
+    generate(scene["id"])
+    client.put(f"/api/assets/{anna['id']}", json={"base_prompt": '{"core": "young woman"}'})
+    assert stale_ids() == []
+
+
+def test_tag_autocomplete_tracks_writes(client):
+    project_id = client.post("/api/projects", json={"name": "Tags"}).json()["id"]
+    other_id = client.post("/api/projects", json={"name": "Other"}).json()["id"]
+
+    def create_asset(name, **extra):
+        return client.post("/api/assets", json={"name": name, "type": "character", **extra}).json()
+
+    anna = create_asset("Anna", project_id=project_id)
+    create_asset("Anatol", project_id=other_id)
+    create_asset("Anamorphic", type="style", is_global=True)
+
+    def tags(prefix):
+        response = client.get(f"/api/projects/{project_id}/tags", params={"prefix": prefix})
+        assert response.status_code == 200
+        return [t["tag"] for t in response.json()]
+
+    assert tags("an") == ["Anamorphic", "Anna"]  # Builds the index
+    party = client.post("/api/variants", json={"asset_id": anna["id"], "name": "Party"}).json()
+    client.post("/api/variants", json={"asset_id": anna["id"], "name": "Winter"})
+    assert tags("[ANNA:") == ["Anna:Party", "Anna:Winter"]
+
+    # Renames re-key the asset's variant tags
+    client.put(f"/api/assets/{anna['id']}", json={"name": "Hanna"})
+    client.put(f"/api/variants/{party['id']}", json={"name": "Gala"})
+    assert tags("an") == ["Anamorphic"]
+    assert tags("hanna") == ["Hanna", "Hanna:Gala", "Hanna:Winter"]
+
+    client.delete(f"/api/variants/{party['id']}")
+    assert tags("h") == ["Hanna", "Hanna:Winter"]
+    assert client.get("/api/projects/9999/tags").status_code == 404
+
+
+def test_search_ranks_and_highlights(client):
+    project_id = client.post("/api/projects", json={"name": "Search"}).json()["id"]
+    other_id = client.post("/api/projects", json={"name": "Other"}).json()["id"]
+    sailor = client.post("/api/assets", json={
+        "name": "Sailor", "type": "character", "project_id": project_id,
+        "base_prompt": '{"core": "old sailor", "detail": "holds a brass compass <engraved>"}'
+    }).json()
+    client.post("/api/assets", json={
+        "name": "Compass", "type": "object", "project_id": project_id,
+        "base_prompt": '{"core": "brass compass"}'
+    })
+    client.post("/api/assets", json={
+        "name": "Elsewhere", "type": "object", "project_id": other_id,
+        "base_prompt": '{"core": "brass compass"}'
+    })
+    client.post("/api/variants", json={
+        "asset_id": sailor["id"], "name": "Storm", "delta_prompt": '{"core": "soaked brass buttons"}'
+    })
+    scene = client.post("/api/scenes", json={
+        "name": "Harbor", "project_id": project_id, "action_text": "[SAILOR] checks the compass"
+    }).json()
+
+    def search(q, **params):
+        response = client.get("/api/search", params={"q": q, "project_id": project_id, **params})
+        assert response.status_code == 200
+        return response.json()
+
+    body = search("brass comp")
+    assert body["total"] == 2
+    # The name match outranks the detail-layer match
+    assert [r["title"] for r in body["results"]] == ["Compass", "Sailor"]
+    assert body["results"][1]["snippet"] == "holds a <mark>brass</mark> <mark>compass</mark> &lt;engraved&gt;"
+
+    assert [r["kind"] for r in search("brass")["results"]].count("variant") == 1
+    assert [r["id"] for r in search("compass", kind="scene")["results"]] == [scene["id"]]
+    page = search("brass", limit=1, offset=1)
+    assert (len(page["results"]), page["total"]) == (1, 3)
+
+    # Updates and deletes reach the index through the triggers
+    client.put(f"/api/scenes/{scene['id']}", json={"action_text": "[SAILOR] sleeps"})
+    assert search("compass", kind="scene")["total"] == 0
+    assert client.get("/api/search", params={"q": "compass"}).json()["total"] == 3
+    assert search("\"*)")["total"] == 0
+
+
+def test_payload_report_close_up(client):
+    scene = _create_scene(client, "[ANNA:Party] smiles at [GARDEN]")
+    project_id = scene["project_id"]
+    anna = client.get(f"/api/assets?project_id={project_id}").json()[0]
+    assert client.post("/api/variants", json={
+        "asset_id": anna["id"],
+        "name": "Party",
+        "delta_prompt": '{"core": "red silk dress", "standard": "pearl necklace", "detail": "lace trim"}'
+    }).status_code == 201
+    client.post("/api/assets", json={
+        "name": "Garden",
+        "type": "location",
+        "base_prompt": '{"core": "rose garden", "standard": "stone fountain, hedges", "detail": "moss on the steps"}',
+        "project_id": project_id
+    })
+    camera = client.post("/api/assets", json={
+        "name": "Close-Up",
+        "type": "shot_type",
+        "base_prompt": '{"core": "close-up on the face", "standard": "shallow depth of field", "detail": "85mm"}',
+        "project_id": project_id
+    }).json()
+    client.put(f"/api/scenes/{scene['id']}", json={"shot_type_id": camera["id"]})
+
+    response = client.get(f"/api/scenes/{scene['id']}/payload-report")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["shot_class"] == "close_up"
+    assert report["selected_tokens"] < report["full_tokens"]
+    assert report["saved_tokens"] == report["full_tokens"] - report["selected_tokens"]
+
+
+def test_llm_metrics_endpoint(client):
+    from datetime import datetime
+    from services.llm_client import LLMRequestLog, add_request_log
+
+    add_request_log(LLMRequestLog(
+        timestamp=datetime.now().isoformat(), provider="openrouter", model="metrics-model",
+        input_tokens=10, output_tokens=20, generation_time_ms=400, status="success", kind="assembly"
+    ))
+
+    response = client.get("/api/llm/metrics?window=1h")
+    assert response.status_code == 200
+    groups = [g for g in response.json()["groups"] if g["model"] == "metrics-model"]
+    assert groups[0]["kind"] == "assembly"
+    assert groups[0]["p95_ms"] == 400
+
+    assert client.get("/api/llm/metrics?window=1y").status_code == 422
+
+
+def test_prometheus_metrics_endpoint(client):
+    client.post("/api/projects", json={"name": "Metrics Project"})
+    client.get("/api/projects/99999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'continuum_http_requests_total{method="POST",route="/api/projects",status="201"}' in body
+    assert 'route="/api/projects/{project_id}",status="404"' in body
+    assert "continuum_http_request_duration_seconds_bucket" in body
+    assert "continuum_http_requests_in_flight" in body
+
+
+def test_similar_and_duplicate_prompts_track_writes(client):
+    project_id = client.post("/api/projects", json={"name": "Dedup"}).json()["id"]
+    other_id = client.post("/api/projects", json={"name": "Other"}).json()["id"]
+
+    def create_asset(name, prompt, **extra):
+        return client.post("/api/assets", json={
+            "name": name, "type": "character", "project_id": project_id,
+            "base_prompt": f'{{"core": "{prompt}"}}', **extra
+        }).json()
+
+    anna = create_asset("Anna", "tall woman, red wool coat, short dark hair, round glasses")
+    anna_copy = create_asset("Anna 2", "tall woman, red wool coat, short dark hair, round glasses")
+    berta = create_asset("Berta", "tall woman, green dress, long blond hair")
+    create_asset("Elsewhere", "tall woman, red wool coat, short dark hair, round glasses", project_id=other_id)
+
+    def similar(asset_id, **params):
+        response = client.get(f"/api/assets/{asset_id}/similar", params=params)
+        assert response.status_code == 200
+        return [(item["id"], item["score"]) for item in response.json()]
+
+    results = similar(anna["id"])  # Builds the index
+    assert [item_id for item_id, _ in results] == [anna_copy["id"], berta["id"]]
+    assert results[0][1] == 1.0
+
+    report = client.get(f"/api/projects/{project_id}/duplicates").json()
+    assert report["kind"] == "asset" and report["threshold"] == 0.9
+    assert [[m["name"] for m in c["members"]] for c in report["clusters"]] == [["Anna", "Anna 2"]]
+
+    # Edits apply to the cached index
+    client.put(f"/api/assets/{anna_copy['id']}", json={"base_prompt": '{"core": "wooden ship in a storm"}'})
+    assert [item_id for item_id, _ in similar(anna["id"])] == [berta["id"]]
+    assert client.get(f"/api/projects/{project_id}/duplicates").json()["clusters"] == []
+
+    party = client.post("/api/variants", json={
+        "asset_id": anna["id"], "name": "Party", "delta_prompt": '{"core": "sequin dress, gold earrings"}'
+    }).json()
+    gala = client.post("/api/variants", json={
+        "asset_id": berta["id"], "name": "Gala", "delta_prompt": '{"core": "sequin dress, gold earrings"}'
+    }).json()
+    response = client.get(f"/api/variants/{party['id']}/similar")
+    assert [(item["id"], item["name"]) for item in response.json()] == [(gala["id"], "Berta:Gala")]
+    report = client.get(f"/api/projects/{project_id}/duplicates", params={"kind": "variant"}).json()
+    assert [len(c["members"]) for c in report["clusters"]] == [2]
+
+    assert client.get("/api/assets/9999/similar").status_code == 404
+    assert client.get("/api/projects/9999/duplicates").status_code == 404
+
+
+def test_generate_holds_no_connection_during_llm_call(client, monkeypatch):
+    from tests.test_llm_client import _mock_llm_client
+    import services.scene_assembler
+
+    sessions, in_transaction = [], []
+    override_get_db = app.dependency_overrides[get_db]
+
+    def tracking_get_db():
+        for db in override_get_db():
+            sessions.append(db)
+            yield db
+
+    class Probe(list):
+        def append(self, request):
+            in_transaction.append(sessions[-1].in_transaction())
+            super().append(request)
+
+    llm = _mock_llm_client("A young woman walks.", Probe())
+    monkeypatch.setattr(services.scene_assembler, "get_llm_client", lambda db: llm)
+    app.dependency_overrides[get_db] = tracking_get_db
+    scene = _create_scene(client, "[ANNA] walks")
+    lighting = client.post("/api/assets", json={"name": "Dusk", "type": "lighting_setup"}).json()
+
+    response = client.post(f"/api/scenes/{scene['id']}/generate", json={"lighting_id": lighting["id"]})
+    assert response.status_code == 200
+    assert in_transaction == [False]
+    data = response.json()
+    assert (data["generated_prompt"], data["lighting_id"]) == ("A young woman walks.", lighting["id"])
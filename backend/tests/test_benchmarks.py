@@ -0,0 +1,67 @@
+# backend/tests/test_benchmarks.py
+from benchmarks.suite import compare, run
+
+
+def test_suite_runs_on_tiny_project():
+    results = run(scale=0.002, seed=1, iterations=1)
+
+    assert results["meta"]["size"] == {"assets": 20, "variants": 100, "scenes": 10}
+    assert set(results["benchmarks"]) == {
+        "parse_scene_text", "resolve_asset_ref", "aggregate_scene_data", "build_assembly_prompt",
+        "list_assets", "list_scenes", "get_settings", "search", "suggest_tags",
+        "similar_assets", "duplicates"
+    }
+    assert all(result["median_ms"] >= 0 for result in results["benchmarks"].values())
+
+
+def test_compare_flags_regressions():
+    meta = {"size": {"assets": 1}}
+    baseline = {"meta": meta, "benchmarks": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}}
+    current = {"meta": meta, "benchmarks": {"a": {"median_ms": 10.5}, "b": {"median_ms": 12.0}}}
+
+    assert compare(baseline, current, threshold=0.1) == ["b"]
+
+
+def test_loadtest_stage_reports_every_request():
+    import asyncio
+    import random
+    import httpx
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from benchmarks.loadtest import Workload, run_stage
+    from database import get_db
+    from main import app
+    from models import Base
+    from services.llm_client import invalidate_llm_clients
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def override_get_db():
+        with session_factory() as session:
+            yield session
+
+    async def run():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.put("/api/settings", json={"llm_provider": "mock"})
+            workload = Workload(client, random.Random(0))
+            await workload.setup(assets=6, scenes=3)
+            return workload, await run_stage(workload, editors=3, seconds=0.3, think=0)
+
+    app.dependency_overrides[get_db] = override_get_db
+    invalidate_llm_clients()
+    try:
+        workload, stats = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        invalidate_llm_clients()
+
+    assert len(workload.asset_ids) >= 6 and len(workload.scene_ids) >= 3
+    assert sum(len(s.latencies) for s in stats.values()) > 0
+    summary = stats["GET /api/assets"].summary(0.3)
+    assert summary["errors"] == 0 and summary["p50_ms"] > 0
@@ -0,0 +1,86 @@
+# backend/tests/test_completion_cache.py
+import asyncio
+import time
+import pytest
+from models import LLMCacheEntry
+from models.asset import AssetType
+from services.completion_cache import CompletionCache, completion_cache_key
+from services.llm_client import get_request_logs
+from tests.test_llm_client import _mock_llm_client
+
+
+def test_cache_key_depends_on_inputs():
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+
+    key = completion_cache_key("model-a", messages)
+
+    assert key == completion_cache_key("model-a", [dict(m) for m in messages])
+    assert key != completion_cache_key("model-b", messages)
+    assert key != completion_cache_key("model-a", messages, max_tokens=10)
+    assert key != completion_cache_key("model-a", [messages[0], {"role": "user", "content": "ho"}])
+
+
+def test_enrich_served_from_cache(session_factory):
+    calls = []
+    client = _mock_llm_client('{"core": "a", "standard": "b", "detail": "c"}', calls)
+    client.cache = CompletionCache(session_factory)
+    messages = [{"role": "user", "content": "Anna"}]
+
+    first = asyncio.run(client.enrich(AssetType.CHARACTER, messages))
+    second = asyncio.run(client.enrich(AssetType.CHARACTER, messages))
+
+    assert first == second
+    assert len(calls) == 1
+    assert get_request_logs()[-1]["cached"] is True
+    assert get_request_logs()[-1]["output_tokens"] == 0
+
+
+def test_unparseable_response_not_cached(session_factory):
+    calls = []
+    client = _mock_llm_client("not json", calls)
+    client.cache = CompletionCache(session_factory)
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            asyncio.run(client.enrich(AssetType.CHARACTER, [{"role": "user", "content": "Anna"}]))
+
+    assert len(calls) == 2
+
+
+def test_lru_eviction(session_factory):
+    cache = CompletionCache(session_factory, max_entries=2)
+
+    cache.put("a", "m", "first")
+    time.sleep(0.01)
+    cache.put("b", "m", "second")
+    time.sleep(0.01)
+    assert cache.get("a") == "first"  # "b" is now least recently used
+    time.sleep(0.01)
+    cache.put("c", "m", "third")
+
+    assert cache.get("a") == "first"
+    assert cache.get("b") is None
+    assert cache.get("c") == "third"
+
+
+def test_ttl_expiry(session_factory):
+    cache = CompletionCache(session_factory, ttl_seconds=0)
+    cache.put("a", "m", "stale")
+
+    assert cache.get("a") is None
+    with session_factory() as db:
+        assert db.query(LLMCacheEntry).count() == 0
+
+
+def test_size_limit(session_factory):
+    cache = CompletionCache(session_factory, max_bytes=10)
+
+    cache.put("a", "m", "12345")
+    time.sleep(0.01)
+    cache.put("b", "m", "67890")
+    time.sleep(0.01)
+    cache.put("c", "m", "abc")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "67890"
+    assert cache.get("c") == "abc"
@@ -0,0 +1,81 @@
+# backend/tests/test_job_queue.py
+import asyncio
+import json
+import pytest
+from models import Job, JobStatus
+from schemas import EnrichRequest, GenerateSceneJob
+from services import job_queue
+from services.job_queue import JOB_MAX_ATTEMPTS, JobQueue
+from tests.test_llm_client import _mock_llm_client
+
+LAYERED = json.dumps({"core": "young woman", "standard": "blonde", "detail": "freckles"})
+
+
+@pytest.fixture(autouse=True)
+def mock_llm(monkeypatch):
+    monkeypatch.setattr(job_queue, "get_llm_client", lambda db: _mock_llm_client(LAYERED))
+
+
+def _add_job(session_factory, kind, payload, status=JobStatus.PENDING, attempts=0) -> int:
+    with session_factory() as db:
+        job = Job(kind=kind, payload=payload.model_dump_json(), status=status, attempts=attempts)
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def _run_queue(session_factory):
+    async def run():
+        queue = JobQueue(session_factory, workers=2)
+        queue.start()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_unfinished_jobs_resume_on_start(session_factory):
+    enrich = EnrichRequest(asset_type="character", messages=[{"role": "user", "content": "Anna"}])
+    pending = _add_job(session_factory, "enrich", enrich)
+    # Was running when the process stopped
+    interrupted = _add_job(session_factory, "enrich", enrich, status=JobStatus.RUNNING, attempts=1)
+    exhausted = _add_job(
+        session_factory, "enrich", enrich, status=JobStatus.RUNNING, attempts=JOB_MAX_ATTEMPTS
+    )
+
+    _run_queue(session_factory)
+
+    with session_factory() as db:
+        for job_id, attempts in ((pending, 1), (interrupted, 2)):
+            job = db.get(Job, job_id)
+            assert job.status == JobStatus.DONE
+            assert job.attempts == attempts
+            assert json.loads(job.result)["layers"]["core"] == "young woman"
+        assert db.get(Job, exhausted).status == JobStatus.FAILED
+
+
+def test_failed_job_records_error(session_factory):
+    job_id = _add_job(session_factory, "generate_scene", GenerateSceneJob(scene_id=999))
+
+    _run_queue(session_factory)
+
+    with session_factory() as db:
+        job = db.get(Job, job_id)
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Scene not found"
+        assert job.finished_at is not None
+
+
+def test_subscribers_see_every_state_change(session_factory):
+    enrich = EnrichRequest(asset_type="character", messages=[{"role": "user", "content": "Anna"}])
+    job_id = _add_job(session_factory, "enrich", enrich)
+
+    async def run():
+        queue = JobQueue(session_factory, workers=1)
+        updates = queue.subscribe(job_id)
+        queue.start()
+        await queue.join()
+        await queue.stop()
+        return [updates.get_nowait()["status"] for _ in range(updates.qsize())]
+
+    assert asyncio.run(run()) == [JobStatus.RUNNING, JobStatus.DONE]
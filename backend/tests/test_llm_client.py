@@ -1,4 +1,5 @@
 # backend/tests/test_llm_client.py
+import json
 import pytest
 from services.llm_client import build_layered_system_prompt, parse_layered_response
 from models.asset import AssetType
@@ -30,3 +31,158 @@ def test_parse_layered_response_with_markdown():
     result = parse_layered_response(response)
 
     assert result["core"] == "a"
+
+
+def _sse_chunks(content: str, size: int = 5) -> bytes:
+    """Encode content as an OpenAI chat-completions SSE stream."""
+    events = []
+    for i in range(0, len(content), size):
+        events.append({
+            "id": "cmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "test-model",
+            "choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]
+        })
+    events.append({
+        "id": "cmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "test-model",
+        "choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 7, "total_tokens": 19}
+    })
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return body.encode()
+
+
+def _mock_llm_client(content: str, calls: list = None) -> "LLMClient":
+    """Build an LLMClient whose HTTP layer returns a canned chat completion."""
+    import httpx
+    from openai import AsyncOpenAI
+    from services.llm_client import LLMClient
+    from services.llm_resilience import ProviderGuard, ResiliencePolicy
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if calls is not None:
+            calls.append(request)
+        if json.loads(request.content).get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=_sse_chunks(content)
+            )
+        return httpx.Response(200, json={
+            "id": "cmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 7, "total_tokens": 19}
+        })
+
+    client = LLMClient(base_url="http://llm.test/v1", api_key="test", model="test-model", provider="test")
+    client.client = AsyncOpenAI(
+        base_url="http://llm.test/v1",
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    # Isolated guard without retries so tests don't share breaker state
+    client.guard = ProviderGuard(ResiliencePolicy(max_retries=0, rate_per_second=0))
+    return client
+
+
+def test_enrich_is_async():
+    """Test that enrich awaits the async SDK and parses the layered result."""
+    import asyncio
+    client = _mock_llm_client('{"core": "a", "standard": "b", "detail": "c"}')
+
+    result = asyncio.run(client.enrich(AssetType.CHARACTER, [{"role": "user", "content": "Anna"}]))
+
+    assert result == {"core": "a", "standard": "b", "detail": "c"}
+
+
+def test_unparseable_response_raises_llm_error():
+    """A response that isn't a layered JSON object is an LLMError, logged as such."""
+    import asyncio
+    from services.llm_client import LLMError, get_request_logs
+
+    for content in ('["core", "standard"]', None):
+        client = _mock_llm_client(content)
+        with pytest.raises(LLMError, match="parse"):
+            asyncio.run(client.enrich(AssetType.CHARACTER, [{"role": "user", "content": "Anna"}]))
+        assert get_request_logs()[-1]["status"] == "error"
+
+
+def test_clients_share_http_pool():
+    """Test that all LLM clients are built on one shared connection pool."""
+    from services.llm_client import LLMClient, get_http_client
+
+    first = LLMClient(base_url="http://a.test/v1", api_key="x", model="m")
+    second = LLMClient(base_url="http://b.test/v1", api_key="y", model="m")
+
+    assert first.client._client is get_http_client()
+    assert second.client._client is get_http_client()
+
+
+def test_stream_enrich_yields_deltas():
+    """Test that streaming returns the completion in pieces and logs usage."""
+    import asyncio
+    from services.llm_client import get_request_logs
+    content = '{"core": "a", "standard": "b", "detail": "c"}'
+    client = _mock_llm_client(content)
+
+    async def collect():
+        return [d async for d in client.stream_enrich(AssetType.CHARACTER, [{"role": "user", "content": "Anna"}])]
+
+    deltas = asyncio.run(collect())
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == content
+    assert get_request_logs()[-1]["output_tokens"] == 7
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    """Test that identical in-flight requests share one upstream call."""
+    import asyncio
+    from services.llm_client import get_request_logs
+    calls = []
+    client = _mock_llm_client('{"core": "a", "standard": "b", "detail": "c"}', calls)
+    messages = [{"role": "user", "content": "Anna"}]
+
+    async def burst():
+        return await asyncio.gather(
+            client.enrich(AssetType.CHARACTER, messages),
+            client.enrich(AssetType.CHARACTER, messages),
+            client.enrich(AssetType.CHARACTER, messages),
+            client.enrich(AssetType.CHARACTER, [{"role": "user", "content": "Bob"}]),
+        )
+
+    results = asyncio.run(burst())
+
+    assert results[0] == results[1] == results[2]
+    assert len(calls) == 2
+    assert sorted(log["coalesced"] for log in get_request_logs()[-2:]) == [0, 2]
+    assert client._inflight == {}
+
+
+def test_coalesced_callers_share_errors():
+    """Test that a failed upstream call fails every coalesced caller."""
+    import asyncio
+    import httpx
+    from openai import AsyncOpenAI
+    from services.llm_client import LLMError
+    client = _mock_llm_client("")
+    client.client = AsyncOpenAI(
+        base_url="http://llm.test/v1",
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    )
+
+    async def burst():
+        messages = [{"role": "user", "content": "hi"}]
+        return await asyncio.gather(client.complete(messages), client.complete(messages), return_exceptions=True)
+
+    results = asyncio.run(burst())
+
+    assert all(isinstance(result, LLMError) for result in results)
+    assert client._inflight == {}
@@ -0,0 +1,145 @@
+# backend/tests/test_llm_resilience.py
+import asyncio
+import time
+import httpx
+import openai
+import pytest
+from services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, ProviderGuard, ResiliencePolicy,
+    TokenBucket, retry_after_seconds
+)
+
+
+def _status_error(status: int, headers: dict = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    cls = openai.RateLimitError if status == 429 else openai.APIStatusError
+    return cls("error", response=response, body=None)
+
+
+def _flaky(errors: list, result="ok"):
+    """Async callable that raises the given errors in order, then succeeds."""
+    calls = []
+
+    async def fn():
+        calls.append(time.monotonic())
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return fn, calls
+
+
+def test_retry_after_header_parsing():
+    assert retry_after_seconds(_status_error(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(_status_error(429, {"retry-after-ms": "150"})) == 0.15
+    assert retry_after_seconds(_status_error(429)) is None
+
+
+def test_retries_honor_retry_after():
+    guard = ProviderGuard(ResiliencePolicy(max_retries=3, rate_per_second=0, retry_base_delay=5))
+    fn, calls = _flaky([_status_error(429, {"retry-after": "0.05"}), _status_error(503, {"retry-after": "0.05"})])
+
+    assert asyncio.run(guard.call(fn)) == "ok"
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.05
+
+
+def test_client_errors_are_not_retried():
+    guard = ProviderGuard(ResiliencePolicy(max_retries=3, rate_per_second=0))
+    fn, calls = _flaky([_status_error(400)])
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 1
+
+
+def test_retry_after_beyond_max_delay_gives_up():
+    guard = ProviderGuard(ResiliencePolicy(max_retries=3, rate_per_second=0, retry_max_delay=1))
+    fn, calls = _flaky([_status_error(429, {"retry-after": "60"})])
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 1
+
+
+def test_circuit_opens_and_fails_fast():
+    guard = ProviderGuard(ResiliencePolicy(
+        max_retries=0, rate_per_second=0, failure_threshold=2, reset_timeout=0.05
+    ))
+    fn, calls = _flaky([_status_error(500), _status_error(500)])
+
+    for _ in range(2):
+        with pytest.raises(openai.APIStatusError):
+            asyncio.run(guard.call(fn))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guard.call(fn))
+    assert len(calls) == 2
+
+    # After the reset timeout one trial call is let through and closes it
+    time.sleep(0.06)
+    assert asyncio.run(guard.call(fn)) == "ok"
+    assert guard.breaker.state == "closed"
+
+
+def test_rate_limited_errors_do_not_open_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    guard = ProviderGuard(ResiliencePolicy(max_retries=0, rate_per_second=0))
+    guard.breaker = breaker
+    fn, _ = _flaky([_status_error(429)])
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(guard.call(fn))
+    assert breaker.state == "closed"
+
+
+def test_concurrency_limit():
+    guard = ProviderGuard(ResiliencePolicy(max_concurrency=2, rate_per_second=0))
+    active = []
+    peak = []
+
+    async def fn():
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+
+    async def burst():
+        await asyncio.gather(*(guard.call(fn) for _ in range(6)))
+
+    asyncio.run(burst())
+    assert max(peak) == 2
+
+
+def test_token_bucket_spaces_out_calls():
+    bucket = TokenBucket(rate_per_second=100, capacity=1)
+
+    async def take(n):
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # First token is free, the next four need ~10ms each
+    assert asyncio.run(take(5)) >= 0.035
+
+
+def test_client_retries_rate_limited_request():
+    from tests.test_llm_client import _mock_llm_client
+    from openai import AsyncOpenAI
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}}),
+    ]
+    client = _mock_llm_client("OK")
+    inner = client.client._client._transport.handler
+
+    def handler(request):
+        return responses.pop(0) if responses else inner(request)
+
+    client.client = AsyncOpenAI(
+        base_url="http://llm.test/v1", api_key="test", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    client.guard = ProviderGuard(ResiliencePolicy(max_retries=2, rate_per_second=0))
+
+    assert asyncio.run(client.complete([{"role": "user", "content": "hi"}])) == "OK"
@@ -0,0 +1,69 @@
+# backend/tests/test_llm_telemetry.py
+from datetime import datetime, timedelta
+import pytest
+from models import LLMRequestRecord
+from services.llm_client import LLMRequestLog, add_request_log
+from services.llm_telemetry import compute_llm_metrics, flush_request_logs
+
+
+@pytest.fixture
+def db_session(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def _log(model="telemetry-model", kind="enrich", ms=1000, status="success", output=50, cached=False, age=None):
+    timestamp = datetime.now() - (age or timedelta())
+    return LLMRequestLog(
+        timestamp=timestamp.isoformat(),
+        provider="openrouter",
+        model=model,
+        input_tokens=100,
+        output_tokens=output,
+        generation_time_ms=ms,
+        status=status,
+        cached=cached,
+        kind=kind
+    )
+
+
+def test_request_logs_are_written_in_batches(db_session):
+    add_request_log(_log())
+    add_request_log(_log(kind="assembly"))
+
+    written = flush_request_logs(db_session)
+
+    assert written >= 2
+    assert db_session.query(LLMRequestRecord).filter(
+        LLMRequestRecord.model == "telemetry-model"
+    ).count() == 2
+    assert flush_request_logs(db_session) == 0
+
+
+def test_metrics_percentiles_and_throughput(db_session):
+    for ms in range(100, 1100, 100):
+        add_request_log(_log(ms=ms, output=ms // 10))
+    add_request_log(_log(ms=5000, status="error", output=0))
+    add_request_log(_log(ms=0, cached=True, output=0))
+    add_request_log(_log(ms=100, kind="test"))
+    add_request_log(_log(ms=100, age=timedelta(hours=2)))
+    flush_request_logs(db_session)
+
+    metrics = compute_llm_metrics(db_session, "1h")
+    groups = {g["kind"]: g for g in metrics["groups"] if g["model"] == "telemetry-model"}
+
+    enrich = groups["enrich"]
+    assert enrich["requests"] == 12
+    assert enrich["errors"] == 1
+    assert enrich["cached"] == 1
+    assert enrich["error_rate"] == pytest.approx(1 / 12)
+    assert enrich["p50_ms"] == 500
+    assert enrich["p95_ms"] == 1000
+    assert enrich["p99_ms"] == 1000
+    assert enrich["tokens_per_second"] == pytest.approx(100.0)
+    assert enrich["input_tokens"] == 1200
+    assert groups["test"]["requests"] == 1
+
+    day = {g["kind"]: g for g in compute_llm_metrics(db_session, "24h")["groups"] if g["model"] == "telemetry-model"}
+    assert day["enrich"]["requests"] == 13
@@ -0,0 +1,47 @@
+# backend/tests/test_metrics.py
+from sqlalchemy import create_engine, text
+from services.metrics import Counter, Gauge, Histogram, Registry, instrument_engine, DB_QUERY_LATENCY
+
+
+def test_counter_and_gauge_exposition():
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs.", ["kind"]))
+    gauge = registry.register(Gauge("queue_depth", "Depth."))
+    counter.inc(kind="enrich")
+    counter.inc(2, kind="enrich")
+    counter.inc(kind='say "hi"')
+    gauge.set(3)
+
+    output = registry.render()
+
+    assert "# TYPE jobs_total counter" in output
+    assert 'jobs_total{kind="enrich"} 3' in output
+    assert 'jobs_total{kind="say \\"hi\\""} 1' in output
+    assert "queue_depth 3" in output
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value, route="/a")
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+    assert 'latency_seconds_sum{route="/a"} 6.25' in lines
+
+
+def test_engine_instrumentation_records_queries():
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    before = "\n".join(DB_QUERY_LATENCY.render())
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    after = "\n".join(DB_QUERY_LATENCY.render())
+    assert 'operation="SELECT"' in after
+    assert after != before
@@ -0,0 +1,67 @@
+# backend/tests/test_mock_llm.py
+import asyncio
+import httpx
+import pytest
+from models.asset import AssetType
+from services.llm_client import LLMClient, LLMError
+from services.llm_resilience import ProviderGuard, ResiliencePolicy
+from services.mock_llm import MOCK_BASE_URL, MockLLMConfig, MockLLMTransport
+
+
+def _client(**config) -> LLMClient:
+    transport = MockLLMTransport(MockLLMConfig(latency_ms=0, tokens_per_second=0, seed=1, **config))
+    client = LLMClient(
+        base_url=MOCK_BASE_URL, api_key="not-needed", model="mock", provider="mock",
+        http_client=httpx.AsyncClient(transport=transport)
+    )
+    client.guard = ProviderGuard(ResiliencePolicy(max_retries=0, rate_per_second=0))
+    return client
+
+
+def test_mock_enrich_returns_layered_json():
+    client = _client()
+    result = asyncio.run(client.enrich(
+        AssetType.CHARACTER, [{"role": "user", "content": "An old sailor with a grey beard"}]
+    ))
+    assert result["core"].startswith("An old sailor")
+    assert set(result["outfit_suggestion"]) == {"core", "standard", "detail"}
+
+
+def test_mock_streams_assembly_text():
+    client = _client()
+
+    async def collect():
+        return [delta async for delta in client.stream_complete(
+            [{"role": "system", "content": "Assemble."}, {"role": "user", "content": "woman walks garden"}]
+        )]
+
+    deltas = asyncio.run(collect())
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Woman walks garden."
+
+
+def test_mock_error_injection():
+    client = _client(error_rate=1.0, error_status=500)
+    with pytest.raises(LLMError):
+        asyncio.run(client.complete([{"role": "user", "content": "hello"}]))
+
+
+def test_get_llm_client_mock_provider():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from models import Base, Settings
+    from services.llm_client import get_llm_client, invalidate_llm_clients
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([Settings(key="llm_provider", value="mock"), Settings(key="llm_api_key", value="")])
+        db.commit()
+
+        invalidate_llm_clients()
+        try:
+            client = get_llm_client(db)
+            assert client.provider == "mock"
+            assert str(client.client.base_url).startswith(MOCK_BASE_URL)
+        finally:
+            invalidate_llm_clients()
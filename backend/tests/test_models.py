@@ -216,3 +216,54 @@ def test_create_scene_with_lighting(db_session):
 
     assert scene.lighting_id == lighting.id
     assert scene.lighting.name == "Studio Lighting"
+
+
+def test_layer_columns_follow_prompt(db_session):
+    asset = Asset(
+        name="Anna",
+        type=AssetType.CHARACTER,
+        base_prompt='{"core": "young woman", "standard": "red coat", "detail": "freckles"}'
+    )
+    db_session.add(asset)
+    db_session.commit()
+    assert (asset.layer_core, asset.layer_standard, asset.layer_detail) == ("young woman", "red coat", "freckles")
+
+    # Legacy plain text lands in core
+    asset.base_prompt = "A young woman with red hair"
+    db_session.commit()
+    assert asset.layers == {"core": "A young woman with red hair", "standard": "", "detail": ""}
+
+    variant = Variant(name="Winter", delta_prompt='{"core": "wool coat"}', asset_id=asset.id)
+    db_session.add(variant)
+    db_session.commit()
+    assert variant.layers == {"core": "wool coat", "standard": "", "detail": ""}
+    variant.delta_prompt = None
+    db_session.commit()
+    assert variant.layers == {"core": "", "standard": "", "detail": ""}
+
+
+def test_layer_columns_migration(monkeypatch):
+    from sqlalchemy import text
+    import init_db
+
+    engine = create_engine("sqlite:///:memory:")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE assets (id INTEGER PRIMARY KEY, name VARCHAR, base_prompt TEXT)"))
+        conn.execute(text("CREATE TABLE variants (id INTEGER PRIMARY KEY, asset_id INTEGER, name VARCHAR, "
+                          "delta_prompt TEXT)"))
+        conn.execute(text("INSERT INTO assets VALUES (1, 'Anna', '{\"core\": \"young woman\", \"detail\": \"freckles\"}'),"
+                          " (2, 'Bob', 'old sailor')"))
+        conn.execute(text("INSERT INTO variants VALUES (1, 1, 'Winter', NULL)"))
+        conn.commit()
+    monkeypatch.setattr(init_db, "engine", engine)
+
+    init_db.run_migrations()
+    init_db.run_migrations()  # Idempotent
+
+    with engine.connect() as conn:
+        assets = conn.execute(text(
+            "SELECT layer_core, layer_standard, layer_detail FROM assets ORDER BY id"
+        )).fetchall()
+        variants = conn.execute(text("SELECT layer_core, layer_standard, layer_detail FROM variants")).fetchall()
+    assert [tuple(row) for row in assets] == [("young woman", "", "freckles"), ("old sailor", "", "")]
+    assert [tuple(row) for row in variants] == [("", "", "")]
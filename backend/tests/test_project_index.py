@@ -0,0 +1,47 @@
+# backend/tests/test_project_index.py
+from models import Asset, AssetType, Project
+from services.similarity import get_similarity_index
+from services.tag_index import get_tag_index
+
+
+def _tags(index) -> list:
+    return [t["tag"] for t in index.search("", limit=100)]
+
+
+def test_commits_reach_every_index_and_rollbacks_none(session_factory):
+    with session_factory() as db:
+        project, other = Project(name="P"), Project(name="Other")
+        db.add_all([project, other])
+        db.flush()
+        anna = Asset(name="Anna", type=AssetType.CHARACTER, project_id=project.id,
+                     base_prompt='{"core": "tall woman, red coat"}')
+        db.add(anna)
+        db.commit()
+
+        tags, similarity = get_tag_index(db, project.id), get_similarity_index(db, project.id)
+        assert _tags(tags) == ["Anna"]
+
+        db.add(Asset(name="Anton", type=AssetType.CHARACTER, project_id=project.id, base_prompt="old man"))
+        db.flush()
+        db.rollback()
+        assert _tags(tags) == ["Anna"] and len(similarity) == 1
+
+        anton = Asset(name="Anton", type=AssetType.CHARACTER, project_id=project.id,
+                      base_prompt='{"core": "tall man, red coat"}')
+        db.add(anton)
+        db.commit()
+        assert _tags(tags) == ["Anna", "Anton"]
+        assert [r["id"] for r in similarity.similar("asset", anna.id)] == [anton.id]
+
+        # Moving an asset to another project drops it from this project's indexes
+        anna.project_id = other.id
+        db.commit()
+        assert _tags(tags) == ["Anton"]
+        assert not similarity.has_asset(anna.id)
+
+        # Bulk statements bypass the flush, so the cached indexes are dropped
+        db.query(Asset).filter(Asset.id == anton.id).update({Asset.name: "Toni"})
+        db.commit()
+        assert get_tag_index(db, project.id) is not tags
+        assert get_similarity_index(db, project.id) is not similarity
+        assert _tags(get_tag_index(db, project.id)) == ["Toni"]
@@ -1,6 +1,7 @@
 # backend/tests/test_prompt_engine.py
 import pytest
-from services.prompt_engine import parse_scene_text, aggregate_scene_data
+from services.prompt_engine import parse_scene_text, aggregate_scene_data, classify_shot, resolve_asset_refs
+from config.image_models import get_layer_rules, select_layers
 from services.scene_assembler import SceneData
 
 
@@ -35,3 +36,132 @@ def test_aggregate_scene_data():
     # This test requires mocking the database
     # For now, test the structure of the output
     assert callable(aggregate_scene_data)
+
+
+def test_classify_shot():
+    assert classify_shot("Close-Up", {"core": "tight framing on the face"}, True) == "close_up"
+    assert classify_shot("Portrait", {"core": "medium close-up, shoulders"}, True) == "medium"
+    assert classify_shot("OTS", {"core": "over-the-shoulder shot"}, True) == "medium"
+    assert classify_shot("Drone", {"core": "bird's eye view"}, True) == "wide"
+    assert classify_shot("", {}, True) == "wide"
+    assert classify_shot("Close-Up", {"core": ""}, False) == "establishing"
+
+
+def test_select_layers_close_up_drops_outfit():
+    rules = get_layer_rules({})
+    assert select_layers(rules, "close_up", "character", "base") == ["core"]
+    assert select_layers(rules, "close_up", "character", "variant") == []
+    assert select_layers(rules, "wide", "character", "variant") == ["core", "standard", "detail"]
+
+    overridden = get_layer_rules({"layer_rules": {"wide": {"object": {"base": ["core"]}}}})
+    assert select_layers(overridden, "wide", "object", "base") == ["core"]
+
+
+@pytest.fixture
+def catalog():
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from models import Base, Project, Asset, Variant, Scene, AssetType
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    db = sessionmaker(bind=engine)()
+    project, other = Project(name="P"), Project(name="Other")
+    db.add_all([project, other])
+    db.flush()
+    anna = Asset(name="Anna", type=AssetType.CHARACTER, base_prompt='{"core": "young woman"}', project_id=project.id)
+    db.add_all([
+        anna,
+        Asset(name="München", type=AssetType.LOCATION, base_prompt='{"core": "old town"}', project_id=project.id),
+        Asset(name="Anna", type=AssetType.CHARACTER, base_prompt='{"core": "someone else"}', project_id=other.id),
+        Asset(name="Wide", type=AssetType.SHOT_TYPE, base_prompt='{"core": "wide shot"}', is_global=True),
+    ])
+    db.flush()
+    db.add(Variant(name="Party", delta_prompt='{"core": "red dress"}', asset_id=anna.id))
+    camera = db.query(Asset).filter(Asset.name == "Wide").one()
+    scene = Scene(name="S", project_id=project.id, shot_type_id=camera.id,
+                  action_text="[ANNA:party] and [anna] cross [München] to [NOBODY]")
+    db.add(scene)
+    db.commit()
+    db.refresh(scene)
+    yield db, scene, statements
+    db.close()
+
+
+def test_resolve_asset_refs_batched(catalog):
+    db, scene, statements = catalog
+    refs = parse_scene_text(scene.action_text)
+    statements.clear()
+
+    resolved, by_id = resolve_asset_refs(refs, scene.project_id, db, (scene.shot_type_id,))
+
+    assert len(statements) == 2
+    assert resolved["ANNA:party"]["base"]["core"] == "young woman"
+    assert resolved["ANNA:party"]["variant"]["core"] == "red dress"
+    assert resolved["anna"]["variant"] is None
+    assert resolved["München"]["name"] == "München"
+    assert "NOBODY" not in resolved
+    assert by_id[scene.shot_type_id].name == "Wide"
+
+
+def test_aggregate_scene_data_query_count(catalog):
+    db, scene, statements = catalog
+    statements.clear()
+
+    data = aggregate_scene_data(scene, None, db, preset_name="nano_banana_pro")
+
+    assert len(statements) == 2
+    assert set(data.assets) == {"ANNA:party", "anna", "München"}
+    assert data.camera["core"] == "wide shot"
+
+
+def test_catalog_served_from_cache_until_written(catalog):
+    from sqlalchemy.orm import Session
+    from models import Asset, Variant
+
+    db, scene, statements = catalog
+    refs = parse_scene_text(scene.action_text)
+    resolve_asset_refs(refs, scene.project_id, db)
+    statements.clear()
+
+    resolved, _ = resolve_asset_refs(refs, scene.project_id, db)
+    assert statements == []
+
+    # A write through another session invalidates the project's catalog
+    anna_id = resolved["anna"]["asset"].id
+    with Session(db.get_bind()) as writer:
+        anna = writer.get(Asset, anna_id)
+        anna.base_prompt = '{"core": "older woman"}'
+        writer.add(Variant(name="Rain", delta_prompt='{"core": "umbrella"}', asset_id=anna.id))
+        writer.commit()
+    statements.clear()
+
+    resolved, _ = resolve_asset_refs(parse_scene_text("[ANNA:rain]"), scene.project_id, db)
+    assert len(statements) == 2
+    assert resolved["ANNA:rain"]["base"]["core"] == "older woman"
+    assert resolved["ANNA:rain"]["variant"]["core"] == "umbrella"
+
+    # Bulk statements bypass the flush and drop every catalog
+    db.query(Asset).filter(Asset.id == anna_id).update({Asset.layer_core: "bulk"})
+    db.commit()
+    resolved, _ = resolve_asset_refs(parse_scene_text("[ANNA]"), scene.project_id, db)
+    assert resolved["ANNA"]["base"]["core"] == "bulk"
+
+
+def test_catalog_cache_is_bounded(catalog, monkeypatch):
+    import services.asset_catalog as asset_catalog
+    from models import Project
+
+    db, scene, statements = catalog
+    monkeypatch.setattr(asset_catalog, "CATALOG_CACHE_PROJECTS", 2)
+    projects = [Project(name=f"P{i}") for i in range(3)]
+    db.add_all(projects)
+    db.commit()
+
+    for project in projects:
+        asset_catalog.get_project_catalog(db, project.id)
+    keys = [project_id for _, project_id in asset_catalog._catalogs]
+    assert keys == [projects[1].id, projects[2].id]
@@ -1,4 +1,5 @@
 # backend/tests/test_scene_assembler.py
+import json
 import pytest
 from services.scene_assembler import build_assembly_prompt, SceneData
 
@@ -27,3 +28,32 @@ def test_build_assembly_prompt_structure():
     assert "Anna" in prompt
     assert "walks through the garden" in prompt
     assert "direction" in prompt  # New structure includes direction field
+
+
+def test_build_assembly_prompt_is_compact():
+    scene_data = SceneData(
+        direction="[ANNA] smiles",
+        assets={
+            "ANNA": {
+                "type": "character",
+                "name": "Anna",
+                "base": {"core": "young woman", "standard": "", "detail": ""},
+                "variant": None
+            }
+        },
+        camera={"core": "close-up", "standard": "", "detail": ""},
+        lighting={"core": "", "standard": "", "detail": ""},
+        style={"core": "cinematic", "standard": "", "detail": ""},
+        shot_class="close_up"
+    )
+
+    prompt = build_assembly_prompt(scene_data, max_words=300, style="narrative")
+
+    assert json.loads(prompt) == {
+        "direction": "[ANNA] smiles",
+        "shot": "close_up",
+        "assets": {"ANNA": {"type": "character", "name": "Anna", "base": {"core": "young woman"}}},
+        "camera": {"core": "close-up"},
+        "style": {"core": "cinematic"}
+    }
+    assert "\n" not in prompt and ", " not in prompt
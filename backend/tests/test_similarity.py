@@ -0,0 +1,121 @@
+# backend/tests/test_similarity.py
+import random
+from services.similarity import SimilarityIndex
+
+WORDS = ("red coat tall woman short hair glasses old sailor brass compass wooden ship storm harbor "
+         "lantern rain night forest cabin smoke dog bicycle market bread stone bridge river").split()
+
+
+def _random_prompt(rng: random.Random, length: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def test_similar_ranks_by_cosine_within_kind():
+    index = SimilarityIndex(project_id=1)
+    index.put_asset(1, "Anna", False, "tall woman in a red coat with short hair and round glasses")
+    index.put_asset(2, "Anna2", False, "tall woman in a red coat with short hair and glasses")
+    index.put_asset(3, "Berta", False, "tall woman in a green dress")
+    index.put_asset(4, "Ship", False, "wooden ship, stormy harbor")
+    index.put_asset(5, "Blank", False, "")
+    index.put_variant(10, 1, "Party", "tall woman in a red coat with short hair and round glasses")
+
+    results = index.similar("asset", 1)
+    assert [r["id"] for r in results] == [2, 3]  # No variants, no zero scores, no empty prompts
+    assert results[0]["score"] > 0.8 > results[1]["score"] > 0
+    assert [r["id"] for r in index.similar("asset", 1, min_score=0.5)] == [2]
+    assert index.similar("asset", 5) == []
+    assert index.label("variant", 10) == {"kind": "variant", "id": 10, "name": "Anna:Party", "asset_id": 1}
+
+
+def test_duplicates_cluster_near_identical_prompts():
+    rng = random.Random(3)
+    index = SimilarityIndex(project_id=1)
+    base = [_random_prompt(rng, 20) for _ in range(3)]
+    texts = {}
+    for asset_id in range(1, 201):
+        texts[asset_id] = _random_prompt(rng, 20)
+    # Clusters of copies with a word appended
+    for cluster, prompt in enumerate(base):
+        for copy in range(3):
+            texts[1000 + cluster * 10 + copy] = prompt + (" lantern" * copy)
+    for asset_id, text in texts.items():
+        index.asset_names[asset_id] = f"A{asset_id}"
+    index.add_many(["asset"] * len(texts), list(texts), list(texts.values()))
+
+    clusters = index.duplicates("asset", threshold=0.9)
+    assert sorted([m["id"] for m in c["members"]] for c in clusters) == [
+        [1000, 1001, 1002], [1010, 1011, 1012], [1020, 1021, 1022]
+    ]
+    assert all(0.9 <= c["score"] <= 1.0 for c in clusters)
+    assert index.duplicates("variant") == []
+
+
+def test_duplicates_find_every_pair_at_low_thresholds():
+    import numpy as np
+
+    rng = random.Random(5)
+    index = SimilarityIndex(project_id=1)
+    texts = []
+    for _ in range(60):
+        base = [rng.choice(WORDS) for _ in range(12)]
+        texts.append(" ".join(base))
+        # Copies with a sixth to a third of the words replaced
+        for _ in range(2):
+            copy = list(base)
+            for position in rng.sample(range(12), rng.randint(2, 4)):
+                copy[position] = rng.choice(WORDS)
+            texts.append(" ".join(copy))
+    ids = list(range(1, len(texts) + 1))
+    for asset_id in ids:
+        index.asset_names[asset_id] = f"A{asset_id}"
+    index.add_many(["asset"] * len(texts), ids, texts)
+
+    rows = np.arange(len(texts))
+    left, right = np.triu_indices(len(texts), k=1)
+    scores = index._pair_scores(rows[left], rows[right])
+    for threshold in (0.5, 0.7):
+        expected = {(ids[a], ids[b]) for a, b in zip(left[scores >= threshold], right[scores >= threshold])}
+        assert len(expected) > 20
+        cluster_of = {
+            member["id"]: number
+            for number, cluster in enumerate(index.duplicates("asset", threshold))
+            for member in cluster["members"]
+        }
+        assert all(a in cluster_of and cluster_of.get(a) == cluster_of.get(b) for a, b in expected)
+
+
+def test_incremental_updates_match_a_fresh_build():
+    rng = random.Random(11)
+    index = SimilarityIndex(project_id=1)
+    prompts = {}
+    for step in range(3000):
+        asset_id = rng.randrange(1, 60)
+        if rng.random() < 0.3:
+            prompts.pop(asset_id, None)
+            index.drop_asset(asset_id)
+        else:
+            prompts[asset_id] = _random_prompt(rng)
+            index.put_asset(asset_id, f"A{asset_id}", False, prompts[asset_id])
+
+    fresh = SimilarityIndex(project_id=1)
+    for asset_id, text in prompts.items():
+        fresh.put_asset(asset_id, f"A{asset_id}", False, text)
+    assert len(index) == len(fresh) == len(prompts)
+    for asset_id in prompts:
+        assert index.similar("asset", asset_id, limit=5) == fresh.similar("asset", asset_id, limit=5)
+    assert index.duplicates("asset", 0.5) == fresh.duplicates("asset", 0.5)
+
+
+def test_snapshot_is_unaffected_by_later_writes():
+    index = SimilarityIndex(project_id=1)
+    index.put_asset(1, "Anna", False, "tall woman in a red coat")
+    index.put_asset(2, "Anna2", False, "tall woman in a red coat with glasses")
+    snapshot = index.snapshot()
+    assert index.snapshot() is snapshot
+
+    index.drop_asset(2)
+    index.put_asset(3, "Berta", False, "tall woman in a red coat")
+    assert index.snapshot() is not snapshot
+    assert [r["id"] for r in snapshot.similar("asset", 1)] == [2]
+    assert snapshot.label("asset", 2)["name"] == "Anna2"
+    assert [r["id"] for r in index.snapshot().similar("asset", 1)] == [3]
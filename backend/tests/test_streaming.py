@@ -0,0 +1,46 @@
+# backend/tests/test_streaming.py
+from services.streaming import LayeredStreamParser, format_sse
+
+
+def test_parser_emits_fields_as_they_complete():
+    text = '{"core": "young woman", "standard": "blonde", "detail": "freckles"}'
+    parser = LayeredStreamParser()
+
+    emitted = []
+    for i, char in enumerate(text):
+        for field, value in parser.feed(char):
+            emitted.append((field, value, i))
+
+    assert [(f, v) for f, v, _ in emitted] == [
+        ("core", "young woman"), ("standard", "blonde"), ("detail", "freckles")
+    ]
+    # core is available long before the object is closed
+    assert emitted[0][2] < len(text) // 2
+
+
+def test_parser_handles_fences_escapes_and_outfit():
+    text = (
+        '```json\n{"core": "say \\"hi\\", {x}", "outfit_suggestion": '
+        '{"core": "coat", "standard": "long"}, "standard": "s", "detail": "d"}\n```'
+    )
+    parser = LayeredStreamParser()
+    for i in range(0, len(text), 7):
+        parser.feed(text[i:i + 7])
+
+    assert parser.result() == {
+        "core": 'say "hi", {x}',
+        "standard": "s",
+        "detail": "d",
+        "outfit_suggestion": {"core": "coat", "standard": "long", "detail": ""}
+    }
+
+
+def test_parser_ignores_unknown_fields():
+    parser = LayeredStreamParser()
+    emitted = parser.feed('{"notes": ["a", {"b": 1}], "count": 3, "core": "c"}')
+
+    assert emitted == [("core", "c")]
+
+
+def test_format_sse():
+    assert format_sse("layer", {"field": "core"}) == 'event: layer\ndata: {"field": "core"}\n\n'
@@ -0,0 +1,55 @@
+# backend/tests/test_tag_index.py
+import random
+from models import AssetType
+from services.tag_index import TagIndex
+
+
+def _tags(index: TagIndex, prefix: str = "") -> list:
+    return [t["tag"] for t in index.search(prefix, limit=1000)]
+
+
+def test_search_is_prefix_and_case_insensitive():
+    index = TagIndex(project_id=1)
+    index.put_asset(1, "Anna", AssetType.CHARACTER, False)
+    index.put_asset(2, "Library", AssetType.LOCATION, False)
+    index.put_asset(3, "München", AssetType.LOCATION, True)
+    index.put_variant(10, 1, "Party")
+
+    assert _tags(index, "AN") == ["Anna", "Anna:Party"]
+    assert _tags(index, "anna:p") == ["Anna:Party"]
+    assert _tags(index, "MÜ") == ["München"]
+    assert _tags(index, "x") == []
+    assert [t["tag"] for t in index.search("", limit=2)] == ["Anna", "Anna:Party"]
+
+
+def test_incremental_updates_match_a_fresh_build():
+    rng = random.Random(7)
+    index = TagIndex(project_id=1)
+    assets, variants = {}, {}
+    for step in range(500):
+        action = rng.random()
+        if action < 0.3 or not assets:
+            asset_id = rng.randrange(1, 40)
+            assets[asset_id] = f"Asset{rng.randrange(20)}"
+            index.put_asset(asset_id, assets[asset_id], AssetType.OBJECT, False)
+        elif action < 0.4:
+            asset_id = rng.choice(list(assets))
+            del assets[asset_id]
+            variants = {v: (a, n) for v, (a, n) in variants.items() if a != asset_id}
+            index.drop_asset(asset_id)
+        elif action < 0.85:
+            variant_id, asset_id = rng.randrange(1, 80), rng.choice(list(assets))
+            variants[variant_id] = (asset_id, f"V{rng.randrange(10)}")
+            index.put_variant(variant_id, *variants[variant_id])
+        elif variants:
+            variant_id = rng.choice(list(variants))
+            del variants[variant_id]
+            index.drop_variant(variant_id)
+
+    fresh = TagIndex(project_id=1)
+    for asset_id, name in assets.items():
+        fresh.put_asset(asset_id, name, AssetType.OBJECT, False)
+    for variant_id, (asset_id, name) in variants.items():
+        fresh.put_variant(variant_id, asset_id, name)
+    assert index._keys == fresh._keys
+    assert len(index) == len(assets) + len(variants)
@@ -0,0 +1,71 @@
+# backend/tests/test_template_assembler.py
+from config.image_models import get_preset
+from services.scene_assembler import SceneData
+from services.template_assembler import assemble_from_template, expand_tags
+
+
+def _scene_data():
+    return SceneData(
+        direction="[ANNA:Party] walks through [GARDEN]",
+        assets={
+            "ANNA:Party": {
+                "type": "character",
+                "name": "Anna",
+                "base": {"core": "young woman", "standard": "blonde hair", "detail": "freckles"},
+                "variant": {"core": "red dress", "standard": "silk", "detail": "lace trim"}
+            },
+            "GARDEN": {
+                "type": "location",
+                "name": "Garden",
+                "base": {"core": "rose garden", "standard": "stone fountain", "detail": "mossy steps"},
+                "variant": None
+            }
+        },
+        camera={"core": "medium shot", "standard": "shallow depth of field", "detail": "85mm lens"},
+        lighting={"core": "golden hour", "standard": "warm fill", "detail": "rim light"},
+        style={"core": "cinematic", "standard": "film grain", "detail": "anamorphic flares"}
+    )
+
+
+def test_expand_tags():
+    data = _scene_data()
+    assert expand_tags(data.direction, data.assets) == "young woman walks through rose garden"
+    assert expand_tags("[UNKNOWN] waits", data.assets) == "UNKNOWN waits"
+
+
+def test_keyword_preset_follows_structure():
+    prompt = assemble_from_template(_scene_data(), get_preset("stable_diffusion"), max_words=200)
+
+    assert prompt.startswith("young woman walks through rose garden, red dress, blonde hair")
+    order = ["lace trim", "stone fountain", "85mm lens", "rim light", "cinematic", "highly detailed"]
+    assert [prompt.index(phrase) for phrase in order] == sorted(prompt.index(phrase) for phrase in order)
+    # The location's core is already part of the expanded direction
+    assert prompt.count("rose garden") == 1
+
+
+def test_narrative_preset_one_sentence_per_section():
+    prompt = assemble_from_template(_scene_data(), get_preset("nano_banana_pro"))
+
+    assert prompt.startswith("Medium shot, shallow depth of field, 85mm lens. ")
+    assert "Young woman walks through rose garden." in prompt
+    assert prompt.endswith("Cinematic, film grain, anamorphic flares.")
+
+
+def test_max_words_drops_detail_before_core():
+    prompt = assemble_from_template(_scene_data(), get_preset("stable_diffusion"), max_words=12)
+
+    assert len(prompt.replace(",", " ").split()) <= 12
+    # Cores are cut to a common length before any of them is dropped
+    assert prompt.startswith("young woman walks through rose, red dress, medium shot")
+    assert "cinematic" in prompt
+    assert "freckles" not in prompt and "highly detailed" not in prompt
+
+
+def test_max_words_shortens_a_long_direction():
+    data = _scene_data()
+    data.direction = "[ANNA:Party] " + " ".join(f"step{i}" for i in range(90))
+    prompt = assemble_from_template(data, get_preset("midjourney"))
+
+    assert len(prompt.replace(",", " ").split()) == 80
+    assert prompt.startswith("young woman step0 step1")
+    assert "red dress" in prompt and "golden hour" in prompt
@@ -106,6 +106,10 @@ export function SettingsPage() {
       base_url: 'https://api.openai.com/v1',
       model: 'gpt-4o-mini',
     },
+    mock: {
+      base_url: '',
+      model: 'mock',
+    },
   }
 
   const handleProviderChange = (provider: string) => {
@@ -163,6 +167,7 @@ export function SettingsPage() {
                   <MenuItem value="openrouter">OpenRouter</MenuItem>
                   <MenuItem value="openai">OpenAI</MenuItem>
                   <MenuItem value="lmstudio">LM Studio (Local)</MenuItem>
+                  <MenuItem value="mock">Mock (Offline)</MenuItem>
                   <MenuItem value="custom">Custom</MenuItem>
                 </Select>
               </FormControl>
@@ -192,6 +197,8 @@ export function SettingsPage() {
                 helperText={
                   formData.llm_provider === 'lmstudio'
                     ? 'LM Studio typically does not require an API key.'
+                    : formData.llm_provider === 'mock'
+                    ? 'The offline mock provider does not need an API key.'
                     : 'Your API key is stored locally and never shared. Protect your data/ directory.'
                 }
               />